@@ -1,6 +1,22 @@
 from __future__ import print_function
 import os
+import math
+import collections
+import numpy
 from __main__ import vtk, qt, ctk, slicer
+from SlicerLeapModuleLib.Trace import TraceChannel
+from SlicerLeapModuleLib.Acquisition import AcquisitionThread, FrameRingBuffer, appendMissedFrames
+from SlicerLeapModuleLib.Filters import MotionPredictor, createPositionFilter
+from SlicerLeapModuleLib.FrameArrays import FrameArrays
+from SlicerLeapModuleLib import Gestures
+from SlicerLeapModuleLib.Instrumentation import PipelineStatistics, clock
+from SlicerLeapModuleLib.Navigation import FrameMotionNavigator
+from SlicerLeapModuleLib.Recording import FrameRecorder
+from SlicerLeapModuleLib.Scheduling import AdaptiveScheduler
+from SlicerLeapModuleLib.SliceBrowsing import SliceIndexSelector
+from SlicerLeapModuleLib import Subscriptions
+from SlicerLeapModuleLib.Tracking import SlotAssigner
+from SlicerLeapModuleLib.Workspace import InteractionBoxNormalizer, LeapToRasCalibration
 
 #
 # SlicerLeapModule
@@ -16,8 +32,8 @@ class SlicerLeapModule(object):
     parent.acknowledgementText = ""
     self.parent = parent
     
-    # Create the logic to start processing Leap messages on Slicer startup
-    logic = SlicerLeapModuleLogic()
+    # Start processing Leap messages on Slicer startup
+    SlicerLeapModuleLogic.getInstance()
 
 #
 # qSlicerLeapModuleWidget
@@ -37,6 +53,9 @@ class SlicerLeapModuleWidget(object):
       self.parent.show()
 
   def setup(self):
+    # All widgets of the module (and any other consumers) share the same logic
+    self.logic = SlicerLeapModuleLogic.getInstance()
+
     # Instantiate and connect widgets ...
 
     #
@@ -72,26 +91,229 @@ class SlicerLeapModuleWidget(object):
     self.layout.addWidget(parametersCollapsibleButton)
     parametersFormLayout = qt.QFormLayout(parametersCollapsibleButton)
 
+    #
+    # Start/stop processing of frames
+    #
+    self.enableProcessingCheckBox = qt.QCheckBox()
+    self.enableProcessingCheckBox.checked = self.logic.running
+    self.enableProcessingCheckBox.setToolTip("If checked, then frames are received from the Leap controller and the outputs are updated.")
+    parametersFormLayout.addRow("Process frames", self.enableProcessingCheckBox)
+    self.enableProcessingCheckBox.connect('toggled(bool)', self.onEnableProcessingToggled)
+
     #
     # Check box to enable creating output transforms automatically.
     # The function is useful for testing and initial creation of the transforms but not recommended when the
     # transforms are already in the scene.
     #
     self.enableAutoCreateTransformsCheckBox = qt.QCheckBox()
-    self.enableAutoCreateTransformsCheckBox.checked = 0
-    self.enableAutoCreateTransformsCheckBox.setToolTip("If checked, then transforms are created automatically (not recommended when transforms exist in the scene already).")
+    self.enableAutoCreateTransformsCheckBox.checked = self.logic.enableAutoCreateTransforms
+    self.enableAutoCreateTransformsCheckBox.setToolTip("If checked, then output transforms (or the output fiducial node) are created automatically (not recommended when they exist in the scene already).")
     parametersFormLayout.addRow("Auto-create transforms", self.enableAutoCreateTransformsCheckBox)
-    self.enableAutoCreateTransformsCheckBox.connect('stateChanged(int)', self.setEnableAutoCreateTransforms)
+    self.enableAutoCreateTransformsCheckBox.connect('toggled(bool)', self.setEnableAutoCreateTransforms)
+
+    #
+    # Output
+    #
+    self.outputModeComboBox = qt.QComboBox()
+    for label, mode in [("Transforms", "transforms"), ("Markups fiducials", "fiducials")]:
+      self.outputModeComboBox.addItem(label, mode)
+    self.outputModeComboBox.setToolTip("Transforms: each fingertip moves a HandXFingerY transform. Markups fiducials: all fingertips are control points of the LeapFingertips markups node, which is created if auto-create is enabled.")
+    self.outputModeComboBox.currentIndex = self.outputModeComboBox.findData(self.logic.outputMode)
+    parametersFormLayout.addRow("Output", self.outputModeComboBox)
+    self.outputModeComboBox.connect('currentIndexChanged(int)', self.onOutputModeChanged)
+
+    #
+    # Frame delivery
+    #
+    self.frameDeliveryComboBox = qt.QComboBox()
+    for label, mode in [("Listener", "listener"), ("Acquisition thread", "thread"), ("Polling", "polling")]:
+      self.frameDeliveryComboBox.addItem(label, mode)
+    self.frameDeliveryComboBox.setToolTip("Listener: frames are pushed by the Leap service. Acquisition thread: frames are collected by a worker thread. Polling: frames are pulled periodically by the main thread.")
+    self.frameDeliveryComboBox.currentIndex = self.frameDeliveryComboBox.findData(self.logic.frameDeliveryMode)
+    parametersFormLayout.addRow("Frame delivery", self.frameDeliveryComboBox)
+    self.frameDeliveryComboBox.connect('currentIndexChanged(int)', self.onFrameDeliveryChanged)
+    # The logic may change the mode by itself (falling back to polling)
+    self.logic.frameDeliveryModeObservers.append(self.onLogicFrameDeliveryModeChanged)
+
+    #
+    # Fingertip jitter filter
+    #
+    self.positionFilterComboBox = qt.QComboBox()
+    for label, filterType in [("None", "none"), ("One-Euro", "oneEuro"), ("Kalman", "kalman"), ("Moving average", "movingAverage")]:
+      self.positionFilterComboBox.addItem(label, filterType)
+    self.positionFilterComboBox.setToolTip("Filter that suppresses fingertip position jitter. One-Euro filter smooths slow motion and follows fast motion with low lag.")
+    self.positionFilterComboBox.currentIndex = self.positionFilterComboBox.findData(self.logic.positionFilterType)
+    parametersFormLayout.addRow("Position filter", self.positionFilterComboBox)
+    self.positionFilterComboBox.connect('currentIndexChanged(int)', self.onPositionFilterChanged)
+
+    #
+    # Latency compensation
+    #
+    self.enablePredictionCheckBox = qt.QCheckBox()
+    self.enablePredictionCheckBox.checked = self.logic.enablePrediction
+    self.enablePredictionCheckBox.setToolTip("If checked, then fingertip positions are extrapolated to the expected display time to compensate for processing and rendering delay.")
+    parametersFormLayout.addRow("Predict motion", self.enablePredictionCheckBox)
+    self.enablePredictionCheckBox.connect('toggled(bool)', self.onEnablePredictionToggled)
+
+    #
+    # Adaptive update rate
+    #
+    self.enableAdaptiveSchedulingCheckBox = qt.QCheckBox()
+    self.enableAdaptiveSchedulingCheckBox.checked = self.logic.enableAdaptiveScheduling
+    self.enableAdaptiveSchedulingCheckBox.setToolTip("If checked, then updates slow down when no hands are tracked or when processing and rendering cannot keep up.")
+    parametersFormLayout.addRow("Adaptive update rate", self.enableAdaptiveSchedulingCheckBox)
+    self.enableAdaptiveSchedulingCheckBox.connect('toggled(bool)', self.onEnableAdaptiveSchedulingToggled)
+
+    #
+    # Gesture control
+    #
+    self.enableGestureControlCheckBox = qt.QCheckBox()
+    self.enableGestureControlCheckBox.checked = self.logic.enableGestureControl
+    self.enableGestureControlCheckBox.setToolTip("If checked, then gestures control the views. Vertical swipe or tap: browse slices, horizontal swipe: rotate the 3D view, circle: zoom the 3D view.")
+    parametersFormLayout.addRow("Gesture control", self.enableGestureControlCheckBox)
+    self.enableGestureControlCheckBox.connect('toggled(bool)', self.onEnableGestureControlToggled)
+
+    #
+    # Navigation by hand motion
+    #
+    self.enableNavigationCheckBox = qt.QCheckBox()
+    self.enableNavigationCheckBox.checked = self.logic.enableNavigation
+    self.enableNavigationCheckBox.setToolTip("If checked, then the 3D view follows the translation, rotation, and scaling of the hands.")
+    parametersFormLayout.addRow("Hand motion navigation", self.enableNavigationCheckBox)
+    self.enableNavigationCheckBox.connect('toggled(bool)', self.onEnableNavigationToggled)
+
+    #
+    # Slice browsing by fingertip height
+    #
+    self.enableSliceBrowsingCheckBox = qt.QCheckBox()
+    self.enableSliceBrowsingCheckBox.checked = self.logic.enableSliceBrowsing
+    self.enableSliceBrowsingCheckBox.setToolTip("If checked, then the height of the first fingertip of the first hand selects the slice in the Red slice view.")
+    parametersFormLayout.addRow("Slice browsing", self.enableSliceBrowsingCheckBox)
+    self.enableSliceBrowsingCheckBox.connect('toggled(bool)', self.onEnableSliceBrowsingToggled)
+
+    #
+    # Calibration: map the interaction box of the controller to the bounds of a volume
+    #
+    self.calibrationVolumeSelector = slicer.qMRMLNodeComboBox()
+    self.calibrationVolumeSelector.nodeTypes = ["vtkMRMLScalarVolumeNode"]
+    self.calibrationVolumeSelector.noneEnabled = True
+    self.calibrationVolumeSelector.addEnabled = False
+    self.calibrationVolumeSelector.removeEnabled = False
+    self.calibrationVolumeSelector.setMRMLScene(slicer.mrmlScene)
+    self.calibrationVolumeSelector.setToolTip("Volume that the interaction box of the controller is mapped to by calibration.")
+    parametersFormLayout.addRow("Calibration volume", self.calibrationVolumeSelector)
+    self.calibrationVolumeSelector.connect('currentNodeChanged(vtkMRMLNode*)', self.onCalibrationVolumeChanged)
+
+    calibrationButtonsLayout = qt.QHBoxLayout()
+    self.calibrateButton = qt.QPushButton("Calibrate")
+    self.calibrateButton.toolTip = "Map the interaction box of the controller to the bounds of the calibration volume. The calibration is saved with the scene."
+    self.calibrateButton.enabled = self.calibrationVolumeSelector.currentNode() is not None
+    calibrationButtonsLayout.addWidget(self.calibrateButton)
+    self.calibrateButton.connect('clicked()', self.onCalibrate)
+    self.resetCalibrationButton = qt.QPushButton("Reset calibration")
+    self.resetCalibrationButton.toolTip = "Use fingertip positions in millimetres, only reoriented to RAS."
+    calibrationButtonsLayout.addWidget(self.resetCalibrationButton)
+    self.resetCalibrationButton.connect('clicked()', self.onResetCalibration)
+    parametersFormLayout.addRow(calibrationButtonsLayout)
+
+    #
+    # Performance Area
+    #
+    performanceCollapsibleButton = ctk.ctkCollapsibleButton()
+    performanceCollapsibleButton.text = "Performance"
+    performanceCollapsibleButton.collapsed = True
+    self.layout.addWidget(performanceCollapsibleButton)
+    performanceFormLayout = qt.QFormLayout(performanceCollapsibleButton)
+
+    self.statisticsLabel = qt.QLabel()
+    self.statisticsLabel.setTextInteractionFlags(qt.Qt.TextSelectableByMouse)
+    performanceFormLayout.addRow(self.statisticsLabel)
+
+    self.resetStatisticsButton = qt.QPushButton("Reset")
+    self.resetStatisticsButton.toolTip = "Reset frame counters and timers."
+    performanceFormLayout.addRow(self.resetStatisticsButton)
+    self.resetStatisticsButton.connect('clicked()', self.onResetStatistics)
+
+    # Statistics are only refreshed while the section is expanded
+    self.statisticsTimer = qt.QTimer()
+    self.statisticsTimer.setInterval(1000)
+    self.statisticsTimer.connect('timeout()', self.updateStatistics)
+    performanceCollapsibleButton.connect('contentsCollapsed(bool)', self.onPerformanceCollapsed)
 
     # Add vertical spacer
     self.layout.addStretch(1)
     
   def cleanup(self):
-    pass
+    self.statisticsTimer.stop()
+    if self.onLogicFrameDeliveryModeChanged in self.logic.frameDeliveryModeObservers:
+      self.logic.frameDeliveryModeObservers.remove(self.onLogicFrameDeliveryModeChanged)
+
+  def onEnableProcessingToggled(self, enable):
+    if enable:
+      self.logic.start()
+    else:
+      self.logic.stop()
+
+  def onFrameDeliveryChanged(self, index):
+    self.logic.setFrameDeliveryMode(self.frameDeliveryComboBox.itemData(index))
+
+  def onLogicFrameDeliveryModeChanged(self, mode):
+    self.frameDeliveryComboBox.currentIndex = self.frameDeliveryComboBox.findData(mode)
+
+  def onOutputModeChanged(self, index):
+    self.logic.setOutputMode(self.outputModeComboBox.itemData(index))
+
+  def onPositionFilterChanged(self, index):
+    self.logic.setPositionFilter(self.positionFilterComboBox.itemData(index))
+
+  def onEnablePredictionToggled(self, enable):
+    self.logic.setPredictionEnabled(enable)
+
+  def onEnableAdaptiveSchedulingToggled(self, enable):
+    self.logic.setAdaptiveSchedulingEnabled(enable)
+
+  def onEnableGestureControlToggled(self, enable):
+    self.logic.setGestureControlEnabled(enable)
+
+  def onEnableNavigationToggled(self, enable):
+    self.logic.setNavigationEnabled(enable)
+
+  def onEnableSliceBrowsingToggled(self, enable):
+    self.logic.setSliceBrowsingEnabled(enable)
+
+  def onCalibrationVolumeChanged(self, node):
+    self.calibrateButton.enabled = node is not None
+
+  def onCalibrate(self):
+    volumeNode = self.calibrationVolumeSelector.currentNode()
+    if volumeNode:
+      self.logic.setCalibrationToVolume(volumeNode)
+
+  def onResetCalibration(self):
+    self.logic.setCalibrationRegion(None)
+
+  def onPerformanceCollapsed(self, collapsed):
+    if collapsed:
+      self.statisticsTimer.stop()
+    else:
+      self.updateStatistics()
+      self.statisticsTimer.start()
+
+  def updateStatistics(self):
+    logic = self.logic
+    if not logic.running:
+      self.statisticsLabel.text = "Leap processing is not running"
+      return
+    text = logic.statistics.getSnapshotAsText()
+    text += "\nUpdate interval: %d ms%s" % (logic.timer.interval, " (idle)" if logic.enableAdaptiveScheduling and logic.scheduler.isIdle else "")
+    self.statisticsLabel.text = text
+
+  def onResetStatistics(self):
+    self.logic.resetStatistics()
+    self.updateStatistics()
 
   def setEnableAutoCreateTransforms(self, enable):
-    logic = SlicerLeapModuleLogic()
-    logic.setEnableAutoCreateTransforms(enable)
+    self.logic.setEnableAutoCreateTransforms(enable)
   
   def onReload(self,moduleName="SlicerLeapModule"):
     """Generic reload method for any scripted module.
@@ -132,6 +354,9 @@ class SlicerLeapModuleWidget(object):
     if hasattr(globals()['slicer'].modules, widgetName):
       getattr(globals()['slicer'].modules, widgetName).cleanup()
 
+    # stop the logic of the old source code, the new widget creates a new one
+    SlicerLeapModuleLogic.releaseInstance()
+
     # create new widget inside existing parent
     globals()[widgetName.lower()] = eval(
         'globals()["%s"].%s(parent)' % (moduleName, widgetName))
@@ -155,49 +380,1147 @@ class SlicerLeapModuleWidget(object):
 # SlicerLeapModuleLogic
 #
 
+def createFrameListener(frameQueue, listenerBaseClass=object):
+  """Create a Leap listener that hands over each new frame to the given queue.
+  The listener is called from the Leap service thread, therefore it must not touch any Qt or MRML objects.
+  listenerBaseClass must be Leap.Listener if the listener is added to a Leap.Controller.
+  """
+  class SlicerLeapFrameListener(listenerBaseClass):
+    def on_frame(self, controller):
+      # deque.append is atomic, so no extra locking is needed between the Leap thread and the main thread
+      frameQueue.append(controller.frame())
+  return SlicerLeapFrameListener()
+
 class SlicerLeapModuleLogic(object):
   """This class implements all the actual computation in the module.
   """
-  
-  def __init__(self):
-    import Leap
-    self.LeapController = Leap.Controller()
-    self.enableAutoCreateTransforms = False    
-    self.onFrame()
-      
+
+  # Frames are pushed by the Leap service thread (Leap.Listener.on_frame) and processed at each render tick
+  FRAME_DELIVERY_LISTENER = "listener"
+  # Frames are pulled from the controller periodically (fallback if listener callbacks are not available)
+  FRAME_DELIVERY_POLLING = "polling"
+  # Frames are pulled and extracted by a worker thread and processed at each render tick
+  FRAME_DELIVERY_THREAD = "thread"
+
+  # Each fingertip is written to its own linear transform node ("HandXFingerY")
+  OUTPUT_TRANSFORMS = "transforms"
+  # All fingertips are written to the control points of a single markups fiducial node
+  OUTPUT_FIDUCIALS = "fiducials"
+
+  @staticmethod
+  def getInstance(create=True):
+    """Return the logic that is shared by the module widget and all other consumers of Leap frames.
+    There is only one instance per application, so that frames are acquired by a single controller and processing loop.
+    The instance is created and started on first use (unless create is False, then None is returned).
+    """
+    logic = getattr(slicer.modules, "SlicerLeapModuleLogicInstance", None)
+    if logic is None and create:
+      logic = SlicerLeapModuleLogic()
+      slicer.modules.SlicerLeapModuleLogicInstance = logic
+      # Stop the acquisition and close any recording before the application quits
+      slicer.app.connect('aboutToQuit()', SlicerLeapModuleLogic.releaseInstance)
+      logic.start()
+    return logic
+
+  @staticmethod
+  def releaseInstance():
+    """Stop the shared logic and release it (e.g., before reloading the module, or when the application quits)"""
+    logic = getattr(slicer.modules, "SlicerLeapModuleLogicInstance", None)
+    if logic is None:
+      return
+    slicer.modules.SlicerLeapModuleLogicInstance = None
+    slicer.app.disconnect('aboutToQuit()', SlicerLeapModuleLogic.releaseInstance)
+    logic.stop()
+
+  def __init__(self, controller=None):
+    """If controller is not specified then frames are received from the Leap device (Leap.Controller).
+    Any other object with the same interface (such as SlicerLeapModuleLib.Recording.ReplayController) can be used instead.
+    Frames are not processed until start() is called.
+    Use getInstance() instead of creating a new instance, unless a separate processing loop is needed (e.g., for benchmarking).
+    """
+    # Diagnostic messages. Per-frame messages are logged at debug level, enable them by self.trace.setLevel(TraceChannel.DEBUG).
+    self.trace = TraceChannel(level=TraceChannel.WARNING)
+    if controller is None:
+      import Leap
+      controller = Leap.Controller()
+    self.LeapController = controller
+    self.enableAutoCreateTransforms = False
+    # Output transform nodes and names, indexed by (handIndex, fingerIndex)
+    self.transformNodes = {}
+    self.transformNames = {}
+    self.transformMatrices = {}
+    # Transform node updates of the current frame, as (node, matrix) pairs
+    self.pendingTransforms = []
+    # Fingertip displacements below this distance (in mm) are considered as noise and not written to the scene
+    self.deadBandMm = 0.5
+    self.lastFrameId = None
+    # If enabled then frames that were missed in polling mode are retrieved from the controller's frame history
+    self.enableCatchUp = True
+    # The controller keeps the last 60 frames
+    self.maxCatchUpFrames = 59
+    # Stage timers, frame counters, and frame rates (see getStatistics)
+    self.statistics = PipelineStatistics()
+    # Hands and fingers are mapped to output slots (the hand and finger index in the transform names)
+    # by their tracking id, so that the outputs remain stable when other hands or fingers appear or disappear
+    self.maxNumberOfHands = 2
+    self.maxNumberOfFingersPerHand = 5
+    self.handSlots = SlotAssigner(self.maxNumberOfHands)
+    self.fingerSlots = [SlotAssigner(self.maxNumberOfFingersPerHand) for handSlot in range(self.maxNumberOfHands)]
+    # Content of the frame being processed, in the order of the frame
+    self.frameArrays = FrameArrays(self.maxNumberOfHands, self.maxNumberOfFingersPerHand)
+    # Content of the most recent frame, in output slot order
+    self.slotArrays = FrameArrays(self.maxNumberOfHands, self.maxNumberOfFingersPerHand)
+    # Fingertip ids of the slots in the previous frame, and the slots that are taken by a new finger in the current frame
+    self.previousSlotFingerIds = numpy.zeros((self.maxNumberOfHands, self.maxNumberOfFingersPerHand), dtype=numpy.int64)
+    self.slotReassigned = numpy.zeros((self.maxNumberOfHands, self.maxNumberOfFingersPerHand), dtype=bool)
+    # Jitter filter of the fingertip positions, with separate state for each slot (None if filtering is disabled)
+    self.positionFilterType = None
+    self.positionFilter = None
+    # Disabled by default, so that the outputs of existing scenes do not change (filtering adds some lag at slow motion)
+    self.setPositionFilter("none")
+    # Filtered fingertip positions of the most recent frame, in output slot order
+    self.filteredTipPositions = numpy.zeros((self.maxNumberOfHands, self.maxNumberOfFingersPerHand, 3))
+    # Hand slots that are taken by a hand of the most recent frame
+    self.slotHandValid = numpy.zeros(self.maxNumberOfHands, dtype=bool)
+    # Consumers of the processed frames (see subscribe). They all receive the same snapshot.
+    self.frameSubscribers = Subscriptions.FrameSubscribers(self.trace)
+    # Latency compensation: fingertips are extrapolated to the expected display time, which is the age of the frame
+    # plus the expected time until it is rendered (displayLatencySec), at most maxPredictionHorizonSec
+    self.enablePrediction = False
+    self.displayLatencySec = 0.016
+    self.motionPredictor = MotionPredictor((self.maxNumberOfHands, self.maxNumberOfFingersPerHand))
+    self.predictedTipPositions = numpy.zeros((self.maxNumberOfHands, self.maxNumberOfFingersPerHand, 3))
+    # Fingertip positions of the last output update: predictedTipPositions if prediction is enabled, filteredTipPositions otherwise
+    self.outputTipPositions = self.filteredTipPositions
+    # Fingertip positions that were last written to the transforms, in output slot order
+    self.lastWrittenPositions = numpy.zeros((self.maxNumberOfHands, self.maxNumberOfFingersPerHand, 3))
+    self.lastWrittenValid = numpy.zeros((self.maxNumberOfHands, self.maxNumberOfFingersPerHand), dtype=bool)
+    # Output of the fingertip positions (OUTPUT_TRANSFORMS or OUTPUT_FIDUCIALS)
+    self.outputMode = self.OUTPUT_TRANSFORMS
+    # Markups fiducial node of OUTPUT_FIDUCIALS, found by name. It is only created if auto-create is enabled.
+    # Scenes that place markups by the HandXFingerY transforms (such as AllFingerFiducials.mrb) use OUTPUT_TRANSFORMS.
+    self.fiducialNodeName = "LeapFingertips"
+    # Cached lookup of the fiducial node (None if not found), valid if fiducialNodeFound is True
+    self.fiducialNode = None
+    self.fiducialNodeFound = False
+    # Control point labels and visibility are set at the first write to a node
+    self.fiducialNodeInitialized = False
+    # Control point positions in RAS (in slot order) and the vtkPoints that shares their memory, created at first use
+    self.fiducialPositions = numpy.zeros((self.maxNumberOfHands * self.maxNumberOfFingersPerHand, 3))
+    self.fiducialPoints = None
+    self.fiducialVisible = numpy.zeros(self.maxNumberOfHands * self.maxNumberOfFingersPerHand, dtype=bool)
+    # Records all received frames to file if set
+    self.recorder = None
+    self.sceneObserverTags = []
+    # Interval of draining frames received by the listener (approximately the display refresh period)
+    self.renderTickIntervalMs = 16
+    # Interval of fetching frames in polling mode
+    self.pollingIntervalMs = 100
+    # Frames received from the listener; only the most recent ones are kept if the main thread cannot keep up
+    self.frameQueue = collections.deque(maxlen=256)
+    self.frameListener = None
+    # Listener callbacks may never be called even though the listener is added successfully (as seen in Slicer).
+    # If the listener receives no frames for listenerTimeoutSec while the controller has new frames then frames are polled instead.
+    self.listenerTimeoutSec = 0.5
+    self.listenerFrameReceived = False
+    self.listenerCheckStartTime = None
+    self.listenerCheckFrameId = None
+    # Frames extracted by the acquisition thread
+    self.frameRingBuffer = FrameRingBuffer(128, self.maxNumberOfHands, self.maxNumberOfFingersPerHand)
+    self.acquisitionThread = None
+    self.frameDeliveryMode = self.FRAME_DELIVERY_LISTENER
+    # Functions that are called with the new mode when the frame delivery mode changes (also when falling back to polling)
+    self.frameDeliveryModeObservers = []
+    self.running = False
+    self.timer = qt.QTimer()
+    self.timer.connect('timeout()', self.onFrame)
+    # If enabled then the update interval is adjusted to hand presence and to the processing and rendering time
+    self.enableAdaptiveScheduling = True
+    self.scheduler = AdaptiveScheduler()
+    # True if the frame processed by the last update had hands. False if there was no new frame, so that the
+    # scheduler becomes idle when the device stops sending frames (disconnected or tracking stopped) while hands are seen.
+    self.handsPresent = False
+    # Render windows observed for measuring rendering time, as (render window, observer tags) pairs
+    self.renderWindowObservations = []
+    # Layout manager whose layout changes are observed, and whether the end of application startup is awaited
+    self.observedLayoutManager = None
+    self.startupCompletedObserved = False
+    self.renderStartTime = None
+    # Number of renders of each observed render window, for detecting if the previous update of a view is displayed already
+    self.renderCounts = {}
+    # Gestures recognized by the controller are dispatched to view actions (see setupGestureActions)
+    self.enableGestureControl = False
+    self.gestureDispatcher = Gestures.GestureDispatcher()
+    # Gesture types that are enabled on the controller, for gesture control and for subscribers (see updateGestureRecognition)
+    self.enabledGestureTypes = set()
+    # Gestures are retrieved since this frame, so that gestures of frames between updates are not missed
+    self.lastGestureFrame = None
+    self.gestureSliceViewName = "Red"
+    self.gestureRotationStepDeg = 15.0
+    # Zoom factor of a full clockwise circle (counter-clockwise circles zoom out)
+    self.gestureZoomFactorPerTurn = 1.5
+    self.setupGestureActions()
+    # Navigation: the 3D view camera (and optionally a slice view) follows the motion of the hands between updates
+    self.enableNavigation = False
+    self.navigator = FrameMotionNavigator()
+    self.lastNavigationFrame = None
+    # Name of a slice view that is moved along its normal by the hand translation (None: only the 3D view is moved)
+    self.navigationSliceViewName = None
+    # Slice browsing: the height of a fingertip (normalized to the interaction box) selects the slice in a slice view
+    self.enableSliceBrowsing = False
+    # Slice view name -> (hand index, finger index) of the fingertip that browses the view
+    self.sliceBrowsingFingers = {"Red": (0, 0)}
+    self.sliceIndexSelectors = {}
+    self.interactionBox = InteractionBoxNormalizer()
+    # Mapping of fingertip positions to RAS (see setCalibrationRegion), saved in the scene's module parameter node
+    self.calibration = LeapToRasCalibration(self.interactionBox)
+    # Output fingertip positions in RAS, in output slot order
+    self.tipPositionsRas = numpy.zeros((self.maxNumberOfHands, self.maxNumberOfFingersPerHand, 3))
+    # Set when a frame object was checked for an interaction box (frames of the device have one)
+    self.interactionBoxChecked = False
+    self.normalizedTipPositions = numpy.zeros((self.maxNumberOfHands, self.maxNumberOfFingersPerHand, 3))
+    # Slice view name -> (render window, render count, time) of the last slice offset change that may not be rendered yet.
+    # The slice of a view is changed at most once per render of the view, or after sliceBrowsingRenderTimeoutSec if the
+    # view is not rendered (e.g., it is hidden).
+    self.pendingSliceChanges = {}
+    self.sliceBrowsingRenderTimeoutSec = 0.1
+    self.frameSnapshot = Subscriptions.FrameSnapshot(self.slotHandValid, self.slotArrays.handIds, self.slotArrays.palmPositions,
+      self.slotArrays.fingerValid, self.slotArrays.fingerIds, self.slotArrays.tipPositions, self.filteredTipPositions, self.tipPositionsRas)
+
   def setEnableAutoCreateTransforms(self, enable):
     self.enableAutoCreateTransforms = enable
+    # Transforms that were not found before may be created now
+    self.onSceneNodesChanged()
 
-  def setTransform(self, handIndex, fingerIndex, fingerTipPosition):
-    
-    transformName = "Hand%iFinger%i" % (handIndex+1,fingerIndex+1) # +1 because to have 1-based indexes for the hands and fingers
-    print(transformName)
-    transform = slicer.util.getNode(transformName)
+  def setOutputMode(self, mode):
+    """Set where the fingertip positions are written: OUTPUT_TRANSFORMS or OUTPUT_FIDUCIALS"""
+    if mode not in [self.OUTPUT_TRANSFORMS, self.OUTPUT_FIDUCIALS]:
+      raise ValueError("Invalid output mode: %s" % mode)
+    self.outputMode = mode
+    # All outputs of the new mode must be written
+    self.lastWrittenValid[:] = False
+
+  def setFiducialNodeName(self, name):
+    self.fiducialNodeName = name
+    self.onSceneNodesChanged()
+
+  def setDeadBand(self, distanceMm):
+    """Set the minimum fingertip displacement (in mm) that is written to the scene"""
+    self.deadBandMm = distanceMm
+
+  def setPositionFilter(self, filterType, **parameters):
+    """Set the fingertip jitter filter: "none", "oneEuro", "kalman", or "movingAverage".
+    Parameters are passed to the filter (see SlicerLeapModuleLib.Filters).
+    """
+    self.positionFilter = createPositionFilter(filterType, (self.maxNumberOfHands, self.maxNumberOfFingersPerHand), **parameters)
+    self.positionFilterType = filterType if self.positionFilter else "none"
+
+  def setPredictionEnabled(self, enable):
+    self.enablePrediction = enable
+
+  def setPredictionHorizon(self, displayLatencySec, maxHorizonSec=None):
+    """Set the expected delay between writing a transform and displaying it, and the maximum prediction time"""
+    self.displayLatencySec = displayLatencySec
+    if maxHorizonSec is not None:
+      self.motionPredictor.maxHorizonSec = maxHorizonSec
+
+  def start(self):
+    """Start receiving frames from the controller and updating the outputs"""
+    if self.running:
+      return
+    self.running = True
+    for event in [slicer.mrmlScene.NodeAddedEvent, slicer.mrmlScene.NodeRemovedEvent, slicer.mrmlScene.EndCloseEvent]:
+      self.sceneObserverTags.append(slicer.mrmlScene.AddObserver(event, self.onSceneNodesChanged))
+    # The calibration is stored in the scene
+    for event in [slicer.mrmlScene.EndImportEvent, slicer.mrmlScene.EndCloseEvent]:
+      self.sceneObserverTags.append(slicer.mrmlScene.AddObserver(event, self.loadCalibrationFromScene))
+    self.loadCalibrationFromScene()
+    self.observeLayout()
+    self.startFrameDelivery()
+
+  def stop(self):
+    """Stop receiving and processing frames. Processing can be restarted by start()."""
+    if not self.running:
+      return
+    self.running = False
+    self.timer.stop()
+    try:
+      self.stopFrameDelivery()
+      self.stopRecording()
+    finally:
+      # Observers are removed even if closing the recording fails
+      self.removeLayoutObservers()
+      for tag in self.sceneObserverTags:
+        slicer.mrmlScene.RemoveObserver(tag)
+      self.sceneObserverTags = []
+      # Nodes may be changed while not observed
+      self.onSceneNodesChanged()
+
+  def setFrameDeliveryMode(self, mode):
+    if mode == self.frameDeliveryMode:
+      return
+    if mode not in [self.FRAME_DELIVERY_LISTENER, self.FRAME_DELIVERY_POLLING, self.FRAME_DELIVERY_THREAD]:
+      raise ValueError("Invalid frame delivery mode: %s" % mode)
+    if self.running:
+      self.stopFrameDelivery()
+    self.frameDeliveryMode = mode
+    if self.running:
+      self.startFrameDelivery()
+    self.notifyFrameDeliveryModeObservers()
+
+  def notifyFrameDeliveryModeObservers(self):
+    for observer in list(self.frameDeliveryModeObservers):
+      observer(self.frameDeliveryMode)
+
+  def startFrameDelivery(self):
+    """Start the acquisition thread or add the frame listener, and start the update timer"""
+    mode = self.frameDeliveryMode
+    if mode == self.FRAME_DELIVERY_THREAD:
+      self.acquisitionThread = AcquisitionThread(self.LeapController, self.frameRingBuffer, maxCatchUpFrames=self.maxCatchUpFrames)
+      # Only frames acquired from now on are processed
+      self.frameRingBuffer.readCount = self.frameRingBuffer.writeCount
+      self.acquisitionThread.start()
+    elif mode == self.FRAME_DELIVERY_LISTENER:
+      self.frameListener = createFrameListener(self.frameQueue, self.getListenerBaseClass())
+      self.listenerFrameReceived = False
+      self.listenerCheckStartTime = None
+      if not self.LeapController.add_listener(self.frameListener):
+        self.trace.warning("startFrameDelivery", "Failed to add Leap listener, fall back to polling frames")
+        self.frameListener = None
+        mode = self.FRAME_DELIVERY_POLLING
+    modeChanged = mode != self.frameDeliveryMode
+    self.frameDeliveryMode = mode
+    self.updateTimerInterval()
+    self.timer.start()
+    if modeChanged:
+      self.notifyFrameDeliveryModeObservers()
+
+  def checkListenerDelivery(self):
+    """Fall back to polling if the listener has not received any frame for listenerTimeoutSec while the controller has.
+    The controller is only queried at the start and at the end of each check period.
+    """
+    now = clock()
+    if self.listenerCheckStartTime is not None and now - self.listenerCheckStartTime < self.listenerTimeoutSec:
+      return
+    frameId = self.LeapController.frame().id
+    if self.listenerCheckStartTime is not None and frameId != self.listenerCheckFrameId:
+      self.trace.warning("checkListenerDelivery", "Leap listener received no frames in %.1f s while the controller did, fall back to polling frames",
+        now - self.listenerCheckStartTime)
+      self.setFrameDeliveryMode(self.FRAME_DELIVERY_POLLING)
+      return
+    # Start the check, or start it again if the controller did not have new frames either (e.g., no device connected)
+    self.listenerCheckStartTime = now
+    self.listenerCheckFrameId = frameId
+
+  def getBaseUpdateIntervalMs(self):
+    """Update interval of the frame delivery mode while hands are tracked"""
+    return self.pollingIntervalMs if self.frameDeliveryMode == self.FRAME_DELIVERY_POLLING else self.renderTickIntervalMs
+
+  def updateTimerInterval(self):
+    baseIntervalMs = self.getBaseUpdateIntervalMs()
+    if self.enableAdaptiveScheduling:
+      self.scheduler.activeIntervalSec = baseIntervalMs / 1000.0
+      intervalMs = int(round(1000.0 * self.scheduler.getInterval(clock(), self.handsPresent)))
+    else:
+      intervalMs = baseIntervalMs
+    if intervalMs != self.timer.interval:
+      self.timer.setInterval(intervalMs)
+
+  def setAdaptiveSchedulingEnabled(self, enable):
+    self.enableAdaptiveScheduling = enable
+    self.scheduler.reset()
+    self.updateTimerInterval()
+
+  def observeLayout(self):
+    """Observe the render windows of the current layout and observe layout changes to observe the views of the new layout.
+    The layout manager is created late during application startup, if it does not exist yet then observation starts
+    when startup is completed.
+    """
+    if not hasattr(slicer.app, 'layoutManager'):
+      return
+    layoutManager = slicer.app.layoutManager()
+    if not layoutManager:
+      if not self.startupCompletedObserved and hasattr(slicer.app, 'startupCompleted'):
+        slicer.app.connect('startupCompleted()', self.onStartupCompleted)
+        self.startupCompletedObserved = True
+      return
+    if self.observedLayoutManager is None:
+      layoutManager.connect('layoutChanged(int)', self.onLayoutChanged)
+      self.observedLayoutManager = layoutManager
+    self.observeRenderWindows()
+
+  def removeLayoutObservers(self):
+    if self.startupCompletedObserved:
+      slicer.app.disconnect('startupCompleted()', self.onStartupCompleted)
+      self.startupCompletedObserved = False
+    if self.observedLayoutManager is not None:
+      self.observedLayoutManager.disconnect('layoutChanged(int)', self.onLayoutChanged)
+      self.observedLayoutManager = None
+    self.removeRenderWindowObservers()
+
+  def onStartupCompleted(self):
+    slicer.app.disconnect('startupCompleted()', self.onStartupCompleted)
+    self.startupCompletedObserved = False
+    if self.running:
+      self.observeLayout()
+
+  def onLayoutChanged(self, layout=None):
+    # Views of the new layout may have been created
+    self.observeRenderWindows()
+
+  def observeRenderWindows(self):
+    """Observe rendering of the slice and 3D views, to include the rendering time in the update cost"""
+    self.removeRenderWindowObservers()
+    layoutManager = slicer.app.layoutManager() if hasattr(slicer.app, 'layoutManager') else None
+    if not layoutManager:
+      return
+    renderWindows = []
+    for threeDViewIndex in range(layoutManager.threeDViewCount):
+      renderWindows.append(layoutManager.threeDWidget(threeDViewIndex).threeDView().renderWindow())
+    for sliceViewName in layoutManager.sliceViewNames():
+      renderWindows.append(layoutManager.sliceWidget(sliceViewName).sliceView().renderWindow())
+    for renderWindow in renderWindows:
+      self.observeRenderWindow(renderWindow)
+
+  def observeRenderWindow(self, renderWindow):
+    for observedRenderWindow, tags in self.renderWindowObservations:
+      if observedRenderWindow is renderWindow:
+        return
+    tags = [renderWindow.AddObserver(vtk.vtkCommand.StartEvent, self.onRenderStarted),
+      renderWindow.AddObserver(vtk.vtkCommand.EndEvent, self.onRenderEnded)]
+    self.renderWindowObservations.append((renderWindow, tags))
+
+  def removeRenderWindowObservers(self):
+    for renderWindow, tags in self.renderWindowObservations:
+      for tag in tags:
+        renderWindow.RemoveObserver(tag)
+    self.renderWindowObservations = []
+    self.renderCounts = {}
+    # Renders of the views are not counted anymore
+    self.pendingSliceChanges = {}
+
+  def onRenderStarted(self, caller=None, event=None):
+    self.renderStartTime = clock()
+
+  def onRenderEnded(self, caller=None, event=None):
+    self.renderCounts[caller] = self.renderCounts.get(caller, 0) + 1
+    if self.renderStartTime is None:
+      return
+    self.scheduler.addRenderTime(clock() - self.renderStartTime)
+    self.renderStartTime = None
+
+  def isDeviceController(self):
+    """Returns True if frames are received from the Leap device (and not from a replay or synthetic controller)"""
+    return type(self.LeapController).__name__ == "Controller" and type(self.LeapController).__module__ == "Leap"
+
+  def getListenerBaseClass(self):
+    """Listeners of the Leap device must be derived from Leap.Listener, other controllers accept any object"""
+    if self.isDeviceController():
+      import Leap
+      return Leap.Listener
+    return object
+
+  def setController(self, controller):
+    """Receive frames from another controller (e.g., switch between the device and a replayed recording)"""
+    if self.running:
+      self.stopFrameDelivery()
+    self.LeapController = controller
+    self.lastFrameId = None
+    self.lastGestureFrame = None
+    self.lastNavigationFrame = None
+    self.gestureDispatcher.reset()
+    # Nothing is enabled on the new controller yet
+    self.enabledGestureTypes = set()
+    if self.enableGestureControl:
+      self.setGestureControlEnabled(True)
+    else:
+      self.updateGestureRecognition()
+    self.handSlots.reset()
+    for fingerSlots in self.fingerSlots:
+      fingerSlots.reset()
+    if self.running:
+      self.startFrameDelivery()
+
+  def stopFrameDelivery(self):
+    """Remove the frame listener and stop the acquisition thread"""
+    if self.acquisitionThread is not None:
+      self.acquisitionThread.stop()
+      self.acquisitionThread = None
+    if self.frameListener is not None:
+      self.LeapController.remove_listener(self.frameListener)
+      self.frameListener = None
+      self.frameQueue.clear()
+
+  def setupGestureActions(self):
+    """Fill the gesture dispatch table. Actions can be replaced by gestureDispatcher.setAction."""
+    dispatcher = self.gestureDispatcher
+    dispatcher.setAction(Gestures.TYPE_SWIPE, Gestures.STATE_STOP, self.onSwipeGesture)
+    dispatcher.setAction(Gestures.TYPE_CIRCLE, Gestures.STATE_UPDATE, self.onCircleGesture)
+    dispatcher.setAction(Gestures.TYPE_KEY_TAP, Gestures.STATE_STOP, lambda gesture, trackedGesture: self.stepSlice(1))
+    dispatcher.setAction(Gestures.TYPE_SCREEN_TAP, Gestures.STATE_STOP, lambda gesture, trackedGesture: self.stepSlice(-1))
+
+  def setGestureControlEnabled(self, enable):
+    """Enable recognition of the gestures that have actions and dispatch them at each update"""
+    self.enableGestureControl = enable
+    if self.isDeviceController():
+      import Leap
+      self.gestureDispatcher.gestureClasses = {
+        Gestures.TYPE_SWIPE: Leap.SwipeGesture,
+        Gestures.TYPE_CIRCLE: Leap.CircleGesture,
+        Gestures.TYPE_SCREEN_TAP: Leap.ScreenTapGesture,
+        Gestures.TYPE_KEY_TAP: Leap.KeyTapGesture,
+        }
+    else:
+      self.gestureDispatcher.gestureClasses = {}
+    self.updateGestureRecognition()
+    self.gestureDispatcher.reset()
+
+  def updateGestureRecognition(self):
+    """Enable the gesture types that have actions if gesture control is enabled, and all gesture types if any
+    subscriber is interested in gestures. Disable the other gesture types on the controller.
+    """
+    gestureTypes = set()
+    if self.enableGestureControl:
+      gestureTypes.update(self.gestureDispatcher.getActionGestureTypes())
+    if self.frameSubscribers.hasInterest(Subscriptions.INTEREST_GESTURES):
+      gestureTypes.update(Gestures.GESTURE_TYPE_NAMES)
+    if gestureTypes == self.enabledGestureTypes:
+      return
+    for gestureType in gestureTypes.symmetric_difference(self.enabledGestureTypes):
+      self.LeapController.enable_gesture(gestureType, gestureType in gestureTypes)
+    if not self.enabledGestureTypes:
+      # Gestures are retrieved from now on
+      self.lastGestureFrame = None
+    self.enabledGestureTypes = gestureTypes
+
+  def getNewGestures(self, frame):
+    """Return all gestures that were recognized since the previous update"""
+    gestures = frame.gestures(self.lastGestureFrame) if self.lastGestureFrame is not None else frame.gestures()
+    self.lastGestureFrame = frame
+    return gestures
+
+  def subscribe(self, callback, interests=(Subscriptions.INTEREST_FINGERTIPS,), maxRateHz=None):
+    """Call callback(snapshot) after each processed frame, at most maxRateHz times per second.
+    interests: any of "hands", "fingertips", "palms", "gestures" (see SlicerLeapModuleLib.Subscriptions).
+    snapshot is a FrameSnapshot that is shared by all subscribers and is only valid during the callback.
+    Returns the subscription, which can be passed to unsubscribe.
+    """
+    subscription = self.frameSubscribers.subscribe(callback, interests, maxRateHz)
+    self.updateExtractionOptions()
+    return subscription
+
+  def unsubscribe(self, subscription):
+    self.frameSubscribers.unsubscribe(subscription)
+    self.updateExtractionOptions()
+
+  def updateExtractionOptions(self):
+    """Only extract palm positions if a subscriber needs them, recognize gestures if a subscriber needs them"""
+    extractPalms = self.frameSubscribers.hasInterest(Subscriptions.INTEREST_PALMS)
+    self.frameArrays.extractPalms = extractPalms
+    self.frameRingBuffer.setExtractPalms(extractPalms)
+    self.updateGestureRecognition()
+
+  def publishFrame(self, gestures):
+    snapshot = self.frameSnapshot
+    snapshot.frameId = self.slotArrays.frameId
+    snapshot.timestamp = self.slotArrays.timestamp
+    snapshot.timeSec = clock()
+    snapshot.gestures = gestures
+    self.frameSubscribers.publish(snapshot)
+
+  def onSwipeGesture(self, gesture, trackedGesture):
+    direction = gesture.direction
+    if abs(direction.x) > abs(direction.y):
+      self.rotateView(self.gestureRotationStepDeg if direction.x > 0 else -self.gestureRotationStepDeg)
+    else:
+      self.stepSlice(1 if direction.y > 0 else -1)
+
+  def onCircleGesture(self, gesture, trackedGesture):
+    # Progress is the number of turns since the start of the gesture, only the increment is applied
+    progressIncrement = gesture.progress - trackedGesture.progress
+    trackedGesture.progress = gesture.progress
+    clockwise = gesture.pointable.direction.angle_to(gesture.normal) <= math.pi/2
+    self.zoomView(self.gestureZoomFactorPerTurn ** (progressIncrement if clockwise else -progressIncrement))
+
+  def stepSlice(self, numberOfSlices):
+    """Move the gesture slice view by a number of slices of the displayed volume"""
+    layoutManager = slicer.app.layoutManager()
+    sliceWidget = layoutManager.sliceWidget(self.gestureSliceViewName) if layoutManager else None
+    if not sliceWidget:
+      return
+    sliceLogic = sliceWidget.sliceLogic()
+    sliceSpacing = sliceLogic.GetLowestVolumeSliceSpacing()[2]
+    sliceLogic.SetSliceOffset(sliceLogic.GetSliceOffset() + numberOfSlices * sliceSpacing)
+
+  def getThreeDViewRenderer(self):
+    """Return the first 3D view and its renderer (None, None if there is no 3D view)"""
+    layoutManager = slicer.app.layoutManager()
+    if not layoutManager or layoutManager.threeDViewCount < 1:
+      return None, None
+    threeDView = layoutManager.threeDWidget(0).threeDView()
+    return threeDView, threeDView.renderWindow().GetRenderers().GetFirstRenderer()
+
+  def rotateView(self, angleDeg):
+    threeDView, renderer = self.getThreeDViewRenderer()
+    if not renderer:
+      return
+    camera = renderer.GetActiveCamera()
+    camera.Azimuth(angleDeg)
+    camera.OrthogonalizeViewUp()
+    renderer.ResetCameraClippingRange()
+    threeDView.scheduleRender()
+
+  def zoomView(self, factor):
+    threeDView, renderer = self.getThreeDViewRenderer()
+    if not renderer:
+      return
+    renderer.GetActiveCamera().Dolly(factor)
+    renderer.ResetCameraClippingRange()
+    threeDView.scheduleRender()
+
+  def setNavigationEnabled(self, enable):
+    self.enableNavigation = enable
+    self.lastNavigationFrame = None
+
+  def updateNavigation(self, frame):
+    """Move the views by the motion of the hands since the previous update"""
+    if not hasattr(frame, "translation_probability"):
+      # Inter-frame motion is only estimated by the device
+      return
+    if not len(frame.hands):
+      # Start again from the next frame with hands, motion between hands leaving and re-entering is meaningless
+      self.lastNavigationFrame = None
+      return
+    sinceFrame = self.lastNavigationFrame
+    self.lastNavigationFrame = frame
+    if sinceFrame is None:
+      return
+    threeDView, renderer = self.getThreeDViewRenderer()
+    camera = renderer.GetActiveCamera() if renderer else None
+    # Rotation is about the camera focal point
+    if not self.navigator.update(frame, sinceFrame, camera.GetFocalPoint() if camera else (0.0, 0.0, 0.0)):
+      return
+    if camera:
+      # The scene follows the hands, so the camera moves by the inverse of the increment
+      camera.SetPosition(self.navigator.transformPointInverse(camera.GetPosition()))
+      camera.SetFocalPoint(self.navigator.transformPointInverse(camera.GetFocalPoint()))
+      camera.SetViewUp(self.navigator.transformDirectionInverse(camera.GetViewUp()))
+      camera.Dolly(self.navigator.scaleFactor)
+      camera.OrthogonalizeViewUp()
+      renderer.ResetCameraClippingRange()
+      threeDView.scheduleRender()
+    if self.navigationSliceViewName:
+      layoutManager = slicer.app.layoutManager()
+      sliceWidget = layoutManager.sliceWidget(self.navigationSliceViewName) if layoutManager else None
+      if sliceWidget:
+        # Only the translation component along the slice normal moves the slice
+        sliceToRas = sliceWidget.mrmlSliceNode().GetSliceToRAS()
+        sliceNormal = [sliceToRas.GetElement(row, 2) for row in range(3)]
+        sliceLogic = sliceWidget.sliceLogic()
+        sliceLogic.SetSliceOffset(sliceLogic.GetSliceOffset() + numpy.dot(self.navigator.translationRas, sliceNormal))
+
+  def setSliceBrowsingEnabled(self, enable):
+    self.enableSliceBrowsing = enable
+    self.sliceIndexSelectors = {}
+    self.pendingSliceChanges = {}
+
+  def setSliceBrowsingFinger(self, sliceViewName, handIndex, fingerIndex):
+    """Set the fingertip that browses a slice view. Stop browsing the view if handIndex is None."""
+    if handIndex is None:
+      self.sliceBrowsingFingers.pop(sliceViewName, None)
+    else:
+      self.sliceBrowsingFingers[sliceViewName] = (handIndex, fingerIndex)
+    self.sliceIndexSelectors.pop(sliceViewName, None)
+
+  def getParameterNode(self, create=False):
+    """Return the node that stores the module settings that are saved with the scene (None if there is none and create is False)"""
+    parameterNode = slicer.mrmlScene.GetSingletonNode("SlicerLeapModule", "vtkMRMLScriptedModuleNode")
+    if parameterNode is None and create:
+      parameterNode = slicer.vtkMRMLScriptedModuleNode()
+      parameterNode.SetSingletonTag("SlicerLeapModule")
+      parameterNode.SetModuleName("SlicerLeapModule")
+      parameterNode.SetName("SlicerLeapModule")
+      slicer.mrmlScene.AddNode(parameterNode)
+    return parameterNode
+
+  def setCalibrationRegion(self, rasBounds):
+    """Map the interaction box of the controller to a RAS region (Rmin, Rmax, Amin, Amax, Smin, Smax).
+    If rasBounds is None then fingertip positions are only reoriented to RAS, in millimetres.
+    The calibration is saved in the scene.
+    """
+    self.calibration.setTargetBounds(rasBounds)
+    # All outputs must be moved to the new mapping
+    self.lastWrittenValid[:] = False
+    parameterNode = self.getParameterNode(create=rasBounds is not None)
+    if parameterNode:
+      parameterNode.SetParameter("LeapToRasCalibration", self.calibration.toString())
+
+  def setCalibrationToVolume(self, volumeNode):
+    """Map the interaction box of the controller to the bounds of a volume"""
+    rasBounds = [0.0] * 6
+    volumeNode.GetRASBounds(rasBounds)
+    self.setCalibrationRegion(rasBounds)
+
+  def loadCalibrationFromScene(self, caller=None, event=None):
+    parameterNode = self.getParameterNode()
+    calibrationString = parameterNode.GetParameter("LeapToRasCalibration") if parameterNode else ""
+    try:
+      self.calibration.setFromString(calibrationString)
+    except ValueError as e:
+      self.trace.warning("loadCalibrationFromScene", "Calibration is not loaded from the scene: %s", e)
+      self.calibration.setTargetBounds(None)
+    self.lastWrittenValid[:] = False
 
+  def updateInteractionBox(self, frame):
+    """Copy the interaction box from a frame object, if it has one (frames of the device)"""
+    self.interactionBoxChecked = True
+    interactionBox = getattr(frame, "interaction_box", None)
+    if interactionBox is not None:
+      self.interactionBox.setFromInteractionBox(interactionBox)
+
+  def updateSliceBrowsing(self):
+    """Move each browsed slice view to the slice that is selected by the height of its fingertip.
+    Slice offsets are quantized to the slice spacing of the displayed volume and only written if they change,
+    at most once per render of the view.
+    """
+    layoutManager = slicer.app.layoutManager() if hasattr(slicer.app, 'layoutManager') else None
+    if not layoutManager:
+      return
+    now = clock()
+    # Same positions as the transform outputs, so that browsing also benefits from motion prediction
+    self.interactionBox.normalize(self.outputTipPositions, self.normalizedTipPositions)
+    fingerValid = self.slotArrays.fingerValid
+    pendingSliceOffsets = []
+    for sliceViewName, (handIndex, fingerIndex) in self.sliceBrowsingFingers.items():
+      if not fingerValid[handIndex, fingerIndex]:
+        continue
+      sliceWidget = layoutManager.sliceWidget(sliceViewName)
+      if not sliceWidget:
+        continue
+      renderWindow = sliceWidget.sliceView().renderWindow()
+      if self.isSliceChangePending(sliceViewName, renderWindow, now):
+        # The previous slice change is not rendered yet, the next update will use the most recent fingertip position
+        continue
+      sliceLogic = sliceWidget.sliceLogic()
+      sliceBounds = [0.0] * 6
+      sliceLogic.GetLowestVolumeSliceBounds(sliceBounds)
+      sliceSpacing = sliceLogic.GetLowestVolumeSliceSpacing()[2]
+      if sliceSpacing <= 0 or sliceBounds[5] <= sliceBounds[4]:
+        continue
+      numberOfSlices = max(1, int(round((sliceBounds[5] - sliceBounds[4]) / sliceSpacing)))
+      selector = self.sliceIndexSelectors.get(sliceViewName)
+      if selector is None:
+        selector = SliceIndexSelector()
+        self.sliceIndexSelectors[sliceViewName] = selector
+      sliceIndex = selector.getSliceIndex(self.normalizedTipPositions[handIndex, fingerIndex, 1], numberOfSlices)
+      # Slice centers are half a slice spacing inside the volume bounds
+      sliceOffset = sliceBounds[4] + (sliceIndex + 0.5) * sliceSpacing
+      if abs(sliceLogic.GetSliceOffset() - sliceOffset) > 0.01 * sliceSpacing:
+        pendingSliceOffsets.append((sliceViewName, renderWindow, sliceLogic, sliceOffset))
+    if not pendingSliceOffsets:
+      return
+    for sliceViewName, renderWindow, sliceLogic, sliceOffset in pendingSliceOffsets:
+      # The view may not be in the observed layout yet
+      self.observeRenderWindow(renderWindow)
+      self.pendingSliceChanges[sliceViewName] = (renderWindow, self.renderCounts.get(renderWindow, 0), now)
+    # All views are changed together and rendered once
+    pauseRender = hasattr(slicer.app, 'pauseRender')
+    if pauseRender:
+      slicer.app.pauseRender()
+    try:
+      for sliceViewName, renderWindow, sliceLogic, sliceOffset in pendingSliceOffsets:
+        sliceLogic.SetSliceOffset(sliceOffset)
+    finally:
+      if pauseRender:
+        slicer.app.resumeRender()
+
+  def isSliceChangePending(self, sliceViewName, renderWindow, now):
+    """Returns True if the last slice change of the view is not rendered yet and is not timed out"""
+    pendingChange = self.pendingSliceChanges.get(sliceViewName)
+    if pendingChange is None:
+      return False
+    changedRenderWindow, renderCount, changeTime = pendingChange
+    if (changedRenderWindow is renderWindow and self.renderCounts.get(renderWindow, 0) == renderCount
+      and now - changeTime < self.sliceBrowsingRenderTimeoutSec):
+      return True
+    del self.pendingSliceChanges[sliceViewName]
+    return False
+
+  def setPollingInterval(self, intervalMs):
+    self.pollingIntervalMs = intervalMs
+    self.updateTimerInterval()
+
+  def setRenderTickInterval(self, intervalMs):
+    self.renderTickIntervalMs = intervalMs
+    self.updateTimerInterval()
+
+  def startRecording(self, filePath):
+    """Start recording all frames received from the device to a file"""
+    self.stopRecording()
+    self.setExtractDirections(True)
+    self.recorder = FrameRecorder(filePath, self.maxNumberOfHands, self.maxNumberOfFingersPerHand, trace=self.trace)
+    self.recorder.start()
+
+  def stopRecording(self):
+    if self.recorder is None:
+      return
+    recorder = self.recorder
+    self.recorder = None
+    try:
+      recorder.stop()
+    finally:
+      self.setExtractDirections(False)
+    self.trace.info("stopRecording", "Recorded %d frames to %s", recorder.numberOfRecordedFrames, recorder.filePath)
+    if recorder.numberOfDroppedFrames:
+      self.trace.warning("stopRecording", "%d frames were not recorded to %s", recorder.numberOfDroppedFrames, recorder.filePath)
+
+  def setExtractDirections(self, enable):
+    self.frameArrays.extractDirections = enable
+    self.frameRingBuffer.setExtractDirections(enable)
+
+  def onSceneNodesChanged(self, caller=None, event=None):
+    # Any node addition/removal may create, delete, or rename an output transform,
+    # so just drop all cached lookups (including the ones that did not find a node).
+    self.transformNodes.clear()
+    self.fiducialNode = None
+    self.fiducialNodeFound = False
+    # Newly found nodes must be updated even if the finger does not move
+    self.lastWrittenValid[:] = False
+
+  def getTransformNode(self, handIndex, fingerIndex):
+    """Return the output transform node of the finger (None if not found).
+    Lookup results are cached until nodes are added to or removed from the scene.
+    """
+    key = (handIndex, fingerIndex)
+    try:
+      return self.transformNodes[key]
+    except KeyError:
+      pass
+    transformName = self.transformNames.get(key)
+    if transformName is None:
+      transformName = "Hand%iFinger%i" % (handIndex+1,fingerIndex+1) # +1 because to have 1-based indexes for the hands and fingers
+      self.transformNames[key] = transformName
+    transform = slicer.mrmlScene.GetFirstNodeByName(transformName)
     # Create the transform if does not exist yet
+    if not transform and self.enableAutoCreateTransforms :
+      transform = slicer.vtkMRMLLinearTransformNode()
+      transform.SetName(transformName)
+      slicer.mrmlScene.AddNode(transform)
+    self.transformNodes[key] = transform
+    return transform
+
+  def setTransform(self, handIndex, fingerIndex, fingerTipPositionRas):
+    key = (handIndex, fingerIndex)
+    transform = self.getTransformNode(handIndex, fingerIndex)
     if not transform :
-      if self.enableAutoCreateTransforms :
-        # Create the missing transform
-        transform = slicer.vtkMRMLLinearTransformNode()
-        transform.SetName(transformName)
-        slicer.mrmlScene.AddNode(transform)
-      else :
-        # No transform exist, so just ignore the finger
-        return
-    
-    newTransform = vtk.vtkTransform()
-    # Reorder and reorient to match the LeapMotion's coordinate system with RAS coordinate system
-    newTransform.Translate(-fingerTipPosition[0], fingerTipPosition[2], fingerTipPosition[1])
-    transform.SetMatrixTransformToParent(newTransform.GetMatrix())
-  
+      # No transform exist, so just ignore the finger
+      return
+    r, a, s = fingerTipPositionRas[0], fingerTipPositionRas[1], fingerTipPositionRas[2]
+    self.trace.debug("setTransform", "Update %s", self.transformNames[key])
+
+    # Each finger has its own preallocated matrix, only the translation part of it is ever changed
+    matrix = self.transformMatrices.get(key)
+    if matrix is None:
+      matrix = vtk.vtkMatrix4x4()
+      self.transformMatrices[key] = matrix
+    matrix.SetElement(0, 3, r)
+    matrix.SetElement(1, 3, a)
+    matrix.SetElement(2, 3, s)
+    # The node is updated in applyPendingTransforms, together with all the other fingers of the frame
+    self.pendingTransforms.append((transform, matrix))
+
+  def applyPendingTransforms(self):
+    """Write all transforms collected for the current frame to the scene in one batch.
+    Modified events are held back until all nodes are updated and rendering is paused meanwhile,
+    so observers and views see a single consistent update per frame instead of one per finger.
+    """
+    if not self.pendingTransforms:
+      return
+    pauseRender = hasattr(slicer.app, 'pauseRender')
+    if pauseRender:
+      slicer.app.pauseRender()
+    try:
+      wasModifying = [transform.StartModify() for transform, matrix in self.pendingTransforms]
+      for transform, matrix in self.pendingTransforms:
+        transform.SetMatrixTransformToParent(matrix)
+      for (transform, matrix), modifying in zip(self.pendingTransforms, wasModifying):
+        transform.EndModify(modifying)
+    finally:
+      del self.pendingTransforms[:]
+      if pauseRender:
+        slicer.app.resumeRender()
+
+  def getFiducialNode(self):
+    """Return the output fiducial node (None if not found).
+    Lookup results are cached until nodes are added to or removed from the scene.
+    """
+    if self.fiducialNodeFound:
+      return self.fiducialNode
+    fiducialNode = slicer.mrmlScene.GetFirstNodeByName(self.fiducialNodeName)
+    if not fiducialNode:
+      if self.enableAutoCreateTransforms:
+        fiducialNode = slicer.vtkMRMLMarkupsFiducialNode()
+        fiducialNode.SetName(self.fiducialNodeName)
+        slicer.mrmlScene.AddNode(fiducialNode)
+        fiducialNode.CreateDefaultDisplayNodes()
+      else:
+        self.trace.warning("getFiducialNode", "Markups fiducial node %s is not in the scene, enable auto-create to create it", self.fiducialNodeName)
+    # Setting the cache after the node is added, as adding a node resets it
+    self.fiducialNode = fiducialNode
+    self.fiducialNodeFound = True
+    self.fiducialNodeInitialized = False
+    return fiducialNode
+
+  def setFiducialPositions(self, positions, visible):
+    """Write all fingertip positions (in RAS) to the control points of the output fiducial node, with a single modified event.
+    Fingertips that are not visible keep their last position and are hidden.
+    """
+    fiducialNode = self.getFiducialNode()
+    if not fiducialNode:
+      return
+    visible = visible.reshape(-1)
+    fiducialPositions = self.fiducialPositions
+    fiducialPositions[visible] = positions.reshape(-1, 3)[visible]
+    wasModifying = fiducialNode.StartModify()
+    try:
+      if hasattr(fiducialNode, "SetControlPointPositionsWorld"):
+        if self.fiducialPoints is None:
+          from vtk.util import numpy_support
+          self.fiducialPoints = vtk.vtkPoints()
+          # The points use the memory of fiducialPositions, so they are never copied
+          self.fiducialPoints.SetData(numpy_support.numpy_to_vtk(self.fiducialPositions, deep=False))
+        self.fiducialPoints.Modified()
+        fiducialNode.SetControlPointPositionsWorld(self.fiducialPoints)
+        setVisibility, setLabel = fiducialNode.SetNthControlPointVisibility, fiducialNode.SetNthControlPointLabel
+      else:
+        # Markups API of Slicer versions before control points were introduced
+        while fiducialNode.GetNumberOfFiducials() < len(fiducialPositions):
+          fiducialNode.AddFiducial(0.0, 0.0, 0.0)
+        for pointIndex, (x, y, z) in enumerate(fiducialPositions.tolist()):
+          fiducialNode.SetNthFiducialPosition(pointIndex, x, y, z)
+        setVisibility, setLabel = fiducialNode.SetNthFiducialVisibility, fiducialNode.SetNthFiducialLabel
+      if not self.fiducialNodeInitialized:
+        for pointIndex in range(len(fiducialPositions)):
+          handIndex, fingerIndex = divmod(pointIndex, self.maxNumberOfFingersPerHand)
+          setLabel(pointIndex, "Hand%iFinger%i" % (handIndex+1, fingerIndex+1))
+        changedPoints = range(len(fiducialPositions))
+        self.fiducialNodeInitialized = True
+      else:
+        changedPoints = numpy.nonzero(visible != self.fiducialVisible)[0].tolist()
+      for pointIndex in changedPoints:
+        setVisibility(pointIndex, bool(visible[pointIndex]))
+      self.fiducialVisible[:] = visible
+    finally:
+      fiducialNode.EndModify(wasModifying)
+
+  def getNewFrames(self):
+    """Return all frames that have not been processed yet, ordered from the oldest to the newest"""
+    if self.frameDeliveryMode == self.FRAME_DELIVERY_LISTENER:
+      # Drain the queue, the listener may have received several frames since the last render tick
+      frames = []
+      while self.frameQueue:
+        frames.append(self.frameQueue.popleft())
+      if frames:
+        self.listenerFrameReceived = True
+      elif not self.listenerFrameReceived:
+        self.checkListenerDelivery()
+      return frames
+
+    newestFrame = self.LeapController.frame()
+    # The controller returns the same frame again if polled faster than the device frame rate
+    if newestFrame.id == self.lastFrameId:
+      self.statistics.duplicateFrameCount += 1
+      return []
+    frames = [newestFrame]
+    if self.enableCatchUp and self.lastFrameId is not None:
+      # Walk back in the controller's frame history to retrieve the frames that arrived since the last poll
+      appendMissedFrames(self.LeapController, self.lastFrameId, newestFrame.id, self.maxCatchUpFrames, frames)
+      frames.reverse()
+    return frames
+
+  def updateFrameState(self, frames):
+    """Update the state that depends on the full frame stream (all frames, not just the processed ones)"""
+    for frame in frames:
+      startTime = clock()
+      self.frameArrays.extract(frame)
+      self.statistics.addStageDuration("extract", clock() - startTime)
+      self.updateExtractedFrameState(self.frameArrays, frame.current_frames_per_second)
+    if len(frames) > 1:
+      self.statistics.caughtUpFrameCount += len(frames)-1
+      self.trace.debug("updateFrameState", "Caught up %d missed frames", len(frames)-1)
+
+  def updateExtractedFrameState(self, frameArrays, deviceFramesPerSecond):
+    """Update the frame stream dependent state by a frame that is already extracted into arrays"""
+    startTime = clock()
+    if self.recorder is not None:
+      self.recorder.addFrame(frameArrays)
+    self.updateSlots(frameArrays)
+    self.filterPositions()
+    self.statistics.addStageDuration("filter", clock() - startTime)
+    self.statistics.addReceivedFrame(frameArrays.frameId, deviceFramesPerSecond)
+    self.motionPredictor.updateClockOffset(startTime, frameArrays.timestamp * 1.0e-6)
+
+  def updateSlots(self, frameArrays):
+    """Assign hands and fingers of the frame to output slots and copy them to the slot arrays"""
+    sourceHands, sourceFingers, targetHands, targetFingers = [], [], [], []
+    sourceHandSlots, targetHandSlots = [], []
+    numberOfFingers = frameArrays.numberOfFingers.tolist()
+    handSlots = self.handSlots.assignIds(frameArrays.handIds[:frameArrays.numberOfHands].tolist())
+    for handIndex, handSlot in enumerate(handSlots):
+      if handSlot < 0:
+        continue
+      sourceHandSlots.append(handIndex)
+      targetHandSlots.append(handSlot)
+      assignedFingerSlots = self.fingerSlots[handSlot].assignIds(frameArrays.fingerIds[handIndex, :numberOfFingers[handIndex]].tolist())
+      for fingerIndex, fingerSlot in enumerate(assignedFingerSlots):
+        if fingerSlot < 0:
+          continue
+        sourceHands.append(handIndex)
+        sourceFingers.append(fingerIndex)
+        targetHands.append(handSlot)
+        targetFingers.append(fingerSlot)
+    for fingerSlots in self.fingerSlots:
+      fingerSlots.endFrame()
+    for handSlot in self.handSlots.endFrame():
+      # Finger ids are unique, but a new hand in the slot should start filling finger slots from the first one
+      self.fingerSlots[handSlot].reset()
+
+    slotArrays = self.slotArrays
+    slotArrays.frameId = frameArrays.frameId
+    slotArrays.timestamp = frameArrays.timestamp
+    slotArrays.numberOfHands = len(targetHandSlots)
+    self.slotHandValid[:] = False
+    self.slotHandValid[targetHandSlots] = True
+    slotArrays.handIds[targetHandSlots] = frameArrays.handIds[sourceHandSlots]
+    slotArrays.palmPositions[targetHandSlots] = frameArrays.palmPositions[sourceHandSlots]
+    slotArrays.fingerValid[:] = False
+    slotArrays.fingerValid[targetHands, targetFingers] = True
+    slotArrays.fingerIds[targetHands, targetFingers] = frameArrays.fingerIds[sourceHands, sourceFingers]
+    slotArrays.tipPositions[targetHands, targetFingers] = frameArrays.tipPositions[sourceHands, sourceFingers]
+    numpy.not_equal(slotArrays.fingerIds, self.previousSlotFingerIds, out=self.slotReassigned)
+    self.slotReassigned &= slotArrays.fingerValid
+    self.previousSlotFingerIds[:] = slotArrays.fingerIds
+
+  def filterPositions(self):
+    """Filter the fingertip positions of the current frame into filteredTipPositions"""
+    slotArrays = self.slotArrays
+    timeSec = slotArrays.timestamp * 1.0e-6
+    if self.positionFilter is None:
+      self.filteredTipPositions[:] = slotArrays.tipPositions
+    else:
+      # A new finger in a slot must not inherit the filter state of the previous finger
+      self.positionFilter.reset(self.slotReassigned)
+      self.positionFilter.update(slotArrays.tipPositions, slotArrays.fingerValid, timeSec, self.filteredTipPositions)
+    if self.enablePrediction:
+      self.motionPredictor.reset(self.slotReassigned)
+      self.motionPredictor.update(self.filteredTipPositions, slotArrays.fingerValid, timeSec)
+
+  def updateOutputs(self):
+    """Write the fingertip positions of the most recent frame to the scene"""
+    positions = self.filteredTipPositions
+    if self.enablePrediction:
+      frameAgeSec = self.motionPredictor.getFrameAgeSec(clock(), self.slotArrays.timestamp * 1.0e-6)
+      self.motionPredictor.predict(positions, self.slotArrays.fingerValid, frameAgeSec + self.displayLatencySec, self.predictedTipPositions)
+      positions = self.predictedTipPositions
+    self.outputTipPositions = positions
+    if not self.calibration.isUpToDate():
+      # The interaction box changed, so the mapping to RAS changed and all outputs must be moved
+      self.calibration.updateMatrix()
+      self.lastWrittenValid[:] = False
+    # All fingertips are mapped to RAS in one step
+    positionsRas = self.calibration.apply(positions, self.tipPositionsRas)
+    # Only write fingertips that moved more than the dead-band since the last write
+    displacements = positions - self.lastWrittenPositions
+    moved = numpy.einsum('ijk,ijk->ij', displacements, displacements) >= self.deadBandMm*self.deadBandMm
+    moved |= ~self.lastWrittenValid
+    fingerValid = self.slotArrays.fingerValid
+    moved &= fingerValid
+    if self.outputMode == self.OUTPUT_FIDUCIALS:
+      # All control points are written in one update, if any fingertip moved, appeared, or disappeared
+      if moved.any() or (self.lastWrittenValid & ~fingerValid).any():
+        self.setFiducialPositions(positionsRas, fingerValid)
+        self.lastWrittenPositions[fingerValid] = positions[fingerValid]
+        self.lastWrittenValid[:] = fingerValid
+      return
+    handSlots, fingerSlots = numpy.nonzero(moved)
+    for handSlot, fingerSlot in zip(handSlots.tolist(), fingerSlots.tolist()):
+      self.setTransform(handSlot, fingerSlot, positionsRas[handSlot, fingerSlot])
+    self.lastWrittenPositions[moved] = positions[moved]
+    self.lastWrittenValid |= moved
+    self.applyPendingTransforms()
+
+  def getStatistics(self):
+    """Return a snapshot of the processing statistics (see PipelineStatistics.getSnapshot)"""
+    return self.statistics.getSnapshot()
+
+  def resetStatistics(self):
+    self.statistics.reset()
+
   def onFrame(self):
-    # Get the most recent frame
-    frame = self.LeapController.frame()
+    startTime = clock()
+    if self.processNewFrames(startTime):
+      endTime = clock()
+      self.scheduler.addUpdateTime(endTime - startTime)
+      self.handsPresent = self.frameArrays.numberOfHands > 0
+    else:
+      self.handsPresent = False
+    if self.enableAdaptiveScheduling:
+      self.updateTimerInterval()
 
-    for handIndex, hand in enumerate(frame.hands) :
-      for fingerIndex, finger in enumerate(hand.fingers) :
-        self.setTransform(handIndex, fingerIndex, finger.tip_position)
-    
-    # Theoretically Leap could periodically call a callback function, but due to some reason it does not
-    # appear to work, so just poll with a timer instead.
-    qt.QTimer.singleShot(100, self.onFrame)
+  def processNewFrames(self, startTime):
+    """Process all new frames and write the newest one to the scene. Returns True if there was a new frame."""
+    statistics = self.statistics
+    # All frames are needed for the state updates but only the newest one is written to the scene
+    if self.frameDeliveryMode == self.FRAME_DELIVERY_THREAD:
+      # Frames are already extracted, just copy them from the ring buffer
+      numberOfFrames = self.frameRingBuffer.readNew(self.frameArrays, self.updateExtractedFrameState)
+      if not numberOfFrames:
+        return False
+      statistics.caughtUpFrameCount += numberOfFrames-1
+      self.lastFrameId = self.frameArrays.frameId
+      latestFrame = None
+    else:
+      frames = self.getNewFrames()
+      if not frames:
+        return False
+      statistics.addStageDuration("acquire", clock() - startTime)
+      self.lastFrameId = frames[-1].id
+      self.updateFrameState(frames)
+      latestFrame = frames[-1]
+    if self.enableSliceBrowsing or self.calibration.targetBounds is not None:
+      if latestFrame is None and not self.interactionBoxChecked:
+        # Frame objects are not passed from the acquisition thread, get the interaction box from the controller once
+        latestFrame = self.LeapController.frame()
+      if latestFrame is not None:
+        self.updateInteractionBox(latestFrame)
+    outputStartTime = clock()
+    self.updateOutputs()
+    consumersStartTime = clock()
+    statistics.addStageDuration("mrmlWrite", consumersStartTime - outputStartTime)
+    self.updateConsumers(latestFrame)
+    endTime = clock()
+    statistics.addStageDuration("consumers", endTime - consumersStartTime)
+    statistics.addStageDuration("total", endTime - startTime)
+    statistics.addProcessedFrame()
+    return True
+
+  def updateConsumers(self, latestFrame):
+    """Run everything that uses the processed frame, other than the output nodes: gesture control, navigation,
+    slice browsing, and frame subscribers. latestFrame is the controller's newest frame object or None.
+    """
+    gestures = ()
+    publishGestures = self.frameSubscribers.hasInterest(Subscriptions.INTEREST_GESTURES)
+    if self.enableGestureControl or self.enableNavigation or publishGestures:
+      # Gestures and inter-frame motion are only available from the controller's frame objects,
+      # which are not passed from the acquisition thread
+      frame = latestFrame if latestFrame is not None else self.LeapController.frame()
+      if self.enableGestureControl or publishGestures:
+        gestures = self.getNewGestures(frame)
+      if self.enableGestureControl and len(gestures):
+        self.gestureDispatcher.processGestures(gestures, clock())
+      if self.enableNavigation:
+        self.updateNavigation(frame)
+    if self.enableSliceBrowsing:
+      self.updateSliceBrowsing()
+    if self.frameSubscribers.subscriptions:
+      self.publishFrame(gestures)
@@ -0,0 +1,127 @@
+import threading
+
+from SlicerLeapModuleLib.FrameArrays import FrameArrays
+
+def appendMissedFrames(controller, lastFrameId, newestFrameId, maxCatchUpFrames, frames):
+  """Append the frames of the controller's frame history that are newer than lastFrameId and older than
+  newestFrameId to frames, from the newest to the oldest.
+  The device may publish a frame while the history is read, which shifts the history by one. Frames that are
+  not older than newestFrameId are skipped then, so that they are not returned a second time.
+  """
+  for history in range(1, maxCatchUpFrames+1):
+    frame = controller.frame(history)
+    if not frame.is_valid or frame.id <= lastFrameId:
+      break
+    if frame.id < newestFrameId:
+      frames.append(frame)
+
+class FrameRingBuffer(object):
+  """Fixed-capacity ring buffer of extracted frames, for one producer thread and one consumer thread.
+
+  All records are preallocated. The producer fills the next record and then publishes it by incrementing
+  writeCount. No lock is needed: in CPython the integer counter update is atomic, and each record is only
+  written by the producer. If the consumer falls behind then the oldest records are overwritten; the
+  consumer detects this and skips them. One record is always reserved for the producer, so at most
+  capacity-1 frames can be read at once.
+  """
+
+  def __init__(self, capacity, maxNumberOfHands, maxNumberOfFingersPerHand):
+    self.capacity = capacity
+    self.records = [FrameArrays(maxNumberOfHands, maxNumberOfFingersPerHand) for index in range(capacity)]
+    self.deviceFramesPerSecond = [0.0] * capacity
+    # Number of records written by the producer and read by the consumer since the start
+    self.writeCount = 0
+    self.readCount = 0
+
+  def setExtractDirections(self, enable):
+    for record in self.records:
+      record.extractDirections = enable
+
+  def setExtractPalms(self, enable):
+    for record in self.records:
+      record.extractPalms = enable
+
+  # Producer
+
+  def write(self, frame):
+    """Extract the frame into the next record and publish it"""
+    index = self.writeCount % self.capacity
+    self.records[index].extract(frame)
+    self.deviceFramesPerSecond[index] = frame.current_frames_per_second
+    self.writeCount += 1
+
+  # Consumer
+
+  def getNumberOfNewRecords(self):
+    return self.writeCount - self.readCount
+
+  def readNew(self, target, callback, latestOnly=False):
+    """Copy each new record into target (a FrameArrays object) and call callback(target, deviceFramesPerSecond).
+    If latestOnly is True then only the most recent record is read. Returns the number of records read.
+    """
+    writeCount = self.writeCount
+    # Records older than this may be overwritten by the producer at any time
+    firstIndex = max(self.readCount, writeCount - self.capacity + 1)
+    if latestOnly:
+      firstIndex = max(firstIndex, writeCount - 1)
+    numberOfRecords = 0
+    for index in range(firstIndex, writeCount):
+      recordIndex = index % self.capacity
+      target.copyFrom(self.records[recordIndex])
+      deviceFramesPerSecond = self.deviceFramesPerSecond[recordIndex]
+      if index <= self.writeCount - self.capacity:
+        # The producer started overwriting the record while it was copied
+        continue
+      callback(target, deviceFramesPerSecond)
+      numberOfRecords += 1
+    self.readCount = writeCount
+    return numberOfRecords
+
+class AcquisitionThread(object):
+  """Poll frames from the controller on a worker thread and write them into a FrameRingBuffer.
+
+  Frames that arrived between two polls are retrieved from the controller's frame history, so the
+  buffer receives the full frame stream regardless of how busy the main thread is.
+  """
+
+  def __init__(self, controller, ringBuffer, pollIntervalSec=0.002, maxCatchUpFrames=59):
+    self.controller = controller
+    self.ringBuffer = ringBuffer
+    self.pollIntervalSec = pollIntervalSec
+    self.maxCatchUpFrames = maxCatchUpFrames
+    self.thread = None
+    self.stopRequested = threading.Event()
+
+  def isRunning(self):
+    return self.thread is not None
+
+  def start(self):
+    if self.thread is not None:
+      return
+    self.stopRequested.clear()
+    self.thread = threading.Thread(target=self.run, name="LeapAcquisition")
+    self.thread.daemon = True
+    self.thread.start()
+
+  def stop(self):
+    if self.thread is None:
+      return
+    self.stopRequested.set()
+    self.thread.join()
+    self.thread = None
+
+  def run(self):
+    controller = self.controller
+    lastFrameId = None
+    missedFrames = []
+    while not self.stopRequested.is_set():
+      frame = controller.frame()
+      frameId = frame.id
+      if frame.is_valid and frameId != lastFrameId:
+        if lastFrameId is not None:
+          appendMissedFrames(controller, lastFrameId, frameId, self.maxCatchUpFrames, missedFrames)
+          while missedFrames:
+            self.ringBuffer.write(missedFrames.pop())
+        self.ringBuffer.write(frame)
+        lastFrameId = frameId
+      self.stopRequested.wait(self.pollIntervalSec)
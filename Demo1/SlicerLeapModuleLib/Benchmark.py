@@ -0,0 +1,258 @@
+"""Benchmarks of the SlicerLeapModule frame processing.
+
+Run from the module directory:
+
+  python -m SlicerLeapModuleLib.Benchmark pipeline --frames 5000 --hands 2 --output results.json
+  python -m SlicerLeapModuleLib.Benchmark pipeline --replay session.leaprec --compare results.json
+  python -m SlicerLeapModuleLib.Benchmark matrix
+
+The pipeline benchmark drives SlicerLeapModuleLogic.onFrame from a synthetic or replayed frame source.
+Outside Slicer the vtk, qt, and slicer modules are replaced by the minimal stubs of the tests (Testing/SlicerStubs.py,
+an MRML scene that only stores transform nodes), so the benchmark measures the module's own processing.
+"""
+from __future__ import print_function
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+from SlicerLeapModuleLib.Instrumentation import clock
+
+def benchmarkTransformMatrixUpdate(iterations=100000):
+  """Compare creating a new vtkTransform for each finger update with writing the translation
+  into a preallocated vtkMatrix4x4. Returns a dict of results for each method.
+  Only the time is measured: VTK objects are allocated by C++ code, which is not traced by tracemalloc, and
+  vtkDebugLeaks only counts objects in debug builds of VTK.
+  """
+  import vtk
+
+  # Stands in for the matrix of the transform node, SetMatrixTransformToParent deep-copies the given matrix
+  nodeMatrix = vtk.vtkMatrix4x4()
+  position = (12.5, 180.0, -30.0)
+
+  def newTransformPerUpdate():
+    for i in range(iterations):
+      newTransform = vtk.vtkTransform()
+      newTransform.Translate(-position[0], position[2], position[1])
+      nodeMatrix.DeepCopy(newTransform.GetMatrix())
+
+  pooledMatrix = vtk.vtkMatrix4x4()
+  def pooledMatrixPerUpdate():
+    for i in range(iterations):
+      pooledMatrix.SetElement(0, 3, -position[0])
+      pooledMatrix.SetElement(1, 3, position[2])
+      pooledMatrix.SetElement(2, 3, position[1])
+      nodeMatrix.DeepCopy(pooledMatrix)
+
+  results = {}
+  for name, function in [("newTransformPerUpdate", newTransformPerUpdate), ("pooledMatrix", pooledMatrixPerUpdate)]:
+    elapsedSec = min(timeit.repeat(function, number=1, repeat=3))
+    results[name] = {
+      "updatesPerSec": iterations / elapsedSec,
+      "usecPerUpdate": elapsedSec * 1e6 / iterations,
+      }
+  return results
+
+#
+# Pipeline benchmark
+#
+
+def timeMethod(obj, methodName, durations):
+  """Replace obj.methodName by a wrapper that appends the duration of each call to durations.
+  The wrapper is an attribute of the object, restoreMethod removes it.
+  """
+  method = getattr(obj, methodName)
+  def timedMethod(*args, **kwargs):
+    startTime = clock()
+    result = method(*args, **kwargs)
+    durations.append(clock() - startTime)
+    return result
+  setattr(obj, methodName, timedMethod)
+
+def restoreMethod(obj, methodName):
+  """Remove the wrapper that was installed by timeMethod"""
+  delattr(obj, methodName)
+
+def summarizeDurations(durations):
+  """Return percentiles of durations (in seconds) in microseconds"""
+  import numpy
+  if not durations:
+    return None
+  durationsUsec = numpy.array(durations) * 1e6
+  return {
+    "count": len(durations),
+    "meanUsec": float(durationsUsec.mean()),
+    "p50Usec": float(numpy.percentile(durationsUsec, 50)),
+    "p90Usec": float(numpy.percentile(durationsUsec, 90)),
+    "p99Usec": float(numpy.percentile(durationsUsec, 99)),
+    "maxUsec": float(durationsUsec.max()),
+    }
+
+def createFrameSource(options):
+  """Create a controller that provides a new frame at each poll"""
+  if options.replay:
+    from SlicerLeapModuleLib.Recording import ReplayController
+    return ReplayController(options.replay, speed=0, loop=True)
+  from SlicerLeapModuleLib.Synthetic import SyntheticController
+  return SyntheticController(numberOfHands=options.hands, numberOfFingersPerHand=options.fingers,
+    jitterMm=options.jitter, dropoutProbability=options.dropout, speed=0, seed=0)
+
+def createLogic(options):
+  # The stubs are only used outside Slicer
+  from Testing.SlicerStubs import installStubSlicerEnvironment
+  installStubSlicerEnvironment()
+  import SlicerLeapModule
+  logic = SlicerLeapModule.SlicerLeapModuleLogic(createFrameSource(options))
+  logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+  logic.setEnableAutoCreateTransforms(True)
+  logic.start()
+  return logic
+
+def runFrames(logic, numberOfFrames):
+  for frameIndex in range(numberOfFrames):
+    logic.onFrame()
+
+def benchmarkPipeline(options):
+  """Process frames by SlicerLeapModuleLogic.onFrame and return throughput, stage latencies, and allocations"""
+  logic = createLogic(options)
+  # Warm up: create the output nodes and fill caches
+  runFrames(logic, options.warmup)
+
+  stageMethods = [
+    ("acquire", logic, "getNewFrames"),
+    ("extract", logic.frameArrays, "extract"),
+    ("slots", logic, "updateSlots"),
+    ("filter", logic, "filterPositions"),
+    ("mrmlWrite", logic, "updateOutputs"),
+    ("consumers", logic, "updateConsumers"),
+    ("total", logic, "onFrame"),
+    ]
+  stageDurations = {}
+  for stageName, obj, methodName in stageMethods:
+    stageDurations[stageName] = []
+    timeMethod(obj, methodName, stageDurations[stageName])
+  setTransformDurations = []
+  timeMethod(logic, "setTransform", setTransformDurations)
+
+  startTime = clock()
+  runFrames(logic, options.frames)
+  elapsedSec = clock() - startTime
+
+  # The timing wrappers allocate memory for each call, so they are removed before measuring allocations
+  for stageName, obj, methodName in stageMethods:
+    restoreMethod(obj, methodName)
+  restoreMethod(logic, "setTransform")
+
+  results = {
+    "framesPerSec": options.frames / elapsedSec,
+    "transformWritesPerFrame": float(len(setTransformDurations)) / options.frames,
+    "stages": dict((stageName, summarizeDurations(durations)) for stageName, durations in stageDurations.items()),
+    "allocations": measureAllocations(logic, options.frames),
+    }
+  logic.stop()
+  return results
+
+def measureAllocations(logic, numberOfFrames):
+  """Return the memory allocated while processing each frame and the memory that is still allocated after processing.
+  allocatedBytesPerFrame is the mean peak of the traced memory during a frame, above the traced memory at the start of
+  the frame (tracemalloc does not count blocks that are freed again, so the number of short-lived blocks is not available).
+  Requires tracemalloc (Python 3), returns None otherwise. allocatedBytesPerFrame requires Python 3.9 (tracemalloc.reset_peak).
+  """
+  try:
+    import tracemalloc
+  except ImportError:
+    return None
+  tracemalloc.start()
+  # Fill the frame history of the source and any other bounded buffers first
+  runFrames(logic, 100)
+  snapshotFilters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+  before = tracemalloc.take_snapshot().filter_traces(snapshotFilters)
+  onFrame = logic.onFrame
+  allocatedBytes = 0
+  resetPeak = getattr(tracemalloc, "reset_peak", None)
+  for frameIndex in range(numberOfFrames):
+    if resetPeak is not None:
+      startBytes = tracemalloc.get_traced_memory()[0]
+      resetPeak()
+    onFrame()
+    if resetPeak is not None:
+      allocatedBytes += tracemalloc.get_traced_memory()[1] - startBytes
+  after = tracemalloc.take_snapshot().filter_traces(snapshotFilters)
+  tracemalloc.stop()
+  statistics = after.compare_to(before, "filename")
+  return {
+    "allocatedBytesPerFrame": float(allocatedBytes) / numberOfFrames if resetPeak is not None else None,
+    "netBlocksPerFrame": float(sum(statistic.count_diff for statistic in statistics)) / numberOfFrames,
+    "netBytesPerFrame": float(sum(statistic.size_diff for statistic in statistics)) / numberOfFrames,
+    }
+
+def compareResults(results, baseline, baselineName):
+  """Print the change of the main metrics relative to a baseline result"""
+  print("Compared to %s:" % (baseline.get("label") or baselineName))
+  print("  frames/s: %.0f -> %.0f (%+.1f%%)" % (baseline["framesPerSec"], results["framesPerSec"],
+    100.0 * (results["framesPerSec"] / baseline["framesPerSec"] - 1.0)))
+  for stageName in sorted(results["stages"]):
+    stage = results["stages"][stageName]
+    baselineStage = baseline["stages"].get(stageName)
+    if not stage or not baselineStage:
+      continue
+    print("  %-10s p50: %8.1f -> %8.1f us   p99: %8.1f -> %8.1f us" % (stageName,
+      baselineStage["p50Usec"], stage["p50Usec"], baselineStage["p99Usec"], stage["p99Usec"]))
+
+def printPipelineResults(results):
+  print("%.0f frames/s, %.2f transform writes/frame" % (results["framesPerSec"], results["transformWritesPerFrame"]))
+  for stageName in sorted(results["stages"]):
+    stage = results["stages"][stageName]
+    if stage:
+      print("  %-10s p50 %8.1f us  p90 %8.1f us  p99 %8.1f us  max %8.1f us" % (
+        stageName, stage["p50Usec"], stage["p90Usec"], stage["p99Usec"], stage["maxUsec"]))
+  allocations = results["allocations"]
+  if allocations:
+    if allocations["allocatedBytesPerFrame"] is not None:
+      print("  allocations: %.1f bytes allocated during each frame (peak)" % allocations["allocatedBytesPerFrame"])
+    print("  retained: %.2f blocks/frame, %.1f bytes/frame" % (allocations["netBlocksPerFrame"], allocations["netBytesPerFrame"]))
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="SlicerLeapModule benchmarks")
+  subparsers = parser.add_subparsers(dest="benchmark")
+  subparsers.required = True
+  subparsers.add_parser("matrix", help="transform matrix update micro-benchmark (requires vtk)")
+  pipelineParser = subparsers.add_parser("pipeline", help="frame to transform pipeline benchmark")
+  pipelineParser.add_argument("--frames", type=int, default=5000, help="number of measured frames")
+  pipelineParser.add_argument("--warmup", type=int, default=100, help="number of frames processed before measurement")
+  pipelineParser.add_argument("--hands", type=int, default=2, help="number of synthetic hands")
+  pipelineParser.add_argument("--fingers", type=int, default=5, help="number of synthetic fingers per hand")
+  pipelineParser.add_argument("--jitter", type=float, default=0.5, help="synthetic fingertip jitter in mm")
+  pipelineParser.add_argument("--dropout", type=float, default=0.0, help="synthetic finger dropout probability")
+  pipelineParser.add_argument("--replay", help="replay a recording file instead of synthetic frames")
+  pipelineParser.add_argument("--label", default="", help="name of the run, stored in the results")
+  pipelineParser.add_argument("--output", help="write results to this JSON file")
+  pipelineParser.add_argument("--compare", help="compare results to a JSON file of an earlier run")
+  options = parser.parse_args(argv)
+
+  if options.benchmark == "matrix":
+    results = benchmarkTransformMatrixUpdate()
+    for name in sorted(results):
+      result = results[name]
+      print("%-24s %10.0f updates/s %8.3f us/update" % (name, result["updatesPerSec"], result["usecPerUpdate"]))
+    return 0
+
+  results = benchmarkPipeline(options)
+  results["label"] = options.label
+  results["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+  results["python"] = platform.python_version()
+  results["configuration"] = dict((name, getattr(options, name))
+    for name in ["frames", "warmup", "hands", "fingers", "jitter", "dropout", "replay"])
+  printPipelineResults(results)
+  if options.output:
+    with open(options.output, "w") as outputFile:
+      json.dump(results, outputFile, indent=2, sort_keys=True)
+  if options.compare:
+    with open(options.compare) as baselineFile:
+      compareResults(results, json.load(baselineFile), options.compare)
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,274 @@
+"""Jitter filters for fingertip positions.
+
+Each filter keeps a separate state for every output slot (hand, finger) in arrays, and updates all slots
+of a frame in one vectorized step. Positions are in mm, time is in seconds.
+"""
+import math
+import numpy
+
+class PositionFilter(object):
+  """Base class of position filters.
+
+  update() filters the positions of the valid slots and writes them into output. Slots that are not
+  valid in the frame keep their state. The first position of a slot (after construction or reset)
+  is passed through unchanged.
+  """
+
+  def __init__(self, shape):
+    """shape: (number of hands, number of fingers per hand)"""
+    self.shape = tuple(shape)
+    self.initialized = numpy.zeros(self.shape, dtype=bool)
+    self.lastTimeSec = numpy.zeros(self.shape)
+
+  def reset(self, slots=None):
+    """Forget the state of the slots selected by a boolean array (all slots if not specified)"""
+    if slots is None:
+      self.initialized[:] = False
+    else:
+      self.initialized[slots] = False
+
+  def update(self, positions, valid, timeSec, output):
+    """Filter positions (array of shape + (3,)) of the valid slots into output"""
+    starting = valid & ~self.initialized
+    updating = valid & self.initialized
+    if starting.any():
+      output[starting] = positions[starting]
+      self.initializeSlots(starting, positions[starting])
+      self.initialized |= starting
+      self.lastTimeSec[starting] = timeSec
+    if updating.any():
+      # Guard against repeated timestamps
+      timeStepSec = numpy.maximum(timeSec - self.lastTimeSec[updating], 1.0e-4)
+      output[updating] = self.updateSlots(updating, positions[updating], timeStepSec[:, numpy.newaxis])
+      self.lastTimeSec[updating] = timeSec
+
+  def initializeSlots(self, slots, positions):
+    raise NotImplementedError()
+
+  def updateSlots(self, slots, positions, timeStepSec):
+    """Return the filtered positions of the selected slots. positions is an Nx3 array, timeStepSec is Nx1."""
+    raise NotImplementedError()
+
+class MovingAverageFilter(PositionFilter):
+  """Average of the last windowSize positions"""
+
+  def __init__(self, shape, windowSize=5):
+    PositionFilter.__init__(self, shape)
+    self.windowSize = windowSize
+    self.history = numpy.zeros(self.shape + (windowSize, 3))
+    self.historySum = numpy.zeros(self.shape + (3,))
+    self.historyCount = numpy.zeros(self.shape, dtype=numpy.int32)
+    self.historyIndex = numpy.zeros(self.shape, dtype=numpy.int32)
+
+  def initializeSlots(self, slots, positions):
+    self.history[slots, 0] = positions
+    self.historySum[slots] = positions
+    self.historyCount[slots] = 1
+    self.historyIndex[slots] = 1 % self.windowSize
+
+  def updateSlots(self, slots, positions, timeStepSec):
+    handIndices, fingerIndices = numpy.nonzero(slots)
+    historyIndices = self.historyIndex[slots]
+    full = self.historyCount[slots] == self.windowSize
+    # Remove the oldest position from the sum if the window is full, then add the new one
+    oldest = self.history[handIndices, fingerIndices, historyIndices]
+    self.historySum[slots] += positions - numpy.where(full[:, numpy.newaxis], oldest, 0.0)
+    self.history[handIndices, fingerIndices, historyIndices] = positions
+    self.historyCount[slots] = numpy.minimum(self.historyCount[slots]+1, self.windowSize)
+    self.historyIndex[slots] = (historyIndices+1) % self.windowSize
+    return self.historySum[slots] / self.historyCount[slots][:, numpy.newaxis]
+
+class OneEuroFilter(PositionFilter):
+  """Speed-adaptive low-pass filter (Casiez et al., 1 Euro filter, CHI 2012).
+
+  The cutoff frequency increases with the fingertip speed: slow motion is strongly smoothed,
+  fast motion is followed with low lag.
+  minCutoffHz: cutoff frequency at zero speed
+  beta: cutoff frequency increase per mm/s speed
+  derivativeCutoffHz: cutoff frequency of the speed estimate
+  """
+
+  def __init__(self, shape, minCutoffHz=1.0, beta=0.01, derivativeCutoffHz=1.0):
+    PositionFilter.__init__(self, shape)
+    self.minCutoffHz = minCutoffHz
+    self.beta = beta
+    self.derivativeCutoffHz = derivativeCutoffHz
+    self.filteredPositions = numpy.zeros(self.shape + (3,))
+    self.filteredVelocities = numpy.zeros(self.shape + (3,))
+
+  @staticmethod
+  def smoothingFactor(cutoffHz, timeStepSec):
+    timeConstantSec = 1.0 / (2.0 * math.pi * cutoffHz)
+    return 1.0 / (1.0 + timeConstantSec / timeStepSec)
+
+  def initializeSlots(self, slots, positions):
+    self.filteredPositions[slots] = positions
+    self.filteredVelocities[slots] = 0.0
+
+  def updateSlots(self, slots, positions, timeStepSec):
+    previousPositions = self.filteredPositions[slots]
+    velocities = (positions - previousPositions) / timeStepSec
+    previousVelocities = self.filteredVelocities[slots]
+    velocities = previousVelocities + self.smoothingFactor(self.derivativeCutoffHz, timeStepSec) * (velocities - previousVelocities)
+    speeds = numpy.sqrt(numpy.einsum('ij,ij->i', velocities, velocities))[:, numpy.newaxis]
+    cutoffHz = self.minCutoffHz + self.beta * speeds
+    filteredPositions = previousPositions + self.smoothingFactor(cutoffHz, timeStepSec) * (positions - previousPositions)
+    self.filteredPositions[slots] = filteredPositions
+    self.filteredVelocities[slots] = velocities
+    return filteredPositions
+
+class KalmanFilter(PositionFilter):
+  """Constant-velocity Kalman filter, with independent position/velocity states along each axis.
+
+  processNoise: spectral density of the random acceleration (mm^2/s^3)
+  measurementNoiseMm: standard deviation of the measured position (mm)
+  """
+
+  def __init__(self, shape, processNoise=5.0e4, measurementNoiseMm=0.5):
+    PositionFilter.__init__(self, shape)
+    self.processNoise = processNoise
+    self.measurementNoiseMm = measurementNoiseMm
+    self.positions = numpy.zeros(self.shape + (3,))
+    self.velocities = numpy.zeros(self.shape + (3,))
+    # Elements of the symmetric 2x2 state covariance matrix of each axis
+    self.covariancePP = numpy.zeros(self.shape + (3,))
+    self.covariancePV = numpy.zeros(self.shape + (3,))
+    self.covarianceVV = numpy.zeros(self.shape + (3,))
+
+  def initializeSlots(self, slots, positions):
+    self.positions[slots] = positions
+    self.velocities[slots] = 0.0
+    self.covariancePP[slots] = self.measurementNoiseMm**2
+    self.covariancePV[slots] = 0.0
+    # Fingertips may already be moving fast when they appear
+    self.covarianceVV[slots] = 1.0e6
+
+  def updateSlots(self, slots, positions, timeStepSec):
+    dt = timeStepSec
+    q = self.processNoise
+    # Predict
+    x = self.positions[slots] + self.velocities[slots] * dt
+    v = self.velocities[slots]
+    pvv = self.covarianceVV[slots]
+    ppv = self.covariancePV[slots] + dt * pvv
+    ppp = self.covariancePP[slots] + dt * (self.covariancePV[slots] + ppv)
+    ppp += q * dt**3 / 3.0
+    ppv += q * dt**2 / 2.0
+    pvv = pvv + q * dt
+    # Correct
+    innovationCovariance = ppp + self.measurementNoiseMm**2
+    gainP = ppp / innovationCovariance
+    gainV = ppv / innovationCovariance
+    innovation = positions - x
+    x = x + gainP * innovation
+    v = v + gainV * innovation
+    self.covarianceVV[slots] = pvv - gainV * ppv
+    self.covariancePV[slots] = (1.0 - gainP) * ppv
+    self.covariancePP[slots] = (1.0 - gainP) * ppp
+    self.positions[slots] = x
+    self.velocities[slots] = v
+    return x
+
+# Filter types that can be selected by name
+POSITION_FILTER_TYPES = {
+  "oneEuro": OneEuroFilter,
+  "kalman": KalmanFilter,
+  "movingAverage": MovingAverageFilter,
+  }
+
+def createPositionFilter(filterType, shape, **parameters):
+  """Create a filter by its name in POSITION_FILTER_TYPES (None if filterType is None or "none")"""
+  if filterType is None or filterType == "none":
+    return None
+  if filterType not in POSITION_FILTER_TYPES:
+    raise ValueError("Invalid position filter type: %s" % filterType)
+  return POSITION_FILTER_TYPES[filterType](shape, **parameters)
+
+class MotionPredictor(object):
+  """Extrapolate fingertip positions to compensate for the latency between capture and display.
+
+  Velocity and acceleration of each slot are estimated from consecutive (filtered) positions with
+  exponential smoothing. predict() extrapolates the positions by a second-order motion model.
+  The device clock (Frame.timestamp) is not synchronized with the host clock, therefore the offset
+  between the two clocks is estimated as the smallest observed difference between the time of receiving
+  and capturing a frame, which corresponds to the frames that were received with the least delay.
+  """
+
+  def __init__(self, shape, velocitySmoothing=0.5, accelerationSmoothing=0.2, maxHorizonSec=0.05, clockOffsetWindowSize=500):
+    """velocitySmoothing, accelerationSmoothing: weight of the newest estimate (0..1, 1 means no smoothing)
+    maxHorizonSec: predictions never extrapolate further than this
+    """
+    self.shape = tuple(shape)
+    self.velocitySmoothing = velocitySmoothing
+    self.accelerationSmoothing = accelerationSmoothing
+    self.maxHorizonSec = maxHorizonSec
+    self.initialized = numpy.zeros(self.shape, dtype=bool)
+    self.hasVelocity = numpy.zeros(self.shape, dtype=bool)
+    self.lastTimeSec = numpy.zeros(self.shape)
+    self.lastPositions = numpy.zeros(self.shape + (3,))
+    self.velocities = numpy.zeros(self.shape + (3,))
+    self.accelerations = numpy.zeros(self.shape + (3,))
+    self.clockOffsetWindowSize = clockOffsetWindowSize
+    self.clockOffsets = []
+    self.clockOffsetSec = None
+
+  def reset(self, slots=None):
+    if slots is None:
+      self.initialized[:] = False
+      self.hasVelocity[:] = False
+    else:
+      self.initialized[slots] = False
+      self.hasVelocity[slots] = False
+
+  def updateClockOffset(self, hostTimeSec, deviceTimeSec):
+    """Update the estimated offset between the host and device clocks, from a frame received at hostTimeSec"""
+    offsetSec = hostTimeSec - deviceTimeSec
+    self.clockOffsets.append(offsetSec)
+    if len(self.clockOffsets) > self.clockOffsetWindowSize:
+      # Recompute from the recent offsets only, to follow drift between the clocks
+      del self.clockOffsets[:-self.clockOffsetWindowSize//2]
+      self.clockOffsetSec = min(self.clockOffsets)
+    elif self.clockOffsetSec is None or offsetSec < self.clockOffsetSec:
+      self.clockOffsetSec = offsetSec
+
+  def getFrameAgeSec(self, hostTimeSec, deviceTimeSec):
+    """Estimated time elapsed since the frame was captured"""
+    if self.clockOffsetSec is None:
+      return 0.0
+    return max(0.0, hostTimeSec - (deviceTimeSec + self.clockOffsetSec))
+
+  def update(self, positions, valid, timeSec):
+    """Update the motion estimates of the valid slots.
+    Slots that were already updated at timeSec or later (e.g., by a repeated frame) are not updated.
+    """
+    starting = valid & ~self.initialized
+    self.lastPositions[starting] = positions[starting]
+    self.lastTimeSec[starting] = timeSec
+    self.velocities[starting] = 0.0
+    self.accelerations[starting] = 0.0
+    self.initialized |= starting
+    # A zero time step would turn the zero displacement into a large deceleration
+    updating = valid & ~starting & (self.lastTimeSec < timeSec)
+    if not updating.any():
+      return
+    timeStepSec = (timeSec - self.lastTimeSec[updating])[:, numpy.newaxis]
+    previousVelocities = self.velocities[updating]
+    velocities = (positions[updating] - self.lastPositions[updating]) / timeStepSec
+    velocities = previousVelocities + self.velocitySmoothing * (velocities - previousVelocities)
+    # Acceleration is only meaningful once there was a previous velocity estimate
+    hasVelocity = self.hasVelocity[updating][:, numpy.newaxis]
+    accelerations = numpy.where(hasVelocity, (velocities - previousVelocities) / timeStepSec, 0.0)
+    previousAccelerations = self.accelerations[updating]
+    self.accelerations[updating] = previousAccelerations + self.accelerationSmoothing * (accelerations - previousAccelerations)
+    self.velocities[updating] = velocities
+    self.lastPositions[updating] = positions[updating]
+    self.lastTimeSec[updating] = timeSec
+    self.hasVelocity |= updating
+
+  def predict(self, positions, valid, horizonSec, output):
+    """Write positions extrapolated by horizonSec (clamped to maxHorizonSec) into output"""
+    horizonSec = min(max(horizonSec, 0.0), self.maxHorizonSec)
+    output[:] = positions
+    predicting = valid & self.initialized
+    if horizonSec > 0 and predicting.any():
+      output[predicting] += (self.velocities[predicting] + (0.5 * horizonSec) * self.accelerations[predicting]) * horizonSec
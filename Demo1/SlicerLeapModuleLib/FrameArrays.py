@@ -0,0 +1,88 @@
+import numpy
+
+class FrameArrays(object):
+  """Numeric content of a Leap frame in preallocated, contiguous arrays.
+
+  Hands are stored along the first axis, fingers of each hand along the second axis.
+  Entries beyond numberOfHands and numberOfFingers[hand] (or where fingerValid is False) are undefined.
+  The same object is meant to be refilled for each frame, so that no arrays are allocated per frame.
+  """
+
+  def __init__(self, maxNumberOfHands, maxNumberOfFingersPerHand):
+    self.maxNumberOfHands = maxNumberOfHands
+    self.maxNumberOfFingersPerHand = maxNumberOfFingersPerHand
+    self.frameId = -1
+    # Frame capture time in microseconds (Leap.Frame.timestamp)
+    self.timestamp = 0
+    self.numberOfHands = 0
+    self.handIds = numpy.zeros(maxNumberOfHands, dtype=numpy.int64)
+    self.numberOfFingers = numpy.zeros(maxNumberOfHands, dtype=numpy.int32)
+    self.fingerIds = numpy.zeros((maxNumberOfHands, maxNumberOfFingersPerHand), dtype=numpy.int64)
+    self.fingerValid = numpy.zeros((maxNumberOfHands, maxNumberOfFingersPerHand), dtype=bool)
+    self.tipPositions = numpy.zeros((maxNumberOfHands, maxNumberOfFingersPerHand, 3))
+    # Finger directions are only extracted if extractDirections is enabled (e.g., for recording)
+    self.extractDirections = False
+    self.directions = numpy.zeros((maxNumberOfHands, maxNumberOfFingersPerHand, 3))
+    # Palm positions are only extracted if extractPalms is enabled. Recordings do not contain them (they are left unchanged).
+    self.extractPalms = False
+    self.palmPositions = numpy.zeros((maxNumberOfHands, 3))
+
+  def copyFrom(self, other):
+    """Copy all content from another FrameArrays object of the same size, without allocating memory"""
+    self.frameId = other.frameId
+    self.timestamp = other.timestamp
+    self.numberOfHands = other.numberOfHands
+    numpy.copyto(self.handIds, other.handIds)
+    numpy.copyto(self.numberOfFingers, other.numberOfFingers)
+    numpy.copyto(self.fingerIds, other.fingerIds)
+    numpy.copyto(self.fingerValid, other.fingerValid)
+    numpy.copyto(self.tipPositions, other.tipPositions)
+    numpy.copyto(self.directions, other.directions)
+    numpy.copyto(self.palmPositions, other.palmPositions)
+
+  def clear(self):
+    self.numberOfHands = 0
+    self.numberOfFingers[:] = 0
+    self.fingerValid[:] = False
+
+  def extract(self, frame):
+    """Fill the arrays from a Leap.Frame (or any object with the same structure) in a single pass.
+    Hands and fingers that do not fit into the arrays are ignored.
+    """
+    fillFrameArrays = getattr(frame, "fillFrameArrays", None)
+    if fillFrameArrays is not None:
+      # Frames of recordings and synthetic sources can fill the arrays directly
+      fillFrameArrays(self)
+      return
+    self.frameId = frame.id
+    self.timestamp = frame.timestamp
+    self.fingerValid[:] = False
+    self.numberOfFingers[:] = 0
+    # Indexing the lists directly avoids the generators of the SWIG list wrappers, which call len() at each step
+    hands = frame.hands
+    numberOfHands = min(len(hands), self.maxNumberOfHands)
+    self.numberOfHands = numberOfHands
+    handIds = self.handIds
+    fingerIds = self.fingerIds
+    tipPositions = self.tipPositions
+    directions = self.directions if self.extractDirections else None
+    palmPositions = self.palmPositions if self.extractPalms else None
+    maxNumberOfFingersPerHand = self.maxNumberOfFingersPerHand
+    for handIndex in range(numberOfHands):
+      hand = hands[handIndex]
+      handIds[handIndex] = hand.id
+      if palmPositions is not None:
+        palmPosition = hand.palm_position
+        palmPositions[handIndex] = (palmPosition.x, palmPosition.y, palmPosition.z)
+      fingers = hand.fingers
+      numberOfFingers = min(len(fingers), maxNumberOfFingersPerHand)
+      self.numberOfFingers[handIndex] = numberOfFingers
+      for fingerIndex in range(numberOfFingers):
+        finger = fingers[fingerIndex]
+        fingerIds[handIndex, fingerIndex] = finger.id
+        tipPosition = finger.tip_position
+        tipPositions[handIndex, fingerIndex] = (tipPosition.x, tipPosition.y, tipPosition.z)
+        if directions is not None:
+          direction = finger.direction
+          directions[handIndex, fingerIndex] = (direction.x, direction.y, direction.z)
+      self.fingerValid[handIndex, :numberOfFingers] = True
@@ -0,0 +1,230 @@
+"""Pure Python stand-ins for the frame and controller classes of the Leap SDK.
+
+Only the members that are used by the SlicerLeapModule are implemented. Frame sources that do not use
+the device (replay, synthetic motion) are derived from FrameSourceController and return these frame
+objects (typically ArrayFrame) from their frame() method.
+"""
+import threading
+import numpy
+
+class Vector(object):
+  __slots__ = ("x", "y", "z")
+
+  def __init__(self, x=0.0, y=0.0, z=0.0):
+    self.x = x
+    self.y = y
+    self.z = z
+
+  def __getitem__(self, index):
+    return (self.x, self.y, self.z)[index]
+
+  def to_float_array(self):
+    return [self.x, self.y, self.z]
+
+  def to_tuple(self):
+    return (self.x, self.y, self.z)
+
+class Finger(object):
+  __slots__ = ("id", "tip_position", "direction", "is_valid")
+
+  def __init__(self, fingerId, tipPosition, direction=None):
+    self.id = fingerId
+    self.tip_position = tipPosition
+    self.direction = direction if direction is not None else Vector(0.0, 0.0, -1.0)
+    self.is_valid = True
+
+class Hand(object):
+  __slots__ = ("id", "fingers", "palm_position", "is_valid")
+
+  def __init__(self, handId, fingers, palmPosition=None):
+    self.id = handId
+    self.fingers = fingers
+    self.palm_position = palmPosition if palmPosition is not None else Vector()
+    self.is_valid = True
+
+class Frame(object):
+  """Frame with a fixed list of hands. Subclasses may create the hands on demand by overriding the hands property."""
+
+  def __init__(self, frameId=-1, timestamp=0, hands=None, framesPerSecond=0.0, valid=True):
+    self.id = frameId
+    self.timestamp = timestamp
+    self.current_frames_per_second = framesPerSecond
+    self.is_valid = valid
+    self._hands = hands if hands is not None else []
+
+  @property
+  def hands(self):
+    return self._hands
+
+  def gestures(self, sinceFrame=None):
+    return []
+
+  @staticmethod
+  def invalid():
+    """Return an invalid frame, as returned by the controller for frames that are not available"""
+    return Frame(valid=False)
+
+class ArrayFrame(Frame):
+  """Frame whose content is stored in arrays (e.g., views of a recording or generated arrays).
+  Hands and fingers are only created if they are accessed, FrameArrays are filled directly from the arrays by fillFrameArrays.
+
+  The fingers of each hand are the first numberOfFingers[hand] entries of fingerIds, tipPositions, and directions.
+  If directions is None then fingers point forward.
+  """
+
+  def __init__(self, frameId, timestamp, framesPerSecond, numberOfHands, handIds, numberOfFingers, fingerIds, tipPositions, directions=None):
+    Frame.__init__(self, frameId, timestamp, None, framesPerSecond)
+    self.numberOfHands = numberOfHands
+    self.handIds = handIds
+    self.numberOfFingers = numberOfFingers
+    self.fingerIds = fingerIds
+    self.tipPositions = tipPositions
+    self.directions = directions
+    # Hands are created when first accessed
+    self._hands = None
+
+  @property
+  def hands(self):
+    if self._hands is None:
+      hands = []
+      for handIndex in range(self.numberOfHands):
+        fingers = []
+        for fingerIndex in range(self.numberOfFingers[handIndex]):
+          tipPosition = Vector(*self.tipPositions[handIndex, fingerIndex].tolist())
+          direction = Vector(*self.directions[handIndex, fingerIndex].tolist()) if self.directions is not None else None
+          fingers.append(Finger(int(self.fingerIds[handIndex, fingerIndex]), tipPosition, direction))
+        hands.append(Hand(int(self.handIds[handIndex]), fingers))
+      self._hands = hands
+    return self._hands
+
+  def fillFrameArrays(self, frameArrays):
+    """Copy the frame content to a FrameArrays object without creating hand and finger objects"""
+    frameArrays.frameId = self.id
+    frameArrays.timestamp = self.timestamp
+    frameArrays.clear()
+    numberOfHands = min(self.numberOfHands, frameArrays.maxNumberOfHands)
+    maxNumberOfFingers = min(frameArrays.maxNumberOfFingersPerHand, self.fingerIds.shape[1])
+    frameArrays.numberOfHands = numberOfHands
+    frameArrays.numberOfFingers[:numberOfHands] = numpy.minimum(self.numberOfFingers[:numberOfHands], maxNumberOfFingers)
+    frameArrays.handIds[:numberOfHands] = self.handIds[:numberOfHands]
+    frameArrays.fingerIds[:numberOfHands, :maxNumberOfFingers] = self.fingerIds[:numberOfHands, :maxNumberOfFingers]
+    frameArrays.tipPositions[:numberOfHands, :maxNumberOfFingers] = self.tipPositions[:numberOfHands, :maxNumberOfFingers]
+    if self.directions is not None:
+      frameArrays.directions[:numberOfHands, :maxNumberOfFingers] = self.directions[:numberOfHands, :maxNumberOfFingers]
+    for handIndex in range(numberOfHands):
+      frameArrays.fingerValid[handIndex, :frameArrays.numberOfFingers[handIndex]] = True
+
+class FrameSourceController(object):
+  """Base class of stand-ins for Leap.Controller.
+
+  Frames can be polled by frame(history) or pushed to listeners (objects with an on_frame(controller) method),
+  which are called from a playback thread, as Leap.Controller does.
+
+  speed: 1.0 plays frames in real time, larger values play accelerated. If speed is 0 then frames are played
+  as fast as possible: each frame() call (or each listener callback) advances by one frame.
+
+  Subclasses implement stepFrame, getFrame, getSecondsUntilNextFrame, and isFinished.
+  """
+
+  def __init__(self, speed=1.0):
+    self.speed = speed
+    self.listeners = []
+    # Thread that calls the listeners and the event that stops it, None if listeners are not played
+    self.playbackThread = None
+    self.stopPlayback = None
+    self.lock = threading.Lock()
+
+  # Leap.Controller interface
+
+  @property
+  def is_connected(self):
+    return not self.isFinished()
+
+  @property
+  def has_focus(self):
+    return True
+
+  def set_policy_flags(self, flags):
+    pass
+
+  def enable_gesture(self, gestureType, enable=True):
+    pass
+
+  def is_gesture_enabled(self, gestureType):
+    return False
+
+  def frame(self, history=0):
+    with self.lock:
+      if not self.listeners and history == 0:
+        if self.speed:
+          # Move to the most recent frame, the skipped ones are available in the history
+          while self.stepFrame():
+            pass
+        else:
+          self.stepFrame()
+      return self.getFrame(history)
+
+  def add_listener(self, listener):
+    with self.lock:
+      if listener in self.listeners:
+        return False
+      self.listeners.append(listener)
+      if self.playbackThread is None:
+        # Each playback thread has its own stop event, so that a finishing thread cannot stop a new one
+        self.stopPlayback = threading.Event()
+        self.playbackThread = threading.Thread(target=self.playListeners, args=(self.stopPlayback,), name=type(self).__name__)
+        self.playbackThread.daemon = True
+        self.playbackThread.start()
+    return True
+
+  def remove_listener(self, listener):
+    with self.lock:
+      if listener not in self.listeners:
+        return False
+      self.listeners.remove(listener)
+      playbackThread = self.playbackThread if not self.listeners else None
+      if playbackThread is not None:
+        self.stopPlayback.set()
+        self.playbackThread = None
+        self.stopPlayback = None
+    if playbackThread is not None and playbackThread is not threading.current_thread():
+      playbackThread.join()
+    return True
+
+  # Playback
+
+  def stepFrame(self):
+    """Advance to the next frame if it is due. Returns True if advanced."""
+    raise NotImplementedError()
+
+  def getFrame(self, history):
+    """Return the frame that is history frames before the current frame (an invalid frame if not available)"""
+    raise NotImplementedError()
+
+  def getSecondsUntilNextFrame(self):
+    return 0.0
+
+  def isFinished(self):
+    return False
+
+  def playListeners(self, stopPlayback):
+    while not stopPlayback.is_set():
+      with self.lock:
+        newFrame = self.stepFrame()
+        finished = self.isFinished()
+        listeners = list(self.listeners)
+        if finished and not stopPlayback.is_set():
+          # Playback is started again by the next add_listener (e.g., after rewinding)
+          self.playbackThread = None
+          self.stopPlayback = None
+      if newFrame:
+        for listener in listeners:
+          listener.on_frame(self)
+      if finished:
+        break
+      if self.speed and not newFrame:
+        stopPlayback.wait(self.getSecondsUntilNextFrame())
+
+  def close(self):
+    for listener in list(self.listeners):
+      self.remove_listener(listener)
@@ -0,0 +1,109 @@
+"""Tracking of Leap gestures (Frame.gestures()) and dispatching them to actions.
+
+Gesture types and states have the same values as the Leap.Gesture TYPE_* and STATE_* constants,
+so that this module can be used without the Leap SDK (e.g., with replayed or synthetic frames).
+"""
+
+TYPE_INVALID = -1
+TYPE_SWIPE = 1
+TYPE_CIRCLE = 4
+TYPE_SCREEN_TAP = 5
+TYPE_KEY_TAP = 6
+
+STATE_INVALID = -1
+STATE_START = 1
+STATE_UPDATE = 2
+STATE_STOP = 3
+
+GESTURE_TYPE_NAMES = {
+  TYPE_SWIPE: "swipe",
+  TYPE_CIRCLE: "circle",
+  TYPE_SCREEN_TAP: "screenTap",
+  TYPE_KEY_TAP: "keyTap",
+  }
+
+class TrackedGesture(object):
+  """State of a gesture that is in progress, kept between frames"""
+  __slots__ = ("id", "type", "startTimeSec", "lastUpdateTimeSec", "progress", "userData")
+
+  def __init__(self, gestureId, gestureType, timeSec):
+    self.id = gestureId
+    self.type = gestureType
+    self.startTimeSec = timeSec
+    self.lastUpdateTimeSec = timeSec
+    # Progress at the previous update (number of turns for circle gestures), for computing increments
+    self.progress = 0.0
+    # Any data that actions need to keep for the duration of the gesture
+    self.userData = None
+
+class GestureDispatcher(object):
+  """Track gestures by id across frames and call the action that is registered for the gesture type and state.
+
+  Actions are looked up in a table indexed by (gestureType, gestureState), so the cost of dispatching
+  does not depend on the number of registered actions. An action is called as action(gesture, trackedGesture),
+  where gesture is the gesture object of the frame (cast to its specific class, such as Leap.SwipeGesture,
+  if gestureClasses is set) and trackedGesture is the TrackedGesture that persists while the gesture is in progress.
+
+  A gesture that is seen first in update or stop state (e.g., because its start was in a skipped frame) is
+  dispatched as a start first. Gestures that do not receive any update for staleAfterSec are dropped without
+  calling their stop action (the device lost track of them).
+  """
+
+  def __init__(self, staleAfterSec=1.0):
+    self.staleAfterSec = staleAfterSec
+    # (gestureType, gestureState) -> action
+    self.actions = {}
+    # gestureType -> class for accessing the type-specific properties (e.g., Leap.SwipeGesture); not needed for stand-ins
+    self.gestureClasses = {}
+    # gesture id -> TrackedGesture
+    self.activeGestures = {}
+    self.dispatchedGestureCount = 0
+
+  def setAction(self, gestureType, gestureState, action):
+    """Set the action for a gesture type and state. Remove the action if action is None."""
+    if action is None:
+      self.actions.pop((gestureType, gestureState), None)
+    else:
+      self.actions[(gestureType, gestureState)] = action
+
+  def getActionGestureTypes(self):
+    """Return the gesture types that have any action, these need to be enabled on the controller"""
+    return set([gestureType for (gestureType, gestureState) in self.actions])
+
+  def processGestures(self, gestures, timeSec):
+    """Dispatch all gestures of a frame (or of several frames, as returned by Frame.gestures(sinceFrame))"""
+    actions = self.actions
+    activeGestures = self.activeGestures
+    for gesture in gestures:
+      gestureId = gesture.id
+      gestureState = gesture.state
+      trackedGesture = activeGestures.get(gestureId)
+      if trackedGesture is None:
+        trackedGesture = TrackedGesture(gestureId, gesture.type, timeSec)
+        if gestureState != STATE_STOP:
+          activeGestures[gestureId] = trackedGesture
+        if gestureState != STATE_START:
+          self.dispatch(gesture, trackedGesture, STATE_START)
+      elif gestureState == STATE_STOP:
+        del activeGestures[gestureId]
+      trackedGesture.lastUpdateTimeSec = timeSec
+      self.dispatch(gesture, trackedGesture, gestureState)
+    if activeGestures:
+      self.removeStaleGestures(timeSec)
+
+  def dispatch(self, gesture, trackedGesture, gestureState):
+    action = self.actions.get((trackedGesture.type, gestureState))
+    if action is None:
+      return
+    gestureClass = self.gestureClasses.get(trackedGesture.type)
+    action(gestureClass(gesture) if gestureClass else gesture, trackedGesture)
+    self.dispatchedGestureCount += 1
+
+  def removeStaleGestures(self, timeSec):
+    staleGestureIds = [gestureId for gestureId, trackedGesture in self.activeGestures.items()
+      if timeSec - trackedGesture.lastUpdateTimeSec > self.staleAfterSec]
+    for gestureId in staleGestureIds:
+      del self.activeGestures[gestureId]
+
+  def reset(self):
+    self.activeGestures = {}
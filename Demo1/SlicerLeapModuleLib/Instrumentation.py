@@ -0,0 +1,94 @@
+import collections
+import timeit
+
+# High-resolution clock for all host times of the module (stage durations, scheduling, trace rate limits)
+clock = timeit.default_timer
+
+class PipelineStatistics(object):
+  """Stage timers, frame counters, and frame rates of the frame processing pipeline.
+
+  Recording a stage duration or a counter is a deque append or an integer increment, so it can be
+  done for every frame. Statistics are computed from the last windowSize samples when a snapshot is
+  requested by getSnapshot.
+  """
+
+  STAGES = ["acquire", "extract", "filter", "mrmlWrite", "consumers", "total"]
+
+  def __init__(self, windowSize=200):
+    self.windowSize = windowSize
+    self.reset()
+
+  def reset(self):
+    self.stageDurations = dict((stage, collections.deque(maxlen=self.windowSize)) for stage in self.STAGES)
+    # Frames received from the controller (including caught-up frames)
+    self.receivedFrameCount = 0
+    # Frames that were written to the scene
+    self.processedFrameCount = 0
+    # Polls that returned the same frame as the previous poll
+    self.duplicateFrameCount = 0
+    # Frames that were missed by the caught-up mechanism (gaps in the frame ids)
+    self.droppedFrameCount = 0
+    # Frames that were only used for state updates (not written to the scene)
+    self.caughtUpFrameCount = 0
+    self.deviceFramesPerSecond = 0.0
+    self.lastReceivedFrameId = None
+    self.receivedFrameTimes = collections.deque(maxlen=self.windowSize)
+    self.processedFrameTimes = collections.deque(maxlen=self.windowSize)
+
+  def addStageDuration(self, stage, durationSec):
+    self.stageDurations[stage].append(durationSec)
+
+  def addReceivedFrame(self, frameId, deviceFramesPerSecond):
+    if self.lastReceivedFrameId is not None and frameId > self.lastReceivedFrameId+1:
+      self.droppedFrameCount += frameId - self.lastReceivedFrameId - 1
+    self.lastReceivedFrameId = frameId
+    self.receivedFrameCount += 1
+    self.deviceFramesPerSecond = deviceFramesPerSecond
+    self.receivedFrameTimes.append(clock())
+
+  def addProcessedFrame(self):
+    self.processedFrameCount += 1
+    self.processedFrameTimes.append(clock())
+
+  def getFramesPerSecond(self, frameTimes):
+    if len(frameTimes) < 2:
+      return 0.0
+    elapsedSec = frameTimes[-1] - frameTimes[0]
+    return (len(frameTimes)-1) / elapsedSec if elapsedSec > 0 else 0.0
+
+  def getSnapshot(self):
+    """Return the current statistics as a dict. Durations are in milliseconds."""
+    stages = {}
+    for stage in self.STAGES:
+      durations = list(self.stageDurations[stage])
+      if not durations:
+        continue
+      stages[stage] = {
+        "meanMs": 1000.0 * sum(durations) / len(durations),
+        "maxMs": 1000.0 * max(durations),
+        }
+    return {
+      "stages": stages,
+      "receivedFrameCount": self.receivedFrameCount,
+      "processedFrameCount": self.processedFrameCount,
+      "duplicateFrameCount": self.duplicateFrameCount,
+      "droppedFrameCount": self.droppedFrameCount,
+      "caughtUpFrameCount": self.caughtUpFrameCount,
+      "deviceFramesPerSecond": self.deviceFramesPerSecond,
+      "receivedFramesPerSecond": self.getFramesPerSecond(self.receivedFrameTimes),
+      "processedFramesPerSecond": self.getFramesPerSecond(self.processedFrameTimes),
+      }
+
+  def getSnapshotAsText(self):
+    snapshot = self.getSnapshot()
+    lines = [
+      "Device: %.1f fps, received: %.1f fps, processed: %.1f fps" % (
+        snapshot["deviceFramesPerSecond"], snapshot["receivedFramesPerSecond"], snapshot["processedFramesPerSecond"]),
+      "Frames received: %d, processed: %d, caught up: %d, dropped: %d, duplicate polls: %d" % (
+        snapshot["receivedFrameCount"], snapshot["processedFrameCount"], snapshot["caughtUpFrameCount"],
+        snapshot["droppedFrameCount"], snapshot["duplicateFrameCount"]),
+      ]
+    for stage in self.STAGES:
+      if stage in snapshot["stages"]:
+        lines.append("%s: %.3f ms (max %.3f ms)" % (stage, snapshot["stages"][stage]["meanMs"], snapshot["stages"][stage]["maxMs"]))
+    return "\n".join(lines)
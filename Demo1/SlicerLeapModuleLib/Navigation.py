@@ -0,0 +1,68 @@
+import numpy
+
+from SlicerLeapModuleLib.Workspace import LEAP_TO_RAS
+
+class FrameMotionNavigator(object):
+  """Convert the motion that the controller estimates between two frames (Frame.translation, rotation_matrix,
+  scale_factor) to an incremental transform in RAS.
+
+  Each motion component is only used if its probability (Frame.translation_probability etc.) is at least
+  minimumProbability, otherwise it is treated as no motion. The translation and rotation (about a center point,
+  typically the camera focal point) are composed into a single 4x4 matrix per update, in a reused buffer.
+  The increment describes how the scene should move to follow the hands, inverseIncrement is the corresponding
+  camera motion.
+  """
+
+  def __init__(self, minimumProbability=0.5, translationGain=1.0):
+    self.minimumProbability = minimumProbability
+    # Scene translation (in mm) per mm of hand translation
+    self.translationGain = translationGain
+    # Buffer for Matrix.to_array_4x4, rows are the basis vectors of the rotation
+    self.rotationBuffer = numpy.zeros(16)
+    self.rotationRas = numpy.eye(3)
+    self.translationRas = numpy.zeros(3)
+    self.increment = numpy.eye(4)
+    self.inverseIncrement = numpy.eye(4)
+    self.scaleFactor = 1.0
+
+  def update(self, frame, sinceFrame, centerRas):
+    """Compute the increment from the motion between sinceFrame and frame. Returns False if there is no probable motion."""
+    minimumProbability = self.minimumProbability
+    moved = False
+    if frame.translation_probability(sinceFrame) >= minimumProbability:
+      translation = frame.translation(sinceFrame)
+      self.translationRas[:] = LEAP_TO_RAS.dot((translation.x, translation.y, translation.z))
+      self.translationRas *= self.translationGain
+      moved = True
+    else:
+      self.translationRas[:] = 0.0
+    if frame.rotation_probability(sinceFrame) >= minimumProbability:
+      frame.rotation_matrix(sinceFrame).to_array_4x4(self.rotationBuffer)
+      # Transpose, as the buffer rows are the columns of the rotation matrix
+      rotation = self.rotationBuffer.reshape(4, 4)[:3, :3].T
+      self.rotationRas[:] = LEAP_TO_RAS.dot(rotation).dot(LEAP_TO_RAS.T)
+      moved = True
+    else:
+      self.rotationRas[:] = numpy.eye(3)
+    if frame.scale_probability(sinceFrame) >= minimumProbability:
+      self.scaleFactor = frame.scale_factor(sinceFrame)
+      moved = True
+    else:
+      self.scaleFactor = 1.0
+    if not moved:
+      return False
+    # Rotate about the center, then translate: x' = R (x - c) + c + t
+    centerRas = numpy.asarray(centerRas, dtype=float)
+    self.increment[:3, :3] = self.rotationRas
+    self.increment[:3, 3] = centerRas + self.translationRas - self.rotationRas.dot(centerRas)
+    # Inverse of the rigid transform: x = R^T (x' - o)
+    self.inverseIncrement[:3, :3] = self.rotationRas.T
+    self.inverseIncrement[:3, 3] = -self.rotationRas.T.dot(self.increment[:3, 3])
+    return True
+
+  def transformPointInverse(self, point):
+    """Apply the camera motion (inverse of the scene increment) to a point"""
+    return self.inverseIncrement[:3, :3].dot(point) + self.inverseIncrement[:3, 3]
+
+  def transformDirectionInverse(self, direction):
+    return self.inverseIncrement[:3, :3].dot(direction)
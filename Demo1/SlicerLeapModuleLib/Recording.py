@@ -0,0 +1,319 @@
+import bisect
+import mmap
+import struct
+import threading
+import time
+import numpy
+
+from SlicerLeapModuleLib.FrameObjects import ArrayFrame, Frame, FrameSourceController
+
+try:
+  import queue
+except ImportError:
+  import Queue as queue
+
+# File layout
+# -----------
+#
+# All values are little-endian.
+#
+# File header: magic "SLEAPREC", format version (uint32), maximum number of hands (uint32),
+#   maximum number of fingers per hand (uint32), reserved (uint32)
+#
+# The header is followed by any number of chunks. Each chunk starts with "CHNK" and the number of
+# frames in the chunk (uint32), followed by the columns of the chunk. Each column contains one
+# fixed-width record per frame (see RECORDING_COLUMNS). The file is append-only, so a recording that
+# was interrupted can still be read up to the last complete chunk.
+
+RECORDING_MAGIC = b"SLEAPREC"
+RECORDING_VERSION = 1
+RECORDING_HEADER = struct.Struct("<8sIIII")
+CHUNK_MAGIC = b"CHNK"
+CHUNK_HEADER = struct.Struct("<4sI")
+
+# Column name, data type, and shape of a frame record (H: max number of hands, F: max number of fingers per hand)
+RECORDING_COLUMNS = [
+  ("timestamp", "<i8", ()),
+  ("frameId", "<i8", ()),
+  ("numberOfHands", "<i4", ()),
+  ("handIds", "<i8", ("H",)),
+  ("numberOfFingers", "<i4", ("H",)),
+  ("fingerIds", "<i8", ("H", "F")),
+  ("tipPositions", "<f4", ("H", "F", 3)),
+  ("directions", "<f4", ("H", "F", 3)),
+  ]
+
+def getColumnShapes(maxNumberOfHands, maxNumberOfFingersPerHand):
+  """Return list of (name, dtype, record shape) of the recording columns"""
+  dimensions = {"H": maxNumberOfHands, "F": maxNumberOfFingersPerHand}
+  return [(name, numpy.dtype(dtype), tuple(dimensions.get(size, size) for size in shape))
+    for name, dtype, shape in RECORDING_COLUMNS]
+
+class RecordingChunk(object):
+  """Column buffers of a chunk of frames"""
+
+  def __init__(self, columnShapes, framesPerChunk):
+    self.numberOfFrames = 0
+    self.columns = [(name, numpy.zeros((framesPerChunk,)+shape, dtype=dtype)) for name, dtype, shape in columnShapes]
+    for name, column in self.columns:
+      setattr(self, name, column)
+
+class FrameRecorder(object):
+  """Append frames to a chunked, columnar binary recording file.
+
+  addFrame only copies the frame into the current chunk buffer, full chunks are written to the file by
+  a background thread. Chunk buffers are recycled, so recording does not allocate memory per frame and
+  memory usage does not grow with the length of the session. At most maxNumberOfChunks buffers are
+  allocated: if the writer falls that far behind then frames are dropped (and counted) until a buffer is free.
+
+  If writing the file fails then the error is reported to trace (a TraceChannel) at once and stored in
+  writeError, and all further frames are dropped.
+  """
+
+  def __init__(self, filePath, maxNumberOfHands, maxNumberOfFingersPerHand, framesPerChunk=1024, maxNumberOfChunks=16, trace=None):
+    self.filePath = filePath
+    self.maxNumberOfHands = maxNumberOfHands
+    self.maxNumberOfFingersPerHand = maxNumberOfFingersPerHand
+    self.framesPerChunk = framesPerChunk
+    self.maxNumberOfChunks = maxNumberOfChunks
+    self.trace = trace
+    self.columnShapes = getColumnShapes(maxNumberOfHands, maxNumberOfFingersPerHand)
+    self.numberOfRecordedFrames = 0
+    self.numberOfDroppedFrames = 0
+    self.numberOfChunks = 0
+    self.writeError = None
+    self.file = None
+    self.writerThread = None
+    self.fullChunks = queue.Queue()
+    self.freeChunks = queue.Queue()
+    self.currentChunk = None
+
+  def isRecording(self):
+    return self.file is not None
+
+  def start(self):
+    if self.isRecording():
+      return
+    self.file = open(self.filePath, "wb")
+    self.file.write(RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION,
+      self.maxNumberOfHands, self.maxNumberOfFingersPerHand, 0))
+    self.numberOfRecordedFrames = 0
+    self.numberOfDroppedFrames = 0
+    self.writeError = None
+    self.currentChunk = self.getFreeChunk()
+    self.writerThread = threading.Thread(target=self.writeChunks, name="LeapFrameRecorder")
+    self.writerThread.daemon = True
+    self.writerThread.start()
+
+  def stop(self):
+    """Write all remaining frames and close the file"""
+    if not self.isRecording():
+      return
+    if self.currentChunk is not None and self.currentChunk.numberOfFrames > 0:
+      self.fullChunks.put(self.currentChunk)
+    self.currentChunk = None
+    # Sentinel to stop the writer thread
+    self.fullChunks.put(None)
+    self.writerThread.join()
+    self.writerThread = None
+    try:
+      self.file.close()
+    finally:
+      self.file = None
+
+  def getFreeChunk(self):
+    """Return a recycled or new chunk buffer, or None if all buffers are waiting to be written"""
+    try:
+      chunk = self.freeChunks.get_nowait()
+    except queue.Empty:
+      if self.numberOfChunks >= self.maxNumberOfChunks:
+        return None
+      # The writer is still busy with all the previous chunks, so allocate a new one instead of waiting
+      chunk = RecordingChunk(self.columnShapes, self.framesPerChunk)
+      self.numberOfChunks += 1
+    chunk.numberOfFrames = 0
+    return chunk
+
+  def addFrame(self, frameArrays):
+    """Append the content of a FrameArrays object to the recording"""
+    if self.writeError is not None:
+      self.numberOfDroppedFrames += 1
+      return
+    chunk = self.currentChunk
+    if chunk is None:
+      # All chunk buffers were waiting to be written at the previous frame
+      chunk = self.currentChunk = self.getFreeChunk()
+      if chunk is None:
+        self.numberOfDroppedFrames += 1
+        return
+    index = chunk.numberOfFrames
+    chunk.timestamp[index] = frameArrays.timestamp
+    chunk.frameId[index] = frameArrays.frameId
+    chunk.numberOfHands[index] = frameArrays.numberOfHands
+    chunk.handIds[index] = frameArrays.handIds
+    chunk.numberOfFingers[index] = frameArrays.numberOfFingers
+    chunk.fingerIds[index] = frameArrays.fingerIds
+    chunk.tipPositions[index] = frameArrays.tipPositions
+    chunk.directions[index] = frameArrays.directions
+    chunk.numberOfFrames = index+1
+    self.numberOfRecordedFrames += 1
+    if chunk.numberOfFrames == self.framesPerChunk:
+      self.fullChunks.put(chunk)
+      self.currentChunk = self.getFreeChunk()
+
+  def writeChunks(self):
+    while True:
+      chunk = self.fullChunks.get()
+      if chunk is None:
+        break
+      if self.writeError is None:
+        try:
+          self.writeChunk(chunk)
+        except (IOError, OSError) as e:
+          self.writeError = e
+          if self.trace is not None:
+            self.trace.error("writeChunks", "Recording to %s failed, further frames are not recorded: %s", self.filePath, e)
+      self.freeChunks.put(chunk)
+
+  def writeChunk(self, chunk):
+    numberOfFrames = chunk.numberOfFrames
+    self.file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, numberOfFrames))
+    for name, column in chunk.columns:
+      # Slicing along the first axis keeps the data contiguous, so it is written without copying
+      column[:numberOfFrames].tofile(self.file)
+
+class RecordingReader(object):
+  """Read a recording file through memory-mapped, zero-copy column views.
+
+  The file is not loaded into memory, only the chunk headers are read at opening. Column values
+  of a frame are read from the operating system's page cache when they are accessed.
+  """
+
+  def __init__(self, filePath):
+    self.filePath = filePath
+    self.file = open(filePath, "rb")
+    self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, self.maxNumberOfHands, self.maxNumberOfFingersPerHand, reserved = RECORDING_HEADER.unpack_from(self.mmap, 0)
+    if magic != RECORDING_MAGIC:
+      raise ValueError("%s is not a Leap recording file" % filePath)
+    if version != RECORDING_VERSION:
+      raise ValueError("Unsupported Leap recording file version %d in %s" % (version, filePath))
+    self.columnShapes = getColumnShapes(self.maxNumberOfHands, self.maxNumberOfFingersPerHand)
+    # Index of the first frame and column views of each chunk
+    self.chunkStartFrameIndices = []
+    self.chunks = []
+    self.numberOfFrames = 0
+    self.readChunkIndex()
+
+  def readChunkIndex(self):
+    recordSize = sum(dtype.itemsize * int(numpy.prod(shape)) for name, dtype, shape in self.columnShapes)
+    fileSize = len(self.mmap)
+    offset = RECORDING_HEADER.size
+    while offset + CHUNK_HEADER.size <= fileSize:
+      magic, numberOfFrames = CHUNK_HEADER.unpack_from(self.mmap, offset)
+      offset += CHUNK_HEADER.size
+      if magic != CHUNK_MAGIC or offset + numberOfFrames * recordSize > fileSize:
+        # Incomplete chunk at the end of an interrupted recording
+        break
+      columns = {}
+      for name, dtype, shape in self.columnShapes:
+        count = numberOfFrames * int(numpy.prod(shape))
+        columns[name] = numpy.frombuffer(self.mmap, dtype=dtype, count=count, offset=offset).reshape((numberOfFrames,)+shape)
+        offset += count * dtype.itemsize
+      if numberOfFrames == 0:
+        continue
+      self.chunkStartFrameIndices.append(self.numberOfFrames)
+      self.chunks.append(columns)
+      self.numberOfFrames += numberOfFrames
+
+  def getFrameLocation(self, frameIndex):
+    """Return the column views of the chunk containing the frame and the index of the frame in the chunk"""
+    chunkIndex = bisect.bisect_right(self.chunkStartFrameIndices, frameIndex) - 1
+    return self.chunks[chunkIndex], frameIndex - self.chunkStartFrameIndices[chunkIndex]
+
+  def getTimestamp(self, frameIndex):
+    columns, index = self.getFrameLocation(frameIndex)
+    return int(columns["timestamp"][index])
+
+  def close(self):
+    self.chunks = []
+    self.chunkStartFrameIndices = []
+    try:
+      self.mmap.close()
+    except BufferError:
+      # Frames returned earlier still refer to the mapped memory, it is released when they are deleted
+      pass
+    self.file.close()
+
+class ReplayFrame(ArrayFrame):
+  """Frame of a recording, its arrays are views of the memory-mapped columns"""
+
+  def __init__(self, columns, index, framesPerSecond):
+    ArrayFrame.__init__(self, int(columns["frameId"][index]), int(columns["timestamp"][index]), framesPerSecond,
+      int(columns["numberOfHands"][index]), columns["handIds"][index], columns["numberOfFingers"][index],
+      columns["fingerIds"][index], columns["tipPositions"][index], columns["directions"][index])
+
+class ReplayController(FrameSourceController):
+  """Stand-in for Leap.Controller that plays back a recording file.
+  See FrameSourceController for the meaning of speed.
+  """
+
+  def __init__(self, filePath, speed=1.0, loop=False):
+    FrameSourceController.__init__(self, speed)
+    self.reader = RecordingReader(filePath)
+    self.loop = loop
+    self.currentFrameIndex = -1
+    self.playbackStartTime = None
+
+  def rewind(self):
+    with self.lock:
+      self.currentFrameIndex = -1
+      self.playbackStartTime = None
+
+  def isFinished(self):
+    return not self.loop and self.currentFrameIndex >= self.reader.numberOfFrames-1
+
+  def getFrame(self, history):
+    frameIndex = self.currentFrameIndex - history
+    if frameIndex < 0 or frameIndex >= self.reader.numberOfFrames:
+      return Frame.invalid()
+    columns, index = self.reader.getFrameLocation(frameIndex)
+    return ReplayFrame(columns, index, self.getFramesPerSecond(frameIndex))
+
+  def getFramesPerSecond(self, frameIndex):
+    if frameIndex < 1:
+      return 0.0
+    intervalUsec = self.reader.getTimestamp(frameIndex) - self.reader.getTimestamp(frameIndex-1)
+    return 1.0e6 / intervalUsec if intervalUsec > 0 else 0.0
+
+  def getPlaybackTime(self, frameIndex):
+    """Wall-clock time when the frame is due"""
+    return self.playbackStartTime + (self.reader.getTimestamp(frameIndex) - self.reader.getTimestamp(0)) / 1.0e6 / self.speed
+
+  def stepFrame(self):
+    numberOfFrames = self.reader.numberOfFrames
+    nextFrameIndex = self.currentFrameIndex+1
+    if nextFrameIndex >= numberOfFrames:
+      if not self.loop or numberOfFrames == 0:
+        return False
+      nextFrameIndex = 0
+      self.playbackStartTime = None
+    if self.speed:
+      now = time.time()
+      if self.playbackStartTime is None:
+        # Start playback so that the next frame is played now
+        self.playbackStartTime = now - (self.reader.getTimestamp(nextFrameIndex) - self.reader.getTimestamp(0)) / 1.0e6 / self.speed
+      elif self.getPlaybackTime(nextFrameIndex) > now:
+        return False
+    self.currentFrameIndex = nextFrameIndex
+    return True
+
+  def getSecondsUntilNextFrame(self):
+    nextFrameIndex = self.currentFrameIndex+1
+    if not self.speed or self.playbackStartTime is None or nextFrameIndex >= self.reader.numberOfFrames:
+      return 0.0
+    return max(0.0, self.getPlaybackTime(nextFrameIndex) - time.time())
+
+  def close(self):
+    FrameSourceController.close(self)
+    self.reader.close()
@@ -0,0 +1,41 @@
+class AdaptiveScheduler(object):
+  """Choose the interval between updates from hand presence and the measured cost of the updates.
+
+  While hands are tracked, updates run at the active interval (typically the display refresh period).
+  If no hands were seen for idleDelaySec then updates slow down to the idle interval. If an update
+  (processing plus rendering) takes more than budgetFraction of the interval then the interval is
+  increased, so that updates never take more than that fraction of the main thread's time.
+  Times are in seconds.
+  """
+
+  def __init__(self, activeIntervalSec=1.0/60.0, idleIntervalSec=0.25, idleDelaySec=1.0, budgetFraction=0.5, costSmoothing=0.1):
+    self.activeIntervalSec = activeIntervalSec
+    self.idleIntervalSec = idleIntervalSec
+    self.idleDelaySec = idleDelaySec
+    self.budgetFraction = budgetFraction
+    # Weight of the newest sample in the exponential moving averages of the update and render times
+    self.costSmoothing = costSmoothing
+    self.reset()
+
+  def reset(self):
+    self.lastActiveTimeSec = None
+    self.averageUpdateSec = 0.0
+    self.averageRenderSec = 0.0
+    self.isIdle = True
+
+  def addUpdateTime(self, durationSec):
+    self.averageUpdateSec += self.costSmoothing * (durationSec - self.averageUpdateSec)
+
+  def addRenderTime(self, durationSec):
+    self.averageRenderSec += self.costSmoothing * (durationSec - self.averageRenderSec)
+
+  def getInterval(self, nowSec, handsPresent):
+    """Return the time until the next update"""
+    if handsPresent:
+      self.lastActiveTimeSec = nowSec
+    self.isIdle = self.lastActiveTimeSec is None or nowSec - self.lastActiveTimeSec > self.idleDelaySec
+    if self.isIdle:
+      return self.idleIntervalSec
+    costIntervalSec = (self.averageUpdateSec + self.averageRenderSec) / self.budgetFraction
+    # Throttling never makes updates slower than in idle state
+    return min(max(self.activeIntervalSec, costIntervalSec), max(self.activeIntervalSec, self.idleIntervalSec))
@@ -0,0 +1,20 @@
+class SliceIndexSelector(object):
+  """Select a slice index from a continuous normalized position (0..1), with hysteresis.
+
+  The selected index only changes when the position is more than hysteresisSlices beyond the border
+  between two slices, so that a fingertip that is held near a border does not make the slice flicker.
+  """
+
+  def __init__(self, hysteresisSlices=0.3):
+    self.hysteresisSlices = hysteresisSlices
+    self.sliceIndex = None
+
+  def getSliceIndex(self, normalizedPosition, numberOfSlices):
+    position = normalizedPosition * (numberOfSlices - 1)
+    if self.sliceIndex is None or abs(position - self.sliceIndex) > 0.5 + self.hysteresisSlices:
+      self.sliceIndex = int(round(position))
+    self.sliceIndex = min(max(self.sliceIndex, 0), numberOfSlices - 1)
+    return self.sliceIndex
+
+  def reset(self):
+    self.sliceIndex = None
@@ -0,0 +1,120 @@
+"""Distribution of processed frames to multiple consumers (transforms, fiducials, view control, etc.).
+
+Each frame is extracted once. All subscribers receive the same FrameSnapshot object, which holds read-only
+views of the arrays of the processing pipeline, so nothing is copied per frame or per subscriber.
+"""
+
+INTEREST_HANDS = "hands"
+INTEREST_FINGERTIPS = "fingertips"
+INTEREST_PALMS = "palms"
+INTEREST_GESTURES = "gestures"
+INTERESTS = (INTEREST_HANDS, INTEREST_FINGERTIPS, INTEREST_PALMS, INTEREST_GESTURES)
+GESTURES_ONLY = frozenset([INTEREST_GESTURES])
+
+def readOnlyView(array):
+  """Return a view of the array that follows its content but cannot be modified through"""
+  view = array.view()
+  view.flags.writeable = False
+  return view
+
+class FrameSnapshot(object):
+  """Content of the most recently processed frame, in output slot order (see SlicerLeapModuleLogic.updateSlots).
+
+  The arrays are updated in place at each frame: subscribers must copy any values that they need after
+  returning from the callback. Positions are in the Leap coordinate system (millimetres), except tipPositionsRas.
+  """
+
+  def __init__(self, handValid, handIds, palmPositions, fingerValid, fingerIds, tipPositions, filteredTipPositions, tipPositionsRas):
+    self.frameId = -1
+    # Frame capture time in microseconds (Leap.Frame.timestamp)
+    self.timestamp = 0
+    # Time of the update (Instrumentation.clock), in seconds
+    self.timeSec = 0.0
+    self.handValid = readOnlyView(handValid)
+    self.handIds = readOnlyView(handIds)
+    self.palmPositions = readOnlyView(palmPositions)
+    self.fingerValid = readOnlyView(fingerValid)
+    self.fingerIds = readOnlyView(fingerIds)
+    self.tipPositions = readOnlyView(tipPositions)
+    # Tip positions after jitter filtering, as written to the output transforms
+    self.filteredTipPositions = readOnlyView(filteredTipPositions)
+    # Output tip positions mapped to RAS by the calibration
+    self.tipPositionsRas = readOnlyView(tipPositionsRas)
+    # Gestures that were recognized since the previous call of the subscriber (only retrieved if any subscriber is interested)
+    self.gestures = ()
+
+class Subscription(object):
+  __slots__ = ("callback", "interests", "minimumIntervalSec", "lastCallTimeSec", "pendingGestures")
+
+  def __init__(self, callback, interests, minimumIntervalSec):
+    self.callback = callback
+    self.interests = interests
+    self.minimumIntervalSec = minimumIntervalSec
+    self.lastCallTimeSec = None
+    # Gestures of frames that the subscriber was not called for because of its rate limit
+    self.pendingGestures = []
+
+class FrameSubscribers(object):
+  """Subscribers of processed frames, with their declared interests and maximum call rates.
+
+  Subscribers that are only interested in gestures are only called when there are new gestures. Gestures of frames
+  that a rate-limited subscriber is not called for are collected and passed to its next call, so none is missed.
+  Exceptions raised by a callback are reported to trace (a TraceChannel) and do not affect other subscribers.
+  """
+
+  def __init__(self, trace=None):
+    self.trace = trace
+    self.subscriptions = []
+    self.interests = frozenset()
+
+  def subscribe(self, callback, interests, maxRateHz=None):
+    """Call callback(snapshot) for processed frames, at most maxRateHz times per second (unlimited if None).
+    Returns the subscription, which can be passed to unsubscribe.
+    """
+    interests = frozenset(interests)
+    unknownInterests = interests.difference(INTERESTS)
+    if unknownInterests or not interests:
+      raise ValueError("Invalid interests: %s (valid: %s)" % (", ".join(sorted(unknownInterests)), ", ".join(INTERESTS)))
+    subscription = Subscription(callback, interests, 1.0/maxRateHz if maxRateHz else 0.0)
+    self.subscriptions.append(subscription)
+    self.updateInterests()
+    return subscription
+
+  def unsubscribe(self, subscription):
+    if subscription in self.subscriptions:
+      self.subscriptions.remove(subscription)
+      self.updateInterests()
+
+  def updateInterests(self):
+    """Update the union of the interests of all subscribers"""
+    interests = set()
+    for subscription in self.subscriptions:
+      interests.update(subscription.interests)
+    self.interests = frozenset(interests)
+
+  def hasInterest(self, interest):
+    return interest in self.interests
+
+  def publish(self, snapshot):
+    gestures = snapshot.gestures
+    hasGestures = len(gestures) > 0
+    timeSec = snapshot.timeSec
+    for subscription in list(self.subscriptions):
+      pendingGestures = subscription.pendingGestures
+      if not hasGestures and not pendingGestures and subscription.interests == GESTURES_ONLY:
+        continue
+      if subscription.lastCallTimeSec is not None and timeSec - subscription.lastCallTimeSec < subscription.minimumIntervalSec:
+        if hasGestures and INTEREST_GESTURES in subscription.interests:
+          pendingGestures.extend(gestures)
+        continue
+      subscription.lastCallTimeSec = timeSec
+      if pendingGestures:
+        pendingGestures.extend(gestures)
+        snapshot.gestures = pendingGestures
+        subscription.pendingGestures = []
+      try:
+        subscription.callback(snapshot)
+      except Exception as e:
+        if self.trace is not None:
+          self.trace.error("publish", "Frame subscriber %s failed: %s", subscription.callback, e)
+      snapshot.gestures = gestures
@@ -0,0 +1,101 @@
+import collections
+import math
+import time
+import numpy
+
+from SlicerLeapModuleLib.FrameObjects import ArrayFrame, Frame, FrameSourceController
+
+class SyntheticController(FrameSourceController):
+  """Stand-in for Leap.Controller that generates procedural hand motion, for load and scaling tests.
+
+  Each hand moves its palm along a Lissajous curve above the device, fingertips are spread in front of the
+  palm and flex periodically. Gaussian jitter (standard deviation in mm) is added to each fingertip
+  position. Each finger is missing from a frame with dropoutProbability, and gets a new tracking id when
+  it reappears, like fingers tracked by the device. See FrameSourceController for the meaning of speed.
+  """
+
+  def __init__(self, numberOfHands=1, numberOfFingersPerHand=5, framesPerSecond=100.0, jitterMm=0.0,
+      dropoutProbability=0.0, speed=1.0, seed=None, historyLength=60):
+    FrameSourceController.__init__(self, speed)
+    self.numberOfHands = numberOfHands
+    self.numberOfFingersPerHand = numberOfFingersPerHand
+    self.framesPerSecond = float(framesPerSecond)
+    self.jitterMm = jitterMm
+    self.dropoutProbability = dropoutProbability
+    self.random = numpy.random.RandomState(seed)
+    self.frameHistory = collections.deque(maxlen=historyLength)
+    self.frameCount = 0
+    self.playbackStartTime = None
+
+    # Ids are assigned as by the device: unique, increasing numbers
+    self.nextId = 1
+    self.handIds = numpy.arange(numberOfHands, dtype=numpy.int64) + self.nextId
+    self.nextId += numberOfHands
+    self.fingerIds = numpy.zeros((numberOfHands, numberOfFingersPerHand), dtype=numpy.int64)
+    self.fingerVisible = numpy.zeros((numberOfHands, numberOfFingersPerHand), dtype=bool)
+
+    # Motion parameters
+    self.handCenters = numpy.zeros((numberOfHands, 3))
+    self.handCenters[:, 0] = (numpy.arange(numberOfHands) - (numberOfHands-1) / 2.0) * 150.0
+    self.handCenters[:, 1] = 200.0
+    fingerSpread = (numpy.arange(numberOfFingersPerHand) - (numberOfFingersPerHand-1) / 2.0) * 20.0
+    self.fingerOffsets = numpy.zeros((numberOfFingersPerHand, 3))
+    self.fingerOffsets[:, 0] = fingerSpread
+    self.fingerOffsets[:, 2] = -60.0 + numpy.abs(fingerSpread) * 0.5
+    self.fingerPhases = numpy.linspace(0.0, math.pi, numberOfFingersPerHand)
+
+  def getFrame(self, history):
+    if history < 0 or history >= len(self.frameHistory):
+      return Frame.invalid()
+    return self.frameHistory[-1-history]
+
+  def getPlaybackTime(self, frameCount):
+    return self.playbackStartTime + frameCount / self.framesPerSecond / self.speed
+
+  def stepFrame(self):
+    if self.speed:
+      now = time.time()
+      if self.playbackStartTime is None:
+        self.playbackStartTime = now - self.frameCount / self.framesPerSecond / self.speed
+      elif self.getPlaybackTime(self.frameCount) > now:
+        return False
+    self.frameHistory.append(self.generateFrame())
+    return True
+
+  def getSecondsUntilNextFrame(self):
+    if not self.speed or self.playbackStartTime is None:
+      return 0.0
+    return max(0.0, self.getPlaybackTime(self.frameCount) - time.time())
+
+  def generateFrame(self):
+    frameIndex = self.frameCount
+    self.frameCount += 1
+    t = frameIndex / self.framesPerSecond
+    shape = (self.numberOfHands, self.numberOfFingersPerHand)
+
+    # Fingers that are (re)appearing get new ids
+    visible = self.random.random_sample(shape) >= self.dropoutProbability
+    appearing = visible & ~self.fingerVisible
+    numberOfAppearing = int(numpy.count_nonzero(appearing))
+    self.fingerIds[appearing] = numpy.arange(self.nextId, self.nextId + numberOfAppearing)
+    self.nextId += numberOfAppearing
+    self.fingerVisible = visible
+
+    palmPositions = self.handCenters + numpy.array([
+      80.0 * math.sin(0.5 * 2*math.pi * t),
+      40.0 * math.sin(0.3 * 2*math.pi * t),
+      50.0 * math.sin(0.25 * 2*math.pi * t)])
+    tipPositions = palmPositions[:, numpy.newaxis, :] + self.fingerOffsets[numpy.newaxis, :, :]
+    # Flexing moves the fingertips up and back
+    flexion = 15.0 * numpy.sin(2*math.pi * 1.0 * t + self.fingerPhases)
+    tipPositions[:, :, 1] -= flexion
+    tipPositions[:, :, 2] += flexion
+    if self.jitterMm:
+      tipPositions += self.random.normal(0.0, self.jitterMm, tipPositions.shape)
+
+    # Missing fingers are left out, as in Leap frames: visible fingers are moved to the front, keeping their order
+    fingerOrder = numpy.argsort(~visible, axis=1, kind="mergesort")
+    handIndices = numpy.arange(self.numberOfHands)[:, numpy.newaxis]
+    timestamp = int(round(t * 1.0e6))
+    return ArrayFrame(frameIndex+1, timestamp, self.framesPerSecond, self.numberOfHands, self.handIds.copy(),
+      visible.sum(axis=1), self.fingerIds[handIndices, fingerOrder], tipPositions[handIndices, fingerOrder])
@@ -0,0 +1,98 @@
+from __future__ import print_function
+import collections
+import logging
+import sys
+
+from SlicerLeapModuleLib.Instrumentation import clock
+
+class TraceChannel(object):
+  """Leveled, rate-limited trace messages with an optional in-memory ring buffer.
+
+  Messages below the current level are rejected by a single comparison, so trace calls
+  can be left in the per-frame code path. Messages are formatted only when they are printed
+  or dumped. Each message id is printed at most once per minimumIntervalSec, the number of
+  suppressed messages is reported with the next printed one.
+  """
+
+  DEBUG = logging.DEBUG
+  INFO = logging.INFO
+  WARNING = logging.WARNING
+  ERROR = logging.ERROR
+  OFF = logging.CRITICAL + 10
+
+  def __init__(self, name="SlicerLeapModule", level=None, minimumIntervalSec=1.0, ringBufferSize=0):
+    self.logger = logging.getLogger(name)
+    # Messages are filtered by the level of the channel, the logger must not reject them again
+    self.logger.setLevel(logging.DEBUG)
+    self.level = self.OFF if level is None else level
+    self.minimumIntervalSec = minimumIntervalSec
+    # Print messages through the logger. If disabled then messages are only collected in the ring buffer.
+    self.echo = True
+    self.lastPrintTimes = {}
+    self.suppressedCounts = {}
+    self.ringBuffer = None
+    self.setRingBufferSize(ringBufferSize)
+
+  def setLevel(self, level):
+    self.level = level
+
+  def isEnabled(self, level):
+    return level >= self.level
+
+  def setRingBufferSize(self, size):
+    """Keep the last size messages in memory (0 disables the ring buffer)"""
+    if size > 0:
+      self.ringBuffer = collections.deque(self.ringBuffer or [], maxlen=size)
+    else:
+      self.ringBuffer = None
+
+  def debug(self, messageId, message, *args):
+    if self.DEBUG >= self.level:
+      self.log(self.DEBUG, messageId, message, args)
+
+  def info(self, messageId, message, *args):
+    if self.INFO >= self.level:
+      self.log(self.INFO, messageId, message, args)
+
+  def warning(self, messageId, message, *args):
+    if self.WARNING >= self.level:
+      self.log(self.WARNING, messageId, message, args)
+
+  def error(self, messageId, message, *args):
+    if self.ERROR >= self.level:
+      self.log(self.ERROR, messageId, message, args)
+
+  def log(self, level, messageId, message, args=()):
+    if level < self.level:
+      return
+    now = clock()
+    if self.ringBuffer is not None:
+      self.ringBuffer.append((now, level, messageId, message, args))
+    if not self.echo:
+      return
+    lastPrintTime = self.lastPrintTimes.get(messageId)
+    if lastPrintTime is not None and now - lastPrintTime < self.minimumIntervalSec:
+      self.suppressedCounts[messageId] = self.suppressedCounts.get(messageId, 0) + 1
+      return
+    self.lastPrintTimes[messageId] = now
+    text = message % args if args else message
+    suppressedCount = self.suppressedCounts.pop(messageId, 0)
+    if suppressedCount:
+      text += " (%d similar messages suppressed)" % suppressedCount
+    self.logger.log(level, text)
+
+  def dump(self, stream=None):
+    """Write all messages in the ring buffer to the stream (sys.stdout by default)"""
+    if self.ringBuffer is None:
+      return
+    if stream is None:
+      stream = sys.stdout
+    for timestamp, level, messageId, message, args in list(self.ringBuffer):
+      text = message % args if args else message
+      print("%.6f %s [%s] %s" % (timestamp, logging.getLevelName(level), messageId, text), file=stream)
+
+  def clear(self):
+    if self.ringBuffer is not None:
+      self.ringBuffer.clear()
+    self.lastPrintTimes.clear()
+    self.suppressedCounts.clear()
@@ -0,0 +1,85 @@
+class SlotAssigner(object):
+  """Assign tracking ids (Hand.id, Pointable.id) to a fixed number of stable output slots.
+
+  An id keeps its slot as long as it is tracked, so the outputs (and any per-slot state, such as filters)
+  do not shift when other hands or fingers appear or disappear. New ids get the lowest free slot.
+  Slots of ids that have not been seen for more than reclaimAfterFrames frames are released.
+  If all slots are taken then a new id takes over the least recently seen slot that was not seen
+  in the current frame, or it is not assigned any slot (getSlot returns -1).
+
+  Usage: call assignIds(ids) (or assign(id) for each id) for the ids of a frame, then endFrame().
+  """
+
+  def __init__(self, numberOfSlots, reclaimAfterFrames=5):
+    self.numberOfSlots = numberOfSlots
+    self.reclaimAfterFrames = reclaimAfterFrames
+    # id -> slot index
+    self.idToSlot = {}
+    # slot index -> id (None if the slot is free)
+    self.slotIds = [None] * numberOfSlots
+    # slot index -> index of the frame when the id of the slot was last seen
+    self.slotLastSeenFrame = [-1] * numberOfSlots
+    self.frameIndex = 0
+
+  def getSlot(self, trackingId):
+    """Return the slot of the id (-1 if the id is not assigned to any slot)"""
+    return self.idToSlot.get(trackingId, -1)
+
+  def assign(self, trackingId):
+    """Mark the id as seen in the current frame and return its slot (-1 if no slot is available)"""
+    slot = self.idToSlot.get(trackingId, -1)
+    if slot < 0:
+      slot = self.findSlotForNewId()
+      if slot < 0:
+        return -1
+      previousId = self.slotIds[slot]
+      if previousId is not None:
+        del self.idToSlot[previousId]
+      self.slotIds[slot] = trackingId
+      self.idToSlot[trackingId] = slot
+    self.slotLastSeenFrame[slot] = self.frameIndex
+    return slot
+
+  def assignIds(self, trackingIds):
+    """Mark all ids of the frame as seen and return their slots (-1 for ids without a slot).
+    Ids that already have a slot are marked first, so that a new id can only take over the slot of an id
+    that is not in the frame, regardless of the order of the ids.
+    """
+    idToSlot = self.idToSlot
+    slots = [idToSlot.get(trackingId, -1) for trackingId in trackingIds]
+    frameIndex = self.frameIndex
+    for slot in slots:
+      if slot >= 0:
+        self.slotLastSeenFrame[slot] = frameIndex
+    for index, slot in enumerate(slots):
+      if slot < 0:
+        slots[index] = self.assign(trackingIds[index])
+    return slots
+
+  def findSlotForNewId(self):
+    oldestSlot = -1
+    oldestSeenFrame = self.frameIndex
+    for slot in range(self.numberOfSlots):
+      if self.slotIds[slot] is None:
+        return slot
+      if self.slotLastSeenFrame[slot] < oldestSeenFrame:
+        oldestSlot = slot
+        oldestSeenFrame = self.slotLastSeenFrame[slot]
+    return oldestSlot
+
+  def endFrame(self):
+    """Release the slots of lost ids. Returns the list of released slots."""
+    releasedSlots = []
+    for slot in range(self.numberOfSlots):
+      trackingId = self.slotIds[slot]
+      if trackingId is not None and self.frameIndex - self.slotLastSeenFrame[slot] > self.reclaimAfterFrames:
+        del self.idToSlot[trackingId]
+        self.slotIds[slot] = None
+        releasedSlots.append(slot)
+    self.frameIndex += 1
+    return releasedSlots
+
+  def reset(self):
+    self.idToSlot.clear()
+    self.slotIds = [None] * self.numberOfSlots
+    self.slotLastSeenFrame = [-1] * self.numberOfSlots
@@ -0,0 +1,109 @@
+import numpy
+
+# Leap coordinate system (x: right, y: up, z: towards the user) to RAS axes
+LEAP_TO_RAS = numpy.array([[-1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, 1.0, 0.0]])
+
+class InteractionBoxNormalizer(object):
+  """Normalize arrays of positions to the interaction box of the controller.
+
+  The result is the same as InteractionBox.normalize_point: (position - center) / size + 0.5, which is in the
+  range 0..1 inside the box along each axis. The box is copied from Frame.interaction_box whenever a frame
+  object is available, so that whole arrays of extracted positions can be normalized at once, without
+  creating Leap.Vector objects (and also for frames that were extracted by the acquisition thread).
+  """
+
+  # Approximate interaction box of the Leap controller (in mm), used until a frame with an interaction box is seen
+  DEFAULT_CENTER = (0.0, 200.0, 0.0)
+  DEFAULT_SIZE = (235.0, 235.0, 147.0)
+
+  def __init__(self):
+    self.center = numpy.array(self.DEFAULT_CENTER)
+    self.size = numpy.array(self.DEFAULT_SIZE)
+    # Incremented at each change of the box, so that users can detect when derived values need to be recomputed
+    self.modifiedCount = 0
+
+  def setFromInteractionBox(self, interactionBox):
+    """Copy the box from a Leap.InteractionBox. Returns True if the box changed."""
+    if not interactionBox.is_valid:
+      return False
+    center = interactionBox.center
+    return self.setBox((center.x, center.y, center.z), (interactionBox.width, interactionBox.height, interactionBox.depth))
+
+  def setBox(self, center, size):
+    if numpy.array_equal(self.center, center) and numpy.array_equal(self.size, size):
+      return False
+    self.center[:] = center
+    self.size[:] = size
+    self.modifiedCount += 1
+    return True
+
+  def normalize(self, positions, output, clamp=True):
+    """Write the normalized positions (array of ...x3) to output (array of the same shape)"""
+    numpy.subtract(positions, self.center, out=output)
+    output /= self.size
+    output += 0.5
+    if clamp:
+      numpy.clip(output, 0.0, 1.0, out=output)
+    return output
+
+class LeapToRasCalibration(object):
+  """Mapping of positions from the Leap coordinate system (mm) to RAS, as a single 4x4 matrix.
+
+  Without a target region, positions are only reoriented (LEAP_TO_RAS), in millimetres. If a target region
+  is set (RAS bounds: Rmin, Rmax, Amin, Amax, Smin, Smax, such as the bounds of a volume) then the interaction
+  box is mapped to it: the right-left, far-near, and bottom-top ranges of the box are stretched to the
+  L-R, P-A, and I-S ranges of the region.
+
+  The matrix is only recomputed when the calibration or the interaction box changes (see isUpToDate), and it is
+  applied to a whole array of positions by one matrix multiplication.
+  """
+
+  def __init__(self, interactionBox):
+    self.interactionBox = interactionBox
+    self.targetBounds = None
+    self.matrix = numpy.eye(4)
+    self.interactionBoxModifiedCount = None
+    self.updateMatrix()
+
+  def setTargetBounds(self, rasBounds):
+    """Map the interaction box to the RAS region. Positions are only reoriented if rasBounds is None."""
+    self.targetBounds = tuple([float(bound) for bound in rasBounds]) if rasBounds is not None else None
+    self.updateMatrix()
+
+  def isUpToDate(self):
+    return self.interactionBoxModifiedCount == self.interactionBox.modifiedCount
+
+  def updateMatrix(self):
+    self.interactionBoxModifiedCount = self.interactionBox.modifiedCount
+    reorient = numpy.eye(4)
+    reorient[:3, :3] = LEAP_TO_RAS
+    if self.targetBounds is None:
+      self.matrix = reorient
+      return
+    # Normalize to the interaction box, as InteractionBox.normalize_point: (p - center) / size + 0.5
+    normalize = numpy.eye(4)
+    normalize[:3, :3] = numpy.diag(1.0 / self.interactionBox.size)
+    normalize[:3, 3] = 0.5 - self.interactionBox.center / self.interactionBox.size
+    # After reorienting, R is in the range -1..0 (Leap x is flipped), A and S are in the range 0..1
+    rMin, rMax, aMin, aMax, sMin, sMax = self.targetBounds
+    stretch = numpy.diag([rMax - rMin, aMax - aMin, sMax - sMin, 1.0])
+    stretch[:3, 3] = (rMax, aMin, sMin)
+    self.matrix = stretch.dot(reorient).dot(normalize)
+
+  def apply(self, positions, output):
+    """Write the RAS coordinates of the positions (array of ...x3) to output (C-contiguous array of the same shape)"""
+    numpy.dot(positions, self.matrix[:3, :3].T, out=output)
+    output += self.matrix[:3, 3]
+    return output
+
+  def toString(self):
+    """Return the calibration as a string, for storing in the scene"""
+    if self.targetBounds is None:
+      return ""
+    return " ".join([repr(bound) for bound in self.targetBounds])
+
+  def setFromString(self, calibrationString):
+    bounds = [float(value) for value in calibrationString.split()]
+    if bounds and len(bounds) != 6:
+      raise ValueError("Invalid calibration: %s" % calibrationString)
+    self.setTargetBounds(bounds if bounds else None)
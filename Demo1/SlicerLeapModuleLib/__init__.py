@@ -0,0 +1 @@
+# Helper classes of the SlicerLeapModule that do not depend on Slicer or on the Leap SDK
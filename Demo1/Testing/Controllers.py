@@ -0,0 +1,116 @@
+"""Frames and frame sources with controlled content and timing, for the tests"""
+
+import numpy
+
+from SlicerLeapModuleLib.FrameObjects import Finger, Frame, FrameSourceController, Hand, Vector
+
+def createFrame(frameId):
+  """Frame of one hand with one fingertip, the x coordinate of the fingertip is the frame id"""
+  fingers = [Finger(100 + frameId, Vector(float(frameId), 200.0, 0.0))]
+  return Frame(frameId, frameId * 10000, [Hand(1, fingers)], framesPerSecond=100.0)
+
+class Gesture(object):
+  """Stand-in for Leap.Gesture"""
+
+  def __init__(self, gestureId, gestureType, gestureState, progress=0.0, direction=None):
+    self.id = gestureId
+    self.type = gestureType
+    self.state = gestureState
+    self.progress = progress
+    self.direction = direction
+
+class PublishingController(object):
+  """Frame history of a device that publishes a new frame each time the history is read back, as if
+  the device published frames right between reading frame(0) and frame(1).
+  onPoll (if set) is called at each frame(0) call with the number of polls, it may publish frames.
+  """
+
+  def __init__(self, numberOfFrames=1):
+    self.frames = []
+    self.publishDuringHistoryRead = True
+    self.pollCount = 0
+    self.onPoll = None
+    for frameIndex in range(numberOfFrames):
+      self.publish()
+
+  def publish(self):
+    self.frames.append(createFrame(len(self.frames) + 1))
+
+  def frame(self, history=0):
+    if history == 0:
+      self.pollCount += 1
+      if self.onPoll is not None:
+        self.onPoll(self.pollCount)
+    elif history == 1 and self.publishDuringHistoryRead:
+      self.publish()
+    frameIndex = len(self.frames) - 1 - history
+    return self.frames[frameIndex] if frameIndex >= 0 else Frame.invalid()
+
+class ListController(FrameSourceController):
+  """Plays a list of frames, one frame per poll"""
+
+  def __init__(self, frames):
+    FrameSourceController.__init__(self, speed=0)
+    self.frames = frames
+    self.currentFrameIndex = -1
+
+  def stepFrame(self):
+    if self.currentFrameIndex+1 >= len(self.frames):
+      return False
+    self.currentFrameIndex += 1
+    return True
+
+  def getFrame(self, history):
+    frameIndex = self.currentFrameIndex - history
+    if frameIndex < 0:
+      return Frame.invalid()
+    return self.frames[frameIndex]
+
+  def isFinished(self):
+    return self.currentFrameIndex+1 >= len(self.frames)
+
+def createHandFrame(frameId, fingers):
+  """Create a frame of one hand from a list of (finger id, tip position)"""
+  hand = Hand(1, [Finger(fingerId, Vector(*tipPosition)) for fingerId, tipPosition in fingers])
+  return Frame(frameId, frameId * 10000, [hand], framesPerSecond=100.0)
+
+class RotationMatrix(object):
+  """Stand-in for Leap.Matrix of a rotation"""
+
+  def __init__(self, rotation):
+    self.rotation = numpy.array(rotation, dtype=float)
+
+  def to_array_4x4(self, output):
+    # Rows of the output are the basis vectors (columns of the rotation)
+    matrix = numpy.eye(4)
+    matrix[:3, :3] = self.rotation.T
+    output[:] = matrix.reshape(-1)
+
+class MotionFrame(Frame):
+  """Frame with the motion since any earlier frame, as estimated by the device.
+  Motion components are only probable if a value is given.
+  """
+
+  def __init__(self, frameId, hands, translation=None, rotation=None, scaleFactor=None):
+    Frame.__init__(self, frameId, frameId * 10000, hands, framesPerSecond=100.0)
+    self.motionTranslation = translation
+    self.motionRotation = rotation
+    self.motionScaleFactor = scaleFactor
+
+  def translation_probability(self, sinceFrame):
+    return 0.0 if self.motionTranslation is None else 1.0
+
+  def translation(self, sinceFrame):
+    return Vector(*self.motionTranslation)
+
+  def rotation_probability(self, sinceFrame):
+    return 0.0 if self.motionRotation is None else 1.0
+
+  def rotation_matrix(self, sinceFrame):
+    return RotationMatrix(self.motionRotation)
+
+  def scale_probability(self, sinceFrame):
+    return 0.0 if self.motionScaleFactor is None else 1.0
+
+  def scale_factor(self, sinceFrame):
+    return self.motionScaleFactor
@@ -0,0 +1,296 @@
+"""Minimal stand-ins for the vtk, qt, ctk, and slicer modules, for running SlicerLeapModule outside Slicer.
+
+Used by the tests and by the pipeline benchmark (SlicerLeapModuleLib.Benchmark). The MRML scene only stores
+transform and markups fiducial nodes. The application has no layout manager, tests that need views set slicer.app to a StubApplication.
+"""
+
+class StubCommand(object):
+  StartEvent = 1
+  EndEvent = 2
+
+class StubObject(object):
+  """Accepts any attribute assignment, used where only the presence of an object matters"""
+  pass
+
+class StubMatrix4x4(object):
+  def __init__(self):
+    self.elements = [[1.0 if row == column else 0.0 for column in range(4)] for row in range(4)]
+
+  def SetElement(self, row, column, value):
+    self.elements[row][column] = value
+
+  def GetElement(self, row, column):
+    return self.elements[row][column]
+
+  def DeepCopy(self, other):
+    self.elements = [list(row) for row in other.elements]
+
+class StubTransformNode(object):
+  def __init__(self):
+    self.name = None
+    self.matrix = StubMatrix4x4()
+    self.modifiedCount = 0
+    self.disableModified = 0
+
+  def SetName(self, name):
+    self.name = name
+
+  def GetName(self):
+    return self.name
+
+  def StartModify(self):
+    self.disableModified += 1
+    return self.disableModified-1
+
+  def EndModify(self, previousDisableModified):
+    self.disableModified = previousDisableModified
+    if not previousDisableModified:
+      self.modifiedCount += 1
+
+  def SetMatrixTransformToParent(self, matrix):
+    self.matrix.DeepCopy(matrix)
+    if not self.disableModified:
+      self.modifiedCount += 1
+
+class StubMarkupsFiducialNode(object):
+  """Markups fiducial node with the API of Slicer versions before control points were introduced"""
+
+  def __init__(self):
+    self.name = None
+    self.positions = []
+    self.labels = []
+    self.visibilities = []
+    self.modifiedCount = 0
+    self.disableModified = 0
+
+  def SetName(self, name):
+    self.name = name
+
+  def GetName(self):
+    return self.name
+
+  def CreateDefaultDisplayNodes(self):
+    pass
+
+  def StartModify(self):
+    self.disableModified += 1
+    return self.disableModified-1
+
+  def EndModify(self, previousDisableModified):
+    self.disableModified = previousDisableModified
+    if not previousDisableModified:
+      self.modifiedCount += 1
+
+  def GetNumberOfFiducials(self):
+    return len(self.positions)
+
+  def AddFiducial(self, x, y, z):
+    self.positions.append((x, y, z))
+    self.labels.append("")
+    self.visibilities.append(True)
+
+  def SetNthFiducialPosition(self, pointIndex, x, y, z):
+    self.positions[pointIndex] = (x, y, z)
+
+  def SetNthFiducialVisibility(self, pointIndex, visible):
+    self.visibilities[pointIndex] = visible
+
+  def SetNthFiducialLabel(self, pointIndex, label):
+    self.labels[pointIndex] = label
+
+class StubScene(object):
+  NodeAddedEvent = 66000
+  NodeRemovedEvent = 66001
+  EndCloseEvent = 66002
+  EndImportEvent = 66003
+
+  def __init__(self):
+    self.nodes = []
+    self.observers = {}
+    self.nextObserverTag = 1
+
+  def AddObserver(self, event, callback):
+    tag = self.nextObserverTag
+    self.nextObserverTag += 1
+    self.observers[tag] = (event, callback)
+    return tag
+
+  def RemoveObserver(self, tag):
+    self.observers.pop(tag, None)
+
+  def InvokeEvent(self, event):
+    for observedEvent, callback in list(self.observers.values()):
+      if observedEvent == event:
+        callback(self, event)
+
+  def AddNode(self, node):
+    self.nodes.append(node)
+    self.InvokeEvent(self.NodeAddedEvent)
+    return node
+
+  def GetSingletonNode(self, singletonTag, className):
+    # Module parameter nodes are not used in the benchmark
+    return None
+
+  def GetFirstNodeByName(self, name):
+    # Linear search, like the real scene
+    for node in self.nodes:
+      if node.GetName() == name:
+        return node
+    return None
+
+class StubTimer(object):
+  """Never fires, the benchmark calls onFrame directly"""
+  def __init__(self):
+    self.interval = 0
+  def connect(self, signal, slot):
+    pass
+  def setInterval(self, interval):
+    self.interval = interval
+  def start(self):
+    pass
+  def stop(self):
+    pass
+
+def installStubSlicerEnvironment():
+  """Make the vtk, qt, ctk, slicer modules available in __main__ for importing SlicerLeapModule.
+  Nothing is changed if the modules are already there (running in Slicer).
+  """
+  import __main__
+  if hasattr(__main__, "slicer"):
+    return False
+  vtk = StubObject()
+  vtk.vtkMatrix4x4 = StubMatrix4x4
+  vtk.vtkCommand = StubCommand
+  qt = StubObject()
+  qt.QTimer = StubTimer
+  slicer = StubObject()
+  slicer.mrmlScene = StubScene()
+  slicer.app = StubObject()
+  slicer.modules = StubObject()
+  slicer.vtkMRMLLinearTransformNode = StubTransformNode
+  slicer.vtkMRMLMarkupsFiducialNode = StubMarkupsFiducialNode
+  __main__.vtk = vtk
+  __main__.qt = qt
+  __main__.ctk = StubObject()
+  __main__.slicer = slicer
+  return True
+
+class SignalSource(object):
+  """Records Qt-style signal connections and calls the connected slots on emit"""
+
+  def __init__(self):
+    self.connections = []
+
+  def connect(self, signal, slot):
+    self.connections.append((signal, slot))
+
+  def disconnect(self, signal, slot):
+    self.connections.remove((signal, slot))
+
+  def emit(self, signal, *args):
+    for connectedSignal, slot in list(self.connections):
+      if connectedSignal == signal:
+        slot(*args)
+
+class StubRenderWindow(object):
+
+  def __init__(self):
+    self.observers = {}
+    self.nextObserverTag = 1
+
+  def AddObserver(self, event, callback):
+    tag = self.nextObserverTag
+    self.nextObserverTag += 1
+    self.observers[tag] = (event, callback)
+    return tag
+
+  def RemoveObserver(self, tag):
+    del self.observers[tag]
+
+  def Render(self):
+    for event in [StubCommand.StartEvent, StubCommand.EndEvent]:
+      for observedEvent, callback in list(self.observers.values()):
+        if observedEvent == event:
+          callback(self, event)
+
+class StubSliceLogic(object):
+  """Volume of 100 slices of 1 mm"""
+
+  def __init__(self):
+    self.sliceOffset = 0.0
+    self.sliceOffsetChangeCount = 0
+
+  def GetLowestVolumeSliceBounds(self, bounds):
+    bounds[:] = [-50.0, 50.0, -50.0, 50.0, 0.0, 100.0]
+
+  def GetLowestVolumeSliceSpacing(self):
+    return (1.0, 1.0, 1.0)
+
+  def GetSliceOffset(self):
+    return self.sliceOffset
+
+  def SetSliceOffset(self, sliceOffset):
+    self.sliceOffset = sliceOffset
+    self.sliceOffsetChangeCount += 1
+
+class StubSliceNode(object):
+  """Axial slice"""
+
+  def __init__(self):
+    self.sliceToRas = StubMatrix4x4()
+
+  def GetSliceToRAS(self):
+    return self.sliceToRas
+
+class StubView(object):
+
+  def __init__(self):
+    self.window = StubRenderWindow()
+    self.logic = StubSliceLogic()
+    self.sliceNode = StubSliceNode()
+
+  def sliceLogic(self):
+    return self.logic
+
+  def mrmlSliceNode(self):
+    return self.sliceNode
+
+  def renderWindow(self):
+    return self.window
+
+  # Both slice and 3D widgets return themselves as view
+  def sliceView(self):
+    return self
+
+  def threeDView(self):
+    return self
+
+class StubLayoutManager(SignalSource):
+
+  def __init__(self, sliceViewNames):
+    SignalSource.__init__(self)
+    self.threeDViewCount = 0
+    self.setViews(sliceViewNames)
+
+  def setViews(self, sliceViewNames):
+    self.sliceViews = dict((sliceViewName, StubView()) for sliceViewName in sliceViewNames)
+
+  def sliceViewNames(self):
+    return sorted(self.sliceViews)
+
+  def sliceWidget(self, sliceViewName):
+    return self.sliceViews.get(sliceViewName)
+
+class StubApplication(SignalSource):
+
+  def __init__(self):
+    SignalSource.__init__(self)
+    self.layoutManagerInstance = None
+
+  def layoutManager(self):
+    return self.layoutManagerInstance
+
+  # Signals are attributes of Qt objects in Python
+  def startupCompleted(self):
+    pass
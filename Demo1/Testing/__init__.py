@@ -0,0 +1 @@
+# Tests of the SlicerLeapModule that run outside Slicer (see SlicerStubs)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Import SlicerLeapModule and SlicerLeapModuleLib from the module directory, as Slicer does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
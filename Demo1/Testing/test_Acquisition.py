@@ -0,0 +1,83 @@
+import unittest
+
+from SlicerLeapModuleLib.Acquisition import AcquisitionThread, FrameRingBuffer
+from SlicerLeapModuleLib.FrameArrays import FrameArrays
+from Testing.Controllers import PublishingController, createFrame
+
+class FrameRingBufferTest(unittest.TestCase):
+
+  def readFrameIds(self, ringBuffer, target=None, latestOnly=False):
+    frameIds = []
+    def collect(frameArrays, deviceFramesPerSecond):
+      self.assertEqual(deviceFramesPerSecond, 100.0)
+      self.assertEqual(frameArrays.tipPositions[0, 0, 0], frameArrays.frameId)
+      frameIds.append(frameArrays.frameId)
+    numberOfRecords = ringBuffer.readNew(target or FrameArrays(2, 5), collect, latestOnly)
+    self.assertEqual(numberOfRecords, len(frameIds))
+    return frameIds
+
+  def test_readInOrder(self):
+    ringBuffer = FrameRingBuffer(8, 2, 5)
+    for frameId in range(1, 4):
+      ringBuffer.write(createFrame(frameId))
+    self.assertEqual(ringBuffer.getNumberOfNewRecords(), 3)
+    self.assertEqual(self.readFrameIds(ringBuffer), [1, 2, 3])
+    self.assertEqual(ringBuffer.getNumberOfNewRecords(), 0)
+    self.assertEqual(self.readFrameIds(ringBuffer), [])
+    ringBuffer.write(createFrame(4))
+    self.assertEqual(self.readFrameIds(ringBuffer), [4])
+
+  def test_skipOverwrittenRecords(self):
+    ringBuffer = FrameRingBuffer(4, 2, 5)
+    for frameId in range(1, 11):
+      ringBuffer.write(createFrame(frameId))
+    # Only capacity-1 records can be read, the older ones are overwritten
+    self.assertEqual(self.readFrameIds(ringBuffer), [8, 9, 10])
+    self.assertEqual(ringBuffer.readCount, 10)
+
+  def test_skipRecordOverwrittenWhileCopied(self):
+    ringBuffer = FrameRingBuffer(4, 2, 5)
+    for frameId in range(1, 4):
+      ringBuffer.write(createFrame(frameId))
+
+    class ProducerInterruptingTarget(FrameArrays):
+      """Simulates the producer writing a new frame while the consumer copies the first record"""
+      def copyFrom(self, other):
+        FrameArrays.copyFrom(self, other)
+        if ringBuffer.writeCount == 3:
+          ringBuffer.write(createFrame(4))
+          ringBuffer.write(createFrame(5))
+
+    # Frame 1 is overwritten by frame 5 during the copy and the record of frame 2 is the next one that the producer
+    # writes, so both are skipped. Frames written during reading are read next time.
+    self.assertEqual(self.readFrameIds(ringBuffer, ProducerInterruptingTarget(2, 5)), [3])
+    self.assertEqual(self.readFrameIds(ringBuffer), [4, 5])
+
+  def test_latestOnly(self):
+    ringBuffer = FrameRingBuffer(8, 2, 5)
+    for frameId in range(1, 6):
+      ringBuffer.write(createFrame(frameId))
+    self.assertEqual(self.readFrameIds(ringBuffer, latestOnly=True), [5])
+    self.assertEqual(ringBuffer.getNumberOfNewRecords(), 0)
+
+class AcquisitionThreadTest(unittest.TestCase):
+
+  def test_framePublishedDuringCatchUp(self):
+    controller = PublishingController()
+    ringBuffer = FrameRingBuffer(16, 2, 5)
+    acquisition = AcquisitionThread(controller, ringBuffer, pollIntervalSec=0.0)
+    def onPoll(pollCount):
+      # Two new frames at each poll, and one more while the history is read
+      controller.publish()
+      controller.publish()
+      if pollCount == 4:
+        acquisition.stopRequested.set()
+    controller.onPoll = onPoll
+    # Run the acquisition loop on this thread, until the stop request
+    acquisition.run()
+    frameIds = []
+    ringBuffer.readNew(FrameArrays(2, 5), lambda frameArrays, deviceFramesPerSecond: frameIds.append(frameArrays.frameId))
+    # Acquisition starts at the newest frame of the first poll (3). Each frame is written once, the frame that is
+    # published during the last history read (12) is not polled anymore.
+    self.assertEqual(frameIds, list(range(3, 12)))
+    self.assertEqual(controller.frames[-1].id, 12)
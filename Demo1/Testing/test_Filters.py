@@ -0,0 +1,137 @@
+import unittest
+import numpy
+
+from SlicerLeapModuleLib.Filters import POSITION_FILTER_TYPES, MotionPredictor, createPositionFilter
+from Testing.Controllers import ListController, createHandFrame
+from Testing.SlicerStubs import installStubSlicerEnvironment
+
+class PositionFilterTest(unittest.TestCase):
+
+  def setUp(self):
+    self.shape = (2, 5)
+    self.valid = numpy.zeros(self.shape, dtype=bool)
+    self.valid[0, :3] = True
+    self.positions = numpy.zeros(self.shape + (3,))
+    self.positions[..., 1] = 200.0
+    self.output = numpy.zeros(self.shape + (3,))
+
+  def test_firstSamplePassedThrough(self):
+    for filterType in POSITION_FILTER_TYPES:
+      positionFilter = createPositionFilter(filterType, self.shape)
+      positionFilter.update(self.positions, self.valid, 0.0, self.output)
+      numpy.testing.assert_array_equal(self.output[self.valid], self.positions[self.valid], err_msg=filterType)
+      # Later samples are smoothed
+      movedPositions = self.positions + 10.0
+      positionFilter.update(movedPositions, self.valid, 0.01, self.output)
+      self.assertTrue((numpy.abs(self.output[self.valid] - movedPositions[self.valid]) > 0.01).any(), filterType)
+
+  def test_resetSlots(self):
+    for filterType in POSITION_FILTER_TYPES:
+      positionFilter = createPositionFilter(filterType, self.shape)
+      for step in range(5):
+        positionFilter.update(self.positions, self.valid, step * 0.01, self.output)
+      reset = numpy.zeros(self.shape, dtype=bool)
+      reset[0, 1] = True
+      positionFilter.reset(reset)
+      jumpedPositions = self.positions + 50.0
+      positionFilter.update(jumpedPositions, self.valid, 0.05, self.output)
+      # Only the reset slot starts again from the new position
+      numpy.testing.assert_array_equal(self.output[0, 1], jumpedPositions[0, 1], err_msg=filterType)
+      self.assertTrue((numpy.abs(self.output[0, 0] - jumpedPositions[0, 0]) > 0.01).any(), filterType)
+
+  def test_invalidSlotsKeepState(self):
+    positionFilter = createPositionFilter("movingAverage", self.shape, windowSize=2)
+    positionFilter.update(self.positions, self.valid, 0.0, self.output)
+    valid = self.valid.copy()
+    valid[0, 0] = False
+    positionFilter.update(self.positions + 100.0, valid, 0.01, self.output)
+    positionFilter.update(self.positions + 10.0, self.valid, 0.02, self.output)
+    numpy.testing.assert_allclose(self.output[0, 0], self.positions[0, 0] + 5.0)
+
+  def test_createPositionFilter(self):
+    self.assertIsNone(createPositionFilter("none", self.shape))
+    self.assertIsNone(createPositionFilter(None, self.shape))
+    self.assertRaises(ValueError, createPositionFilter, "median", self.shape)
+
+class MotionPredictorTest(unittest.TestCase):
+
+  def setUp(self):
+    self.shape = (2, 5)
+    self.valid = numpy.zeros(self.shape, dtype=bool)
+    self.valid[0, 0] = True
+    self.predicted = numpy.zeros(self.shape + (3,))
+
+  def moveAtConstantVelocity(self, predictor, velocity, numberOfFrames, frameIntervalSec=0.01):
+    """Update the predictor by a fingertip that moves at velocity (mm/s) and return its last position"""
+    positions = numpy.zeros(self.shape + (3,))
+    for frameIndex in range(numberOfFrames):
+      positions[0, 0] = numpy.multiply(velocity, frameIndex * frameIntervalSec)
+      predictor.update(positions, self.valid, frameIndex * frameIntervalSec)
+    return positions
+
+  def predictOffset(self, predictor, positions, horizonSec):
+    predictor.predict(positions, self.valid, horizonSec, self.predicted)
+    return self.predicted[0, 0] - positions[0, 0]
+
+  def test_constantVelocity(self):
+    predictor = MotionPredictor(self.shape)
+    positions = self.moveAtConstantVelocity(predictor, (200.0, 0.0, 0.0), 30)
+    numpy.testing.assert_allclose(self.predictOffset(predictor, positions, 0.03), (6.0, 0.0, 0.0), atol=0.1)
+    # The horizon is limited
+    numpy.testing.assert_allclose(self.predictOffset(predictor, positions, 1.0), (10.0, 0.0, 0.0), atol=0.1)
+    # Invalid slots are not moved
+    numpy.testing.assert_array_equal(self.predicted[0, 1:], positions[0, 1:])
+
+  def test_repeatedFrameIgnored(self):
+    predictor = MotionPredictor(self.shape)
+    positions = self.moveAtConstantVelocity(predictor, (200.0, 0.0, 0.0), 30)
+    offset = self.predictOffset(predictor, positions, 0.03)
+    # The same frame again (same position and time)
+    predictor.update(positions, self.valid, 29 * 0.01)
+    numpy.testing.assert_array_equal(self.predictOffset(predictor, positions, 0.03), offset)
+
+  def test_startAndReset(self):
+    predictor = MotionPredictor(self.shape)
+    positions = self.moveAtConstantVelocity(predictor, (200.0, 0.0, 0.0), 1)
+    # No motion estimate from a single sample
+    numpy.testing.assert_array_equal(self.predictOffset(predictor, positions, 0.03), (0.0, 0.0, 0.0))
+    positions = self.moveAtConstantVelocity(predictor, (200.0, 0.0, 0.0), 30)
+    predictor.reset(self.valid)
+    predictor.update(positions, self.valid, 1.0)
+    numpy.testing.assert_array_equal(self.predictOffset(predictor, positions, 0.03), (0.0, 0.0, 0.0))
+
+class SlotFilterResetTest(unittest.TestCase):
+  """Filter state of a slot is reset when the slot is taken by a new finger (processed by SlicerLeapModuleLogic)"""
+
+  def setUp(self):
+    installStubSlicerEnvironment()
+    import SlicerLeapModule
+    self.SlicerLeapModule = SlicerLeapModule
+
+  def test_noFilterByDefault(self):
+    tipPositions = [(float(20 * fingerIndex), 200.0, 0.0) for fingerIndex in range(5)]
+    frames = [createHandFrame(1, zip(range(10, 15), tipPositions))]
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(ListController(frames))
+    self.assertEqual(logic.positionFilterType, "none")
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    logic.start()
+    logic.onFrame()
+    logic.stop()
+    numpy.testing.assert_array_equal(logic.filteredTipPositions[0], tipPositions)
+
+  def test_newFingerInSlotNotSmoothedWithPrevious(self):
+    tipPositions = [(float(20 * fingerIndex), 200.0, 0.0) for fingerIndex in range(5)]
+    frames = [createHandFrame(frameId, zip(range(10, 15), tipPositions)) for frameId in range(1, 6)]
+    # All slots are taken, so the new finger 15 takes over the slot of the lost finger 10
+    newTipPosition = (-60.0, 260.0, 30.0)
+    frames.append(createHandFrame(6, zip(range(11, 16), tipPositions[1:] + [newTipPosition])))
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(ListController(frames))
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    logic.setPositionFilter("oneEuro")
+    logic.start()
+    for frame in frames:
+      logic.onFrame()
+    logic.stop()
+    self.assertEqual(logic.slotArrays.fingerIds[0].tolist(), [15, 11, 12, 13, 14])
+    numpy.testing.assert_array_equal(logic.filteredTipPositions[0, 0], newTipPosition)
+    numpy.testing.assert_allclose(logic.filteredTipPositions[0, 1:], tipPositions[1:])
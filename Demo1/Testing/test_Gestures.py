@@ -0,0 +1,64 @@
+import unittest
+
+from SlicerLeapModuleLib import Gestures
+from SlicerLeapModuleLib.Gestures import GestureDispatcher
+from Testing.Controllers import Gesture
+
+class GestureDispatcherTest(unittest.TestCase):
+
+  def setUp(self):
+    self.dispatcher = GestureDispatcher(staleAfterSec=1.0)
+    self.calls = []
+    for gestureType in [Gestures.TYPE_SWIPE, Gestures.TYPE_CIRCLE]:
+      for gestureState in [Gestures.STATE_START, Gestures.STATE_UPDATE, Gestures.STATE_STOP]:
+        self.dispatcher.setAction(gestureType, gestureState, self.recordCall(gestureState))
+
+  def recordCall(self, gestureState):
+    def action(gesture, trackedGesture):
+      self.calls.append((gesture.id, trackedGesture.type, gestureState))
+    return action
+
+  def test_dispatchByTypeAndState(self):
+    self.dispatcher.setAction(Gestures.TYPE_CIRCLE, Gestures.STATE_UPDATE, None)
+    self.assertEqual(self.dispatcher.getActionGestureTypes(), set([Gestures.TYPE_SWIPE, Gestures.TYPE_CIRCLE]))
+    self.dispatcher.processGestures([Gesture(1, Gestures.TYPE_SWIPE, Gestures.STATE_START),
+      Gesture(2, Gestures.TYPE_CIRCLE, Gestures.STATE_START), Gesture(3, Gestures.TYPE_KEY_TAP, Gestures.STATE_STOP)], 0.0)
+    self.dispatcher.processGestures([Gesture(1, Gestures.TYPE_SWIPE, Gestures.STATE_UPDATE),
+      Gesture(2, Gestures.TYPE_CIRCLE, Gestures.STATE_UPDATE)], 0.1)
+    self.dispatcher.processGestures([Gesture(1, Gestures.TYPE_SWIPE, Gestures.STATE_STOP)], 0.2)
+    # No action for circle updates and key taps
+    self.assertEqual(self.calls, [(1, Gestures.TYPE_SWIPE, Gestures.STATE_START), (2, Gestures.TYPE_CIRCLE, Gestures.STATE_START),
+      (1, Gestures.TYPE_SWIPE, Gestures.STATE_UPDATE), (1, Gestures.TYPE_SWIPE, Gestures.STATE_STOP)])
+    self.assertEqual(self.dispatcher.dispatchedGestureCount, 4)
+    # Stopped gestures are not tracked anymore
+    self.assertEqual(list(self.dispatcher.activeGestures), [2])
+
+  def test_startSynthesized(self):
+    # The start of the gesture was in a frame that was not processed
+    self.dispatcher.processGestures([Gesture(1, Gestures.TYPE_CIRCLE, Gestures.STATE_UPDATE, progress=0.5)], 0.0)
+    self.dispatcher.processGestures([Gesture(2, Gestures.TYPE_SWIPE, Gestures.STATE_STOP)], 0.0)
+    self.assertEqual(self.calls, [(1, Gestures.TYPE_CIRCLE, Gestures.STATE_START), (1, Gestures.TYPE_CIRCLE, Gestures.STATE_UPDATE),
+      (2, Gestures.TYPE_SWIPE, Gestures.STATE_START), (2, Gestures.TYPE_SWIPE, Gestures.STATE_STOP)])
+    self.assertEqual(list(self.dispatcher.activeGestures), [1])
+
+  def test_trackedGestureKeptUntilStop(self):
+    trackedGestures = []
+    self.dispatcher.setAction(Gestures.TYPE_CIRCLE, Gestures.STATE_UPDATE,
+      lambda gesture, trackedGesture: trackedGestures.append(trackedGesture))
+    for timeSec in [0.0, 0.1, 0.2]:
+      self.dispatcher.processGestures([Gesture(1, Gestures.TYPE_CIRCLE, Gestures.STATE_UPDATE)], timeSec)
+    self.assertEqual(len(trackedGestures), 3)
+    self.assertTrue(trackedGestures[0] is trackedGestures[2])
+    self.assertEqual(trackedGestures[0].startTimeSec, 0.0)
+    self.assertEqual(trackedGestures[0].lastUpdateTimeSec, 0.2)
+
+  def test_staleGesturesRemoved(self):
+    self.dispatcher.processGestures([Gesture(1, Gestures.TYPE_CIRCLE, Gestures.STATE_START)], 0.0)
+    self.dispatcher.processGestures([Gesture(2, Gestures.TYPE_SWIPE, Gestures.STATE_START)], 0.5)
+    self.assertEqual(sorted(self.dispatcher.activeGestures), [1, 2])
+    self.dispatcher.processGestures([Gesture(2, Gestures.TYPE_SWIPE, Gestures.STATE_UPDATE)], 1.5)
+    # Dropped without calling the stop action
+    self.assertEqual(list(self.dispatcher.activeGestures), [2])
+    self.assertFalse((1, Gestures.TYPE_CIRCLE, Gestures.STATE_STOP) in self.calls)
+    self.dispatcher.reset()
+    self.assertEqual(self.dispatcher.activeGestures, {})
@@ -0,0 +1,46 @@
+import unittest
+
+from SlicerLeapModuleLib.Instrumentation import PipelineStatistics
+
+class PipelineStatisticsTest(unittest.TestCase):
+
+  def test_stageDurations(self):
+    statistics = PipelineStatistics(windowSize=3)
+    for durationSec in [0.010, 0.001, 0.002, 0.003]:
+      statistics.addStageDuration("filter", durationSec)
+    stages = statistics.getSnapshot()["stages"]
+    # Only stages with samples are reported, from the last windowSize samples
+    self.assertEqual(list(stages), ["filter"])
+    self.assertAlmostEqual(stages["filter"]["meanMs"], 2.0)
+    self.assertAlmostEqual(stages["filter"]["maxMs"], 3.0)
+
+  def test_frameCounters(self):
+    statistics = PipelineStatistics()
+    for frameId in [1, 2, 5, 6]:
+      statistics.addReceivedFrame(frameId, 110.0)
+    statistics.addProcessedFrame()
+    statistics.duplicateFrameCount += 1
+    snapshot = statistics.getSnapshot()
+    self.assertEqual(snapshot["receivedFrameCount"], 4)
+    self.assertEqual(snapshot["processedFrameCount"], 1)
+    # Frames 3 and 4 were missed
+    self.assertEqual(snapshot["droppedFrameCount"], 2)
+    self.assertEqual(snapshot["duplicateFrameCount"], 1)
+    self.assertEqual(snapshot["deviceFramesPerSecond"], 110.0)
+    self.assertTrue(snapshot["receivedFramesPerSecond"] > 0)
+    # A single processed frame has no frame rate
+    self.assertEqual(snapshot["processedFramesPerSecond"], 0.0)
+    statistics.reset()
+    self.assertEqual(statistics.getSnapshot()["receivedFrameCount"], 0)
+    # The frame id gap is not counted across a reset
+    statistics.addReceivedFrame(10, 110.0)
+    self.assertEqual(statistics.droppedFrameCount, 0)
+
+  def test_snapshotAsText(self):
+    statistics = PipelineStatistics()
+    statistics.addReceivedFrame(1, 100.0)
+    statistics.addStageDuration("total", 0.0015)
+    lines = statistics.getSnapshotAsText().splitlines()
+    self.assertEqual(lines[0], "Device: 100.0 fps, received: 0.0 fps, processed: 0.0 fps")
+    self.assertEqual(lines[1], "Frames received: 1, processed: 0, caught up: 0, dropped: 0, duplicate polls: 0")
+    self.assertEqual(lines[2:], ["total: 1.500 ms (max 1.500 ms)"])
@@ -0,0 +1,47 @@
+import unittest
+import numpy
+
+from SlicerLeapModuleLib.Navigation import FrameMotionNavigator
+from Testing.Controllers import MotionFrame
+
+# Rotation by 90 degrees about the vertical axis of the device (y)
+ROTATION_ABOUT_LEAP_Y = [[0.0, 0.0, 1.0], [0.0, 1.0, 0.0], [-1.0, 0.0, 0.0]]
+
+class FrameMotionNavigatorTest(unittest.TestCase):
+
+  def setUp(self):
+    self.navigator = FrameMotionNavigator()
+    self.previousFrame = MotionFrame(1, [])
+
+  def test_noProbableMotion(self):
+    self.assertFalse(self.navigator.update(MotionFrame(2, []), self.previousFrame, (0.0, 0.0, 0.0)))
+    self.assertEqual(self.navigator.scaleFactor, 1.0)
+    numpy.testing.assert_allclose(self.navigator.translationRas, [0.0, 0.0, 0.0])
+
+  def test_translation(self):
+    self.navigator.translationGain = 2.0
+    frame = MotionFrame(2, [], translation=(10.0, 20.0, 30.0))
+    self.assertTrue(self.navigator.update(frame, self.previousFrame, (5.0, 5.0, 5.0)))
+    # Leap (x, y, z) is RAS (-x, z, y)
+    numpy.testing.assert_allclose(self.navigator.translationRas, [-20.0, 60.0, 40.0])
+    numpy.testing.assert_allclose(self.navigator.increment[:3, 3], [-20.0, 60.0, 40.0])
+    # The camera moves opposite to the scene
+    numpy.testing.assert_allclose(self.navigator.transformPointInverse([0.0, 0.0, 0.0]), [20.0, -60.0, -40.0])
+    numpy.testing.assert_allclose(self.navigator.transformDirectionInverse([0.0, 0.0, 1.0]), [0.0, 0.0, 1.0])
+
+  def test_rotationAboutCenter(self):
+    centerRas = numpy.array([10.0, -20.0, 30.0])
+    frame = MotionFrame(2, [], rotation=ROTATION_ABOUT_LEAP_Y, scaleFactor=1.5)
+    self.assertTrue(self.navigator.update(frame, self.previousFrame, centerRas))
+    # The vertical axis of the device is the S axis
+    numpy.testing.assert_allclose(self.navigator.rotationRas.dot([0.0, 0.0, 1.0]), [0.0, 0.0, 1.0], atol=1e-12)
+    numpy.testing.assert_allclose(self.navigator.rotationRas.dot([1.0, 0.0, 0.0]), [0.0, 1.0, 0.0], atol=1e-12)
+    # The center is not moved
+    numpy.testing.assert_allclose(self.navigator.increment.dot(numpy.append(centerRas, 1.0))[:3], centerRas)
+    numpy.testing.assert_allclose(self.navigator.transformPointInverse(centerRas), centerRas)
+    numpy.testing.assert_allclose(self.navigator.increment.dot(self.navigator.inverseIncrement), numpy.eye(4), atol=1e-12)
+    self.assertEqual(self.navigator.scaleFactor, 1.5)
+    # Components that are not probable in the next update are reset
+    self.assertTrue(self.navigator.update(MotionFrame(3, [], translation=(1.0, 0.0, 0.0)), frame, centerRas))
+    numpy.testing.assert_allclose(self.navigator.rotationRas, numpy.eye(3))
+    self.assertEqual(self.navigator.scaleFactor, 1.0)
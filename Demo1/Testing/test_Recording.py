@@ -0,0 +1,187 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import numpy
+
+from SlicerLeapModuleLib.FrameArrays import FrameArrays
+from SlicerLeapModuleLib.Recording import FrameRecorder, RecordingReader, ReplayController
+from SlicerLeapModuleLib.Synthetic import SyntheticController
+from SlicerLeapModuleLib.Trace import TraceChannel
+
+class RecordingTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tempDir = tempfile.mkdtemp()
+    self.filePath = os.path.join(self.tempDir, "session.leaprec")
+
+  def tearDown(self):
+    shutil.rmtree(self.tempDir)
+
+  def recordSyntheticFrames(self, numberOfFrames, framesPerChunk):
+    """Record synthetic frames (with finger dropouts) and return copies of the recorded frame arrays"""
+    source = SyntheticController(numberOfHands=2, numberOfFingersPerHand=5, jitterMm=0.5, dropoutProbability=0.2, speed=0, seed=1)
+    frameArrays = FrameArrays(2, 5)
+    frameArrays.extractDirections = True
+    recorder = FrameRecorder(self.filePath, 2, 5, framesPerChunk=framesPerChunk)
+    recorder.start()
+    recordedFrames = []
+    for frameIndex in range(numberOfFrames):
+      frameArrays.extract(source.frame())
+      recorder.addFrame(frameArrays)
+      recordedFrame = FrameArrays(2, 5)
+      recordedFrame.copyFrom(frameArrays)
+      recordedFrames.append(recordedFrame)
+    recorder.stop()
+    self.assertEqual(recorder.numberOfRecordedFrames, numberOfFrames)
+    return recordedFrames
+
+  def assertSameFrame(self, frameArrays, expected):
+    self.assertEqual(frameArrays.frameId, expected.frameId)
+    self.assertEqual(frameArrays.timestamp, expected.timestamp)
+    self.assertEqual(frameArrays.numberOfHands, expected.numberOfHands)
+    numpy.testing.assert_array_equal(frameArrays.handIds[:expected.numberOfHands], expected.handIds[:expected.numberOfHands])
+    numpy.testing.assert_array_equal(frameArrays.numberOfFingers[:expected.numberOfHands], expected.numberOfFingers[:expected.numberOfHands])
+    numpy.testing.assert_array_equal(frameArrays.fingerValid, expected.fingerValid)
+    valid = expected.fingerValid
+    numpy.testing.assert_array_equal(frameArrays.fingerIds[valid], expected.fingerIds[valid])
+    # Positions are stored in single precision
+    numpy.testing.assert_allclose(frameArrays.tipPositions[valid], expected.tipPositions[valid], atol=1e-4)
+    numpy.testing.assert_allclose(frameArrays.directions[valid], expected.directions[valid], atol=1e-6)
+
+  def test_roundTrip(self):
+    recordedFrames = self.recordSyntheticFrames(10, framesPerChunk=4)
+    reader = RecordingReader(self.filePath)
+    self.assertEqual(reader.numberOfFrames, 10)
+    self.assertEqual(len(reader.chunks), 3)
+    reader.close()
+
+    controller = ReplayController(self.filePath, speed=0)
+    frameArrays = FrameArrays(2, 5)
+    for expected in recordedFrames:
+      frame = controller.frame()
+      self.assertTrue(frame.is_valid)
+      frameArrays.extract(frame)
+      self.assertSameFrame(frameArrays, expected)
+    self.assertTrue(controller.isFinished())
+    # Hand and finger objects are created from the same content
+    frame = controller.frame()
+    expected = recordedFrames[-1]
+    self.assertEqual(len(frame.hands), expected.numberOfHands)
+    for handIndex, hand in enumerate(frame.hands):
+      self.assertEqual(hand.id, expected.handIds[handIndex])
+      self.assertEqual([finger.id for finger in hand.fingers], expected.fingerIds[handIndex, :expected.numberOfFingers[handIndex]].tolist())
+    # Frame history
+    self.assertEqual(controller.frame(1).id, recordedFrames[-2].frameId)
+    self.assertFalse(controller.frame(10).is_valid)
+    controller.close()
+
+  def test_truncatedLastChunk(self):
+    recordedFrames = self.recordSyntheticFrames(10, framesPerChunk=4)
+    # Cut the file in the middle of the last chunk, as if recording was interrupted
+    fileSize = os.path.getsize(self.filePath)
+    with open(self.filePath, "r+b") as recordingFile:
+      recordingFile.truncate(fileSize - 10)
+
+    reader = RecordingReader(self.filePath)
+    self.assertEqual(reader.numberOfFrames, 8)
+    frameArrays = FrameArrays(2, 5)
+    controller = ReplayController(self.filePath, speed=0)
+    for expected in recordedFrames[:8]:
+      frameArrays.extract(controller.frame())
+      self.assertSameFrame(frameArrays, expected)
+    self.assertTrue(controller.isFinished())
+    controller.close()
+    reader.close()
+
+  def test_listenerPlaybackRestarts(self):
+    self.recordSyntheticFrames(5, framesPerChunk=4)
+    controller = ReplayController(self.filePath, speed=0)
+
+    class FrameCounter(object):
+      def __init__(self):
+        self.frameIds = []
+      def on_frame(self, controller):
+        self.frameIds.append(controller.frame().id)
+
+    def waitForPlaybackFinished():
+      endTime = time.time() + 5.0
+      while controller.playbackThread is not None and time.time() < endTime:
+        time.sleep(0.01)
+
+    firstListener = FrameCounter()
+    self.assertTrue(controller.add_listener(firstListener))
+    waitForPlaybackFinished()
+    self.assertEqual(firstListener.frameIds, [1, 2, 3, 4, 5])
+    # The finished playback thread does not prevent playing again for a new listener
+    self.assertIsNone(controller.playbackThread)
+    controller.rewind()
+    secondListener = FrameCounter()
+    self.assertTrue(controller.add_listener(secondListener))
+    waitForPlaybackFinished()
+    self.assertEqual(secondListener.frameIds, [1, 2, 3, 4, 5])
+    controller.close()
+    self.assertEqual(controller.listeners, [])
+
+  def addSyntheticFrames(self, recorder, numberOfFrames):
+    source = SyntheticController(numberOfHands=2, numberOfFingersPerHand=5, speed=0, seed=1)
+    frameArrays = FrameArrays(2, 5)
+    for frameIndex in range(numberOfFrames):
+      frameArrays.extract(source.frame())
+      recorder.addFrame(frameArrays)
+
+  def waitFor(self, condition):
+    endTime = time.time() + 5.0
+    while not condition() and time.time() < endTime:
+      time.sleep(0.01)
+    self.assertTrue(condition())
+
+  def test_writeError(self):
+    trace = TraceChannel(level=TraceChannel.WARNING, ringBufferSize=10)
+    trace.echo = False
+    recorder = FrameRecorder(self.filePath, 2, 5, framesPerChunk=2, maxNumberOfChunks=3, trace=trace)
+    recorder.start()
+    def failingWriteChunk(chunk):
+      raise IOError(28, "No space left on device")
+    recorder.writeChunk = failingWriteChunk
+    self.addSyntheticFrames(recorder, 2)
+    # The error is reported as soon as it occurs, not only when recording is stopped
+    self.waitFor(lambda: recorder.writeError is not None)
+    self.assertEqual([message[2] for message in trace.ringBuffer], ["writeChunks"])
+    # Further frames are dropped instead of being queued for writing
+    self.addSyntheticFrames(recorder, 50)
+    self.assertEqual(recorder.numberOfRecordedFrames, 2)
+    self.assertEqual(recorder.numberOfDroppedFrames, 50)
+    self.assertTrue(recorder.numberOfChunks <= 2)
+    recorder.stop()
+    self.assertFalse(recorder.isRecording())
+
+  def test_framesDroppedIfAllChunksAreWaiting(self):
+    recorder = FrameRecorder(self.filePath, 2, 5, framesPerChunk=2, maxNumberOfChunks=3)
+    recorder.start()
+    writeAllowed = threading.Event()
+    writeChunk = recorder.writeChunk
+    def blockedWriteChunk(chunk):
+      writeAllowed.wait()
+      writeChunk(chunk)
+    recorder.writeChunk = blockedWriteChunk
+    self.addSyntheticFrames(recorder, 20)
+    self.assertEqual(recorder.numberOfChunks, 3)
+    self.assertEqual(recorder.numberOfRecordedFrames, 6)
+    self.assertEqual(recorder.numberOfDroppedFrames, 14)
+    # Recording continues when the writer catches up
+    writeAllowed.set()
+    self.waitFor(lambda: recorder.freeChunks.qsize() == 3)
+    self.addSyntheticFrames(recorder, 1)
+    recorder.stop()
+    self.assertEqual(recorder.numberOfRecordedFrames, 7)
+    reader = RecordingReader(self.filePath)
+    self.assertEqual(reader.numberOfFrames, 7)
+    reader.close()
+
+  def test_invalidFile(self):
+    with open(self.filePath, "wb") as recordingFile:
+      recordingFile.write(b"NOTALEAPRECORDING" * 4)
+    self.assertRaises(ValueError, RecordingReader, self.filePath)
@@ -0,0 +1,642 @@
+import sys
+import time
+import types
+import unittest
+import numpy
+
+from SlicerLeapModuleLib.FrameObjects import Frame, Vector
+from SlicerLeapModuleLib.Synthetic import SyntheticController
+from Testing.Controllers import Gesture, ListController, MotionFrame, PublishingController, createHandFrame
+from Testing.SlicerStubs import StubApplication, StubLayoutManager, StubTransformNode, installStubSlicerEnvironment
+
+class SilentListenerController(SyntheticController):
+  """Accepts listeners but never calls them, while frames can be polled (like Leap.Controller in Slicer)"""
+
+  def add_listener(self, listener):
+    return True
+
+  def remove_listener(self, listener):
+    return True
+
+class FrameDeliveryTest(unittest.TestCase):
+
+  def setUp(self):
+    installStubSlicerEnvironment()
+    import SlicerLeapModule
+    self.SlicerLeapModule = SlicerLeapModule
+
+  def createLogic(self, controller):
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(controller)
+    logic.listenerTimeoutSec = 0.05
+    self.reportedModes = []
+    logic.frameDeliveryModeObservers.append(self.reportedModes.append)
+    return logic
+
+  def processFor(self, logic, durationSec):
+    endTime = time.time() + durationSec
+    while time.time() < endTime:
+      logic.onFrame()
+      time.sleep(0.005)
+
+  def test_fallBackToPollingIfListenerIsNotCalled(self):
+    logic = self.createLogic(SilentListenerController(speed=0))
+    logic.start()
+    self.assertEqual(logic.frameDeliveryMode, logic.FRAME_DELIVERY_LISTENER)
+    self.processFor(logic, 0.2)
+    self.assertEqual(logic.frameDeliveryMode, logic.FRAME_DELIVERY_POLLING)
+    self.assertEqual(self.reportedModes, [logic.FRAME_DELIVERY_POLLING])
+    processedFrameCount = logic.statistics.processedFrameCount
+    logic.onFrame()
+    self.assertEqual(logic.statistics.processedFrameCount, processedFrameCount+1)
+    logic.stop()
+
+  def test_keepListenerIfCalled(self):
+    logic = self.createLogic(SyntheticController(speed=5))
+    logic.start()
+    self.processFor(logic, 0.2)
+    logic.stop()
+    self.assertEqual(logic.frameDeliveryMode, logic.FRAME_DELIVERY_LISTENER)
+    self.assertEqual(self.reportedModes, [])
+    self.assertTrue(logic.statistics.processedFrameCount > 0)
+
+class RenderWindowObservationTest(unittest.TestCase):
+
+  def setUp(self):
+    installStubSlicerEnvironment()
+    import __main__
+    import SlicerLeapModule
+    self.SlicerLeapModule = SlicerLeapModule
+    self.stubs = __main__
+    self.originalApp = __main__.slicer.app
+    self.app = StubApplication()
+    __main__.slicer.app = self.app
+
+  def tearDown(self):
+    self.stubs.slicer.app = self.originalApp
+
+  def getObservedRenderWindows(self, logic):
+    return [renderWindow for renderWindow, tags in logic.renderWindowObservations]
+
+  def test_observeViewsCreatedAfterStart(self):
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(SyntheticController(speed=0))
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    # Started before the application has created the layout manager
+    logic.start()
+    self.assertEqual(logic.renderWindowObservations, [])
+    layoutManager = StubLayoutManager(["Red"])
+    self.app.layoutManagerInstance = layoutManager
+    self.app.emit('startupCompleted()')
+    self.assertEqual(self.app.connections, [])
+    redWindow = layoutManager.sliceWidget("Red").renderWindow()
+    self.assertEqual(self.getObservedRenderWindows(logic), [redWindow])
+    self.assertEqual(len(redWindow.observers), 2)
+    # Views of a new layout are observed, views of the previous layout are not
+    layoutManager.setViews(["Green", "Yellow"])
+    layoutManager.emit('layoutChanged(int)', 3)
+    self.assertEqual(self.getObservedRenderWindows(logic),
+      [layoutManager.sliceWidget("Green").renderWindow(), layoutManager.sliceWidget("Yellow").renderWindow()])
+    self.assertEqual(redWindow.observers, {})
+    logic.stop()
+    self.assertEqual(logic.renderWindowObservations, [])
+    self.assertEqual(layoutManager.connections, [])
+
+  def browseToHeight(self, logic, heightMm):
+    """Update slice browsing by fingertip 0 of hand 0 at heightMm, return the slice offset of the Red view"""
+    logic.slotArrays.fingerValid[0, 0] = True
+    logic.filteredTipPositions[0, 0] = (0.0, heightMm, 0.0)
+    logic.updateSliceBrowsing()
+    return self.app.layoutManager().sliceWidget("Red").sliceLogic().GetSliceOffset()
+
+  def test_sliceBrowsingOncePerRender(self):
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(SyntheticController(speed=0))
+    logic.setSliceBrowsingEnabled(True)
+    logic.sliceBrowsingRenderTimeoutSec = 60.0
+    # Render windows are not observed (logic not started), the browsed view is observed on demand
+    self.app.layoutManagerInstance = StubLayoutManager(["Red"])
+    redWindow = self.app.layoutManager().sliceWidget("Red").renderWindow()
+    lowOffset = self.browseToHeight(logic, 150.0)
+    self.assertEqual(self.getObservedRenderWindows(logic), [redWindow])
+    # The view is not rendered yet, the slice is not changed again
+    self.assertEqual(self.browseToHeight(logic, 250.0), lowOffset)
+    redWindow.Render()
+    highOffset = self.browseToHeight(logic, 250.0)
+    self.assertTrue(highOffset > lowOffset)
+    # Browsing continues if the view is not rendered (e.g., hidden)
+    logic.sliceBrowsingRenderTimeoutSec = 0.0
+    self.assertEqual(self.browseToHeight(logic, 150.0), lowOffset)
+    self.assertEqual(self.browseToHeight(logic, 250.0), highOffset)
+    logic.removeRenderWindowObservers()
+
+  def test_sliceBrowsingByPredictedPosition(self):
+    # The fingertip moves up at 500 mm/s
+    frames = [createHandFrame(frameId, [(10, (0.0, 100.0 + 5.0 * frameId, 0.0))]) for frameId in range(1, 21)]
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(ListController(frames))
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    logic.setSliceBrowsingEnabled(True)
+    logic.sliceBrowsingRenderTimeoutSec = 0.0
+    logic.setPredictionEnabled(True)
+    logic.setPredictionHorizon(0.05)
+    self.app.layoutManagerInstance = StubLayoutManager(["Red"])
+    logic.start()
+    for frame in frames:
+      logic.onFrame()
+    logic.stop()
+    predictedHeight = logic.predictedTipPositions[0, 0, 1]
+    self.assertTrue(predictedHeight > logic.filteredTipPositions[0, 0, 1] + 10.0)
+    # Slice index of the height (normalized to the default interaction box) in the volume of 100 slices
+    sliceIndex = round(((predictedHeight - 200.0) / 235.0 + 0.5) * 99)
+    sliceOffset = self.app.layoutManager().sliceWidget("Red").sliceLogic().GetSliceOffset()
+    self.assertTrue(abs(sliceOffset - (sliceIndex + 0.5)) <= 1.0)
+
+class GestureRecordingController(SyntheticController):
+  """Keeps the gesture types that are enabled"""
+
+  def __init__(self, **kwargs):
+    SyntheticController.__init__(self, **kwargs)
+    self.enabledGestureTypes = set()
+
+  def enable_gesture(self, gestureType, enable=True):
+    if enable:
+      self.enabledGestureTypes.add(gestureType)
+    else:
+      self.enabledGestureTypes.discard(gestureType)
+
+class GestureFrame(Frame):
+  """Frame with the gestures that were recognized since the previous frame"""
+
+  def __init__(self, frameId, gestures):
+    Frame.__init__(self, frameId, frameId * 10000, [], framesPerSecond=100.0)
+    self.frameGestures = gestures
+
+  def gestures(self, sinceFrame=None):
+    return self.frameGestures
+
+class GestureRecognitionTest(unittest.TestCase):
+
+  def setUp(self):
+    installStubSlicerEnvironment()
+    import __main__
+    import SlicerLeapModule
+    from SlicerLeapModuleLib import Gestures, Subscriptions
+    self.SlicerLeapModule = SlicerLeapModule
+    self.Gestures = Gestures
+    self.allGestureTypes = set(Gestures.GESTURE_TYPE_NAMES)
+    self.Subscriptions = Subscriptions
+    self.stubs = __main__
+    self.originalApp = __main__.slicer.app
+
+  def tearDown(self):
+    self.stubs.slicer.app = self.originalApp
+
+  def test_gestureActions(self):
+    Gestures = self.Gestures
+    app = StubApplication()
+    app.layoutManagerInstance = StubLayoutManager(["Red", "Yellow"])
+    self.stubs.slicer.app = app
+    sliceLogic = app.layoutManagerInstance.sliceWidget("Red").sliceLogic()
+    def swipe(gestureId, gestureState, direction):
+      return Gesture(gestureId, Gestures.TYPE_SWIPE, gestureState, direction=Vector(*direction))
+    frames = [
+      GestureFrame(1, [Gesture(1, Gestures.TYPE_KEY_TAP, Gestures.STATE_STOP)]),
+      GestureFrame(2, [Gesture(2, Gestures.TYPE_KEY_TAP, Gestures.STATE_STOP), swipe(3, Gestures.STATE_START, (0.0, 1.0, 0.0))]),
+      GestureFrame(3, [swipe(3, Gestures.STATE_UPDATE, (0.0, 1.0, 0.0))]),
+      GestureFrame(4, [swipe(3, Gestures.STATE_STOP, (0.1, -1.0, 0.0)), Gesture(4, Gestures.TYPE_SCREEN_TAP, Gestures.STATE_STOP)]),
+      ]
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(GestureRecordingController(speed=0))
+    logic.LeapController = ListController(frames)
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    logic.setGestureControlEnabled(True)
+    logic.start()
+    offsets = []
+    for frame in frames:
+      logic.onFrame()
+      offsets.append(sliceLogic.GetSliceOffset())
+    logic.stop()
+    # Key taps step forward, screen taps backward, swipes step once when they stop
+    self.assertEqual(offsets, [1.0, 2.0, 2.0, 0.0])
+    self.assertEqual(app.layoutManagerInstance.sliceWidget("Yellow").sliceLogic().sliceOffsetChangeCount, 0)
+
+  def test_enableGesturesForSubscribers(self):
+    controller = GestureRecordingController(speed=0)
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(controller)
+    # Actions of only some gesture types
+    logic.gestureDispatcher.setAction(self.SlicerLeapModule.Gestures.TYPE_SWIPE, self.SlicerLeapModule.Gestures.STATE_STOP, None)
+    actionGestureTypes = logic.gestureDispatcher.getActionGestureTypes()
+    self.assertNotEqual(actionGestureTypes, self.allGestureTypes)
+    logic.subscribe(lambda snapshot: None)
+    self.assertEqual(controller.enabledGestureTypes, set())
+    gesturesSubscription = logic.subscribe(lambda snapshot: None, [self.Subscriptions.INTEREST_GESTURES])
+    self.assertEqual(controller.enabledGestureTypes, self.allGestureTypes)
+    # Gestures that a subscriber needs remain enabled when gesture control is disabled
+    logic.setGestureControlEnabled(True)
+    logic.setGestureControlEnabled(False)
+    self.assertEqual(controller.enabledGestureTypes, self.allGestureTypes)
+    logic.setGestureControlEnabled(True)
+    logic.unsubscribe(gesturesSubscription)
+    self.assertEqual(controller.enabledGestureTypes, actionGestureTypes)
+    logic.setGestureControlEnabled(False)
+    self.assertEqual(controller.enabledGestureTypes, set())
+    # Gestures are enabled on a new controller
+    logic.subscribe(lambda snapshot: None, [self.Subscriptions.INTEREST_GESTURES])
+    newController = GestureRecordingController(speed=0)
+    logic.setController(newController)
+    self.assertEqual(newController.enabledGestureTypes, self.allGestureTypes)
+
+class CatchUpTest(unittest.TestCase):
+
+  def setUp(self):
+    installStubSlicerEnvironment()
+    import SlicerLeapModule
+    self.SlicerLeapModule = SlicerLeapModule
+
+  def createLogic(self, controller):
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(controller)
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    self.receivedFrameIds = []
+    updateExtractedFrameState = logic.updateExtractedFrameState
+    def recordFrameId(frameArrays, deviceFramesPerSecond):
+      self.receivedFrameIds.append(frameArrays.frameId)
+      updateExtractedFrameState(frameArrays, deviceFramesPerSecond)
+    logic.updateExtractedFrameState = recordFrameId
+    return logic
+
+  def test_catchUpMissedFrames(self):
+    controller = PublishingController()
+    controller.publishDuringHistoryRead = False
+    logic = self.createLogic(controller)
+    logic.start()
+    logic.onFrame()
+    logic.onFrame()
+    for frameIndex in range(3):
+      controller.publish()
+    logic.onFrame()
+    logic.stop()
+    self.assertEqual(self.receivedFrameIds, [1, 2, 3, 4])
+    self.assertEqual(logic.statistics.duplicateFrameCount, 1)
+    self.assertEqual(logic.statistics.caughtUpFrameCount, 2)
+    self.assertEqual(logic.statistics.droppedFrameCount, 0)
+
+  def test_framePublishedDuringCatchUp(self):
+    controller = PublishingController()
+    logic = self.createLogic(controller)
+    logic.start()
+    logic.onFrame()
+    for pollIndex in range(3):
+      controller.publish()
+      controller.publish()
+      logic.onFrame()
+    logic.stop()
+    # Frames published while the history is read are processed by the next poll, each frame only once
+    self.assertEqual(self.receivedFrameIds, list(range(1, 10)))
+    self.assertEqual(logic.statistics.droppedFrameCount, 0)
+
+  def test_catchUpLimit(self):
+    controller = PublishingController()
+    controller.publishDuringHistoryRead = False
+    logic = self.createLogic(controller)
+    logic.maxCatchUpFrames = 2
+    logic.start()
+    logic.onFrame()
+    for frameIndex in range(5):
+      controller.publish()
+    logic.onFrame()
+    # Only the last maxCatchUpFrames missed frames are retrieved, the others are counted as dropped
+    self.assertEqual(self.receivedFrameIds, [1, 4, 5, 6])
+    self.assertEqual(logic.statistics.droppedFrameCount, 2)
+    logic.enableCatchUp = False
+    for frameIndex in range(3):
+      controller.publish()
+    logic.onFrame()
+    logic.stop()
+    self.assertEqual(self.receivedFrameIds, [1, 4, 5, 6, 9])
+    self.assertEqual(logic.statistics.droppedFrameCount, 4)
+
+class FailingRecorder(object):
+  numberOfRecordedFrames = 0
+  numberOfDroppedFrames = 0
+  filePath = "full.leaprec"
+
+  def addFrame(self, frameArrays):
+    pass
+
+  def stop(self):
+    raise IOError(28, "No space left on device")
+
+class StopTest(unittest.TestCase):
+
+  def setUp(self):
+    installStubSlicerEnvironment()
+    import __main__
+    import SlicerLeapModule
+    self.SlicerLeapModule = SlicerLeapModule
+    self.scene = __main__.slicer.mrmlScene
+
+  def test_cleanupIfRecordingFails(self):
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(SyntheticController(speed=0))
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    observerTags = set(self.scene.observers)
+    logic.start()
+    self.assertNotEqual(set(self.scene.observers), observerTags)
+    logic.recorder = FailingRecorder()
+    self.assertRaises(IOError, logic.stop)
+    self.assertFalse(logic.running)
+    self.assertIsNone(logic.recorder)
+    self.assertEqual(set(self.scene.observers), observerTags)
+    # Can be started again
+    logic.start()
+    logic.stop()
+
+class AdaptiveSchedulingTest(unittest.TestCase):
+
+  def setUp(self):
+    installStubSlicerEnvironment()
+    import SlicerLeapModule
+    self.SlicerLeapModule = SlicerLeapModule
+
+  def updateFor(self, logic, durationSec):
+    endTime = time.time() + durationSec
+    while time.time() < endTime:
+      logic.onFrame()
+      time.sleep(0.005)
+
+  def test_idleAndActive(self):
+    controller = PublishingController()
+    controller.publishDuringHistoryRead = False
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(controller)
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    logic.setPollingInterval(10)
+    logic.scheduler.idleDelaySec = 0.05
+    logic.start()
+    idleIntervalMs = int(round(1000.0 * logic.scheduler.idleIntervalSec))
+    # Active while frames with hands arrive
+    logic.onFrame()
+    self.assertFalse(logic.scheduler.isIdle)
+    self.assertEqual(logic.timer.interval, 10)
+    # Idle after idleDelaySec without new frames, although the last frame had hands (e.g., the device is disconnected)
+    self.updateFor(logic, 0.02)
+    self.assertFalse(logic.scheduler.isIdle)
+    self.updateFor(logic, 0.1)
+    self.assertTrue(logic.scheduler.isIdle)
+    self.assertEqual(logic.timer.interval, idleIntervalMs)
+    # Active again at the first new frame with hands
+    controller.publish()
+    logic.onFrame()
+    self.assertFalse(logic.scheduler.isIdle)
+    self.assertEqual(logic.timer.interval, 10)
+    logic.stop()
+
+class FiducialOutputTest(unittest.TestCase):
+
+  def setUp(self):
+    installStubSlicerEnvironment()
+    import __main__
+    import SlicerLeapModule
+    self.SlicerLeapModule = SlicerLeapModule
+    self.slicer = __main__.slicer
+
+  def processFrames(self, logic, frames):
+    logic.LeapController = ListController(frames)
+    logic.start()
+    for frame in frames:
+      logic.onFrame()
+    logic.stop()
+
+  def createLogic(self, fiducialNodeName):
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(ListController([]))
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    logic.setOutputMode(logic.OUTPUT_FIDUCIALS)
+    logic.setFiducialNodeName(fiducialNodeName)
+    logic.trace.setLevel(logic.trace.WARNING)
+    logic.trace.echo = False
+    logic.trace.setRingBufferSize(10)
+    return logic
+
+  def test_autoCreate(self):
+    logic = self.createLogic("FiducialOutputTestAutoCreate")
+    fingers = [(10, (10.0, 200.0, 0.0)), (11, (30.0, 220.0, -10.0))]
+    self.processFrames(logic, [createHandFrame(1, fingers)])
+    # Not created without auto-create, which is reported
+    self.assertIsNone(self.slicer.mrmlScene.GetFirstNodeByName("FiducialOutputTestAutoCreate"))
+    self.assertEqual([message[2] for message in logic.trace.ringBuffer], ["getFiducialNode"])
+    logic.setEnableAutoCreateTransforms(True)
+    self.processFrames(logic, [createHandFrame(2, fingers)])
+    fiducialNode = self.slicer.mrmlScene.GetFirstNodeByName("FiducialOutputTestAutoCreate")
+    self.assertEqual(fiducialNode.GetNumberOfFiducials(), 10)
+    self.assertEqual(fiducialNode.labels[:2], ["Hand1Finger1", "Hand1Finger2"])
+    self.assertEqual(fiducialNode.visibilities, [True, True] + [False] * 8)
+    numpy.testing.assert_allclose(fiducialNode.positions[:2], logic.tipPositionsRas[0, :2])
+    # No transforms are created in fiducial output mode
+    self.assertIsNone(self.slicer.mrmlScene.GetFirstNodeByName("Hand1Finger1"))
+
+  def test_existingNode(self):
+    fiducialNode = self.slicer.vtkMRMLMarkupsFiducialNode()
+    fiducialNode.SetName("FiducialOutputTestExisting")
+    self.slicer.mrmlScene.AddNode(fiducialNode)
+    logic = self.createLogic("FiducialOutputTestExisting")
+    numberOfNodes = len(self.slicer.mrmlScene.nodes)
+    self.processFrames(logic, [createHandFrame(1, [(10, (10.0, 200.0, 0.0))]), createHandFrame(2, [(10, (20.0, 200.0, 0.0))])])
+    self.assertEqual(len(self.slicer.mrmlScene.nodes), numberOfNodes)
+    numpy.testing.assert_allclose(fiducialNode.positions[0], logic.tipPositionsRas[0, 0])
+    self.assertEqual(fiducialNode.visibilities[:2], [True, False])
+    # One modified event per frame
+    self.assertEqual(fiducialNode.modifiedCount, 2)
+
+class SharedInstanceTest(unittest.TestCase):
+
+  def setUp(self):
+    installStubSlicerEnvironment()
+    import __main__
+    import SlicerLeapModule
+    self.SlicerLeapModule = SlicerLeapModule
+    self.stubs = __main__
+    self.originalApp = __main__.slicer.app
+    self.app = StubApplication()
+    __main__.slicer.app = self.app
+    # The shared logic acquires frames from Leap.Controller
+    self.originalLeapModule = sys.modules.get("Leap")
+    leapModule = types.ModuleType("Leap")
+    leapModule.Controller = SilentListenerController
+    sys.modules["Leap"] = leapModule
+
+  def tearDown(self):
+    self.SlicerLeapModule.SlicerLeapModuleLogic.releaseInstance()
+    self.stubs.slicer.app = self.originalApp
+    if self.originalLeapModule is None:
+      del sys.modules["Leap"]
+    else:
+      sys.modules["Leap"] = self.originalLeapModule
+
+  def test_releaseOnQuit(self):
+    logicClass = self.SlicerLeapModule.SlicerLeapModuleLogic
+    logic = logicClass.getInstance()
+    self.assertIs(logicClass.getInstance(), logic)
+    self.assertTrue(logic.running)
+    self.app.emit('aboutToQuit()')
+    self.assertFalse(logic.running)
+    self.assertIsNone(logicClass.getInstance(create=False))
+    # The application signal is disconnected when the logic is released
+    self.assertEqual(self.app.connections, [])
+
+class EventLog(object):
+
+  def __init__(self):
+    self.events = []
+
+class LoggingTransformNode(StubTransformNode):
+  """Logs matrix changes and modified events"""
+
+  def __init__(self, name, eventLog):
+    StubTransformNode.__init__(self)
+    self.SetName(name)
+    self.eventLog = eventLog
+
+  def EndModify(self, previousDisableModified):
+    StubTransformNode.EndModify(self, previousDisableModified)
+    if not previousDisableModified:
+      self.eventLog.events.append(("modified", self.name))
+
+  def SetMatrixTransformToParent(self, matrix):
+    self.eventLog.events.append(("set", self.name))
+    StubTransformNode.SetMatrixTransformToParent(self, matrix)
+    if not self.disableModified:
+      self.eventLog.events.append(("modified", self.name))
+
+class RenderPausingApplication(StubApplication):
+
+  def __init__(self, eventLog):
+    StubApplication.__init__(self)
+    self.eventLog = eventLog
+
+  def pauseRender(self):
+    self.eventLog.events.append(("pauseRender", None))
+
+  def resumeRender(self):
+    self.eventLog.events.append(("resumeRender", None))
+
+class TransformUpdateTest(unittest.TestCase):
+
+  def setUp(self):
+    installStubSlicerEnvironment()
+    import __main__
+    import SlicerLeapModule
+    self.SlicerLeapModule = SlicerLeapModule
+    self.stubs = __main__
+    self.originalApp = __main__.slicer.app
+    self.eventLog = EventLog()
+    self.stubs.slicer.app = RenderPausingApplication(self.eventLog)
+    # Found before any transform nodes of other tests
+    self.transformNodes = [LoggingTransformNode(transformName, self.eventLog) for transformName in ["Hand1Finger1", "Hand1Finger2"]]
+    self.stubs.slicer.mrmlScene.nodes[0:0] = self.transformNodes
+
+  def tearDown(self):
+    self.stubs.slicer.app = self.originalApp
+    for transformNode in self.transformNodes:
+      self.stubs.slicer.mrmlScene.nodes.remove(transformNode)
+
+  def test_oneUpdatePerFrame(self):
+    frames = [createHandFrame(frameId, [(10, (10.0 * frameId, 200.0, 0.0)), (11, (30.0, 220.0, -10.0 * frameId))]) for frameId in [1, 2, 3]]
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(ListController(frames))
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    logic.start()
+    for frame in frames:
+      logic.onFrame()
+    logic.stop()
+    self.assertEqual(logic.pendingTransforms, [])
+    # Rendering is paused while the frame is written, the nodes are modified after all matrices are set
+    frameEvents = [("pauseRender", None), ("set", "Hand1Finger1"), ("set", "Hand1Finger2"),
+      ("modified", "Hand1Finger1"), ("modified", "Hand1Finger2"), ("resumeRender", None)]
+    self.assertEqual(self.eventLog.events, frameEvents * 3)
+    for transformNode, tipPositionRas in zip(self.transformNodes, logic.tipPositionsRas[0, :2]):
+      numpy.testing.assert_allclose([transformNode.matrix.GetElement(row, 3) for row in range(3)], tipPositionRas)
+
+  def test_deadBand(self):
+    frames = [
+      createHandFrame(1, [(10, (10.0, 200.0, 0.0)), (11, (30.0, 220.0, -10.0))]),
+      # Below the dead-band
+      createHandFrame(2, [(10, (10.3, 200.0, 0.0)), (11, (30.0, 220.2, -10.0))]),
+      # Moves more than the dead-band since the last written position, although less than that since the last frame
+      createHandFrame(3, [(10, (10.6, 200.0, 0.0)), (11, (30.0, 220.2, -10.0))]),
+      ]
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(ListController(frames))
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    logic.setDeadBand(0.5)
+    logic.start()
+    for frame in frames:
+      logic.onFrame()
+    writtenEvents = [("set", "Hand1Finger1"), ("set", "Hand1Finger2")], [], [("set", "Hand1Finger1")]
+    self.assertEqual([event for event in self.eventLog.events if event[0] == "set"], sum(writtenEvents, []))
+    self.assertEqual(self.transformNodes[0].matrix.GetElement(0, 3), -10.6)
+    self.assertEqual(self.transformNodes[1].matrix.GetElement(2, 3), 220.0)
+    # The last frame is polled again, it is not processed
+    del self.eventLog.events[:]
+    logic.onFrame()
+    logic.stop()
+    self.assertEqual(self.eventLog.events, [])
+    self.assertEqual(logic.statistics.duplicateFrameCount, 1)
+    self.assertEqual(logic.statistics.processedFrameCount, 3)
+
+class StatisticsTest(unittest.TestCase):
+
+  def setUp(self):
+    installStubSlicerEnvironment()
+    import SlicerLeapModule
+    self.SlicerLeapModule = SlicerLeapModule
+
+  def test_allStagesTimed(self):
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(SyntheticController(speed=0))
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    logic.start()
+    for frameIndex in range(10):
+      logic.onFrame()
+    logic.stop()
+    snapshot = logic.getStatistics()
+    self.assertEqual(sorted(snapshot["stages"]), sorted(logic.statistics.STAGES))
+    self.assertEqual(snapshot["receivedFrameCount"], 10)
+    self.assertEqual(snapshot["processedFrameCount"], 10)
+    # The total includes all other stages
+    for stage in ["acquire", "extract", "filter", "mrmlWrite", "consumers"]:
+      self.assertTrue(snapshot["stages"][stage]["maxMs"] <= snapshot["stages"]["total"]["maxMs"])
+    logic.resetStatistics()
+    self.assertEqual(logic.getStatistics()["stages"], {})
+
+class NavigationTest(unittest.TestCase):
+
+  def setUp(self):
+    installStubSlicerEnvironment()
+    import __main__
+    import SlicerLeapModule
+    self.SlicerLeapModule = SlicerLeapModule
+    self.stubs = __main__
+    self.originalApp = __main__.slicer.app
+
+  def tearDown(self):
+    self.stubs.slicer.app = self.originalApp
+
+  def test_sliceFollowsHands(self):
+    app = StubApplication()
+    app.layoutManagerInstance = StubLayoutManager(["Red"])
+    self.stubs.slicer.app = app
+    sliceLogic = app.layoutManagerInstance.sliceWidget("Red").sliceLogic()
+    hands = createHandFrame(1, [(10, (10.0, 200.0, 0.0))]).hands
+    frames = [
+      MotionFrame(1, hands),
+      # Up by 5 mm, which is along the normal of the axial slice
+      MotionFrame(2, hands, translation=(0.0, 5.0, 0.0)),
+      # Sideways, within the slice
+      MotionFrame(3, hands, translation=(4.0, 0.0, 0.0)),
+      MotionFrame(4, []),
+      # Motion since a frame before the hands left is ignored
+      MotionFrame(5, hands, translation=(0.0, 7.0, 0.0)),
+      MotionFrame(6, hands, translation=(0.0, -2.0, 0.0)),
+      ]
+    logic = self.SlicerLeapModule.SlicerLeapModuleLogic(ListController(frames))
+    logic.setFrameDeliveryMode(logic.FRAME_DELIVERY_POLLING)
+    logic.navigationSliceViewName = "Red"
+    logic.setNavigationEnabled(True)
+    logic.start()
+    offsets = []
+    for frame in frames:
+      logic.onFrame()
+      offsets.append(sliceLogic.GetSliceOffset())
+    logic.stop()
+    self.assertEqual(offsets, [0.0, 5.0, 5.0, 5.0, 5.0, 3.0])
@@ -0,0 +1,53 @@
+import unittest
+import numpy
+
+from SlicerLeapModuleLib import Subscriptions
+
+def createSnapshot():
+  handShape = (2,)
+  fingerShape = (2, 5)
+  return Subscriptions.FrameSnapshot(numpy.zeros(handShape, dtype=bool), numpy.zeros(handShape, dtype=int), numpy.zeros(handShape + (3,)),
+    numpy.zeros(fingerShape, dtype=bool), numpy.zeros(fingerShape, dtype=int), numpy.zeros(fingerShape + (3,)),
+    numpy.zeros(fingerShape + (3,)), numpy.zeros(fingerShape + (3,)))
+
+class FrameSubscribersTest(unittest.TestCase):
+
+  def publishFrames(self, subscribers, gesturesOfFrames, frameIntervalSec=0.1):
+    snapshot = createSnapshot()
+    for frameIndex, gestures in enumerate(gesturesOfFrames):
+      snapshot.frameId = frameIndex
+      snapshot.timeSec = frameIndex * frameIntervalSec
+      snapshot.gestures = gestures
+      subscribers.publish(snapshot)
+      self.assertEqual(snapshot.gestures, gestures)
+
+  def test_rateLimit(self):
+    subscribers = Subscriptions.FrameSubscribers()
+    frameIds = []
+    subscribers.subscribe(lambda snapshot: frameIds.append(snapshot.frameId), [Subscriptions.INTEREST_FINGERTIPS], maxRateHz=4)
+    self.publishFrames(subscribers, [()] * 8)
+    self.assertEqual(frameIds, [0, 3, 6])
+
+  def test_gesturesOnlySubscriber(self):
+    subscribers = Subscriptions.FrameSubscribers()
+    calls = []
+    subscribers.subscribe(lambda snapshot: calls.append((snapshot.frameId, list(snapshot.gestures))), [Subscriptions.INTEREST_GESTURES])
+    self.publishFrames(subscribers, [(), ("a",), (), ("b", "c")])
+    self.assertEqual(calls, [(1, ["a"]), (3, ["b", "c"])])
+
+  def test_gesturesCollectedForRateLimitedSubscriber(self):
+    subscribers = Subscriptions.FrameSubscribers()
+    calls = []
+    subscribers.subscribe(lambda snapshot: calls.append((snapshot.frameId, list(snapshot.gestures))),
+      [Subscriptions.INTEREST_GESTURES, Subscriptions.INTEREST_HANDS], maxRateHz=4)
+    unlimitedCalls = []
+    subscribers.subscribe(lambda snapshot: unlimitedCalls.append((snapshot.frameId, list(snapshot.gestures))), [Subscriptions.INTEREST_GESTURES])
+    self.publishFrames(subscribers, [("a",), ("b",), (), ("c",), (), ("d",), ()])
+    # Gestures of skipped frames are passed with the next call, other subscribers receive only the gestures of the frame
+    self.assertEqual(calls, [(0, ["a"]), (3, ["b", "c"]), (6, ["d"])])
+    self.assertEqual(unlimitedCalls, [(0, ["a"]), (1, ["b"]), (3, ["c"]), (5, ["d"])])
+
+  def test_invalidInterests(self):
+    subscribers = Subscriptions.FrameSubscribers()
+    self.assertRaises(ValueError, subscribers.subscribe, lambda snapshot: None, [])
+    self.assertRaises(ValueError, subscribers.subscribe, lambda snapshot: None, ["fingers"])
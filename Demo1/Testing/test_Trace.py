@@ -0,0 +1,76 @@
+import io
+import logging
+import unittest
+
+from SlicerLeapModuleLib.Trace import TraceChannel
+
+class RecordingHandler(logging.Handler):
+
+  def __init__(self):
+    logging.Handler.__init__(self)
+    self.records = []
+
+  def emit(self, record):
+    self.records.append(record)
+
+class TraceChannelTest(unittest.TestCase):
+
+  def setUp(self):
+    self.handler = RecordingHandler()
+    self.trace = TraceChannel(name="TraceChannelTest", level=TraceChannel.INFO, minimumIntervalSec=1000.0)
+    self.trace.logger.addHandler(self.handler)
+    self.trace.logger.propagate = False
+
+  def tearDown(self):
+    self.trace.logger.removeHandler(self.handler)
+
+  def getPrintedMessages(self):
+    return [(record.levelno, record.getMessage()) for record in self.handler.records]
+
+  def test_offByDefault(self):
+    trace = TraceChannel(name="TraceChannelTest")
+    trace.setRingBufferSize(10)
+    trace.error("error", "not collected")
+    self.assertEqual(len(trace.ringBuffer), 0)
+    self.assertFalse(trace.isEnabled(TraceChannel.ERROR))
+
+  def test_levels(self):
+    self.trace.debug("debug", "frame %d", 1)
+    self.trace.info("info", "frame %d", 2)
+    self.trace.error("error", "failed")
+    self.assertEqual(self.getPrintedMessages(), [(logging.INFO, "frame 2"), (logging.ERROR, "failed")])
+    self.trace.setLevel(TraceChannel.DEBUG)
+    self.trace.debug("debug", "frame %d", 3)
+    self.assertEqual(self.getPrintedMessages()[-1], (logging.DEBUG, "frame 3"))
+
+  def test_rateLimit(self):
+    for frameIndex in range(5):
+      self.trace.warning("repeated", "frame %d", frameIndex)
+    # Other message ids are not limited
+    self.trace.warning("other", "other message")
+    self.assertEqual(self.getPrintedMessages(), [(logging.WARNING, "frame 0"), (logging.WARNING, "other message")])
+    self.assertEqual(self.trace.suppressedCounts, {"repeated": 4})
+    # The number of suppressed messages is reported with the next printed one
+    self.trace.minimumIntervalSec = 0.0
+    self.trace.warning("repeated", "frame %d", 5)
+    self.assertEqual(self.getPrintedMessages()[-1], (logging.WARNING, "frame 5 (4 similar messages suppressed)"))
+    self.assertEqual(self.trace.suppressedCounts, {})
+
+  def test_ringBuffer(self):
+    self.trace.echo = False
+    self.trace.setRingBufferSize(3)
+    for frameIndex in range(5):
+      self.trace.info("frame", "frame %d", frameIndex)
+    # Not printed, only the last messages are kept
+    self.assertEqual(self.getPrintedMessages(), [])
+    self.assertEqual([message[4] for message in self.trace.ringBuffer], [(2,), (3,), (4,)])
+    stream = io.StringIO()
+    self.trace.dump(stream)
+    lines = stream.getvalue().splitlines()
+    self.assertEqual(len(lines), 3)
+    self.assertTrue(lines[0].endswith("INFO [frame] frame 2"))
+    # Messages are kept when the buffer is resized
+    self.trace.setRingBufferSize(10)
+    self.assertEqual(len(self.trace.ringBuffer), 3)
+    self.trace.clear()
+    self.assertEqual(len(self.trace.ringBuffer), 0)
@@ -0,0 +1,54 @@
+import unittest
+
+from SlicerLeapModuleLib.Tracking import SlotAssigner
+
+class SlotAssignerTest(unittest.TestCase):
+
+  def assignFrame(self, assigner, trackingIds):
+    """Assign the ids of a frame and return their slots"""
+    slots = assigner.assignIds(trackingIds)
+    assigner.endFrame()
+    return slots
+
+  def test_slotsStableWhenFingersDropOut(self):
+    assigner = SlotAssigner(5)
+    self.assertEqual(self.assignFrame(assigner, [10, 11, 12, 13, 14]), [0, 1, 2, 3, 4])
+    # Other fingers keep their slots when some are missing, in any order
+    self.assertEqual(self.assignFrame(assigner, [14, 12, 10]), [4, 2, 0])
+    self.assertEqual(self.assignFrame(assigner, [11, 13, 14]), [1, 3, 4])
+    # A new id gets the lowest free slot once the slot of a lost id is released
+    for frameIndex in range(assigner.reclaimAfterFrames):
+      self.assignFrame(assigner, [11, 12, 13, 14])
+    self.assertEqual(assigner.getSlot(10), -1)
+    self.assertEqual(self.assignFrame(assigner, [11, 12, 13, 14, 20]), [1, 2, 3, 4, 0])
+
+  def test_moreIdsThanSlots(self):
+    assigner = SlotAssigner(2)
+    self.assertEqual(self.assignFrame(assigner, [1, 2, 3]), [0, 1, -1])
+    # Ids that have slots keep them, the extra id is still not assigned, regardless of the order of the ids
+    self.assertEqual(self.assignFrame(assigner, [3, 2, 1]), [-1, 1, 0])
+    self.assertEqual(assigner.getSlot(3), -1)
+    # A new id takes over the slot of an id that is not seen in the current frame
+    self.assertEqual(self.assignFrame(assigner, [2, 3]), [1, 0])
+    self.assertEqual(assigner.getSlot(1), -1)
+
+  def test_takeOverLeastRecentlySeenSlot(self):
+    assigner = SlotAssigner(3)
+    self.assignFrame(assigner, [1, 2, 3])
+    self.assignFrame(assigner, [2, 3])
+    self.assignFrame(assigner, [3])
+    # Slot of id 1 was seen least recently
+    self.assertEqual(self.assignFrame(assigner, [3, 4]), [2, 0])
+    self.assertEqual(self.assignFrame(assigner, [3, 4, 5]), [2, 0, 1])
+
+  def test_releasedSlots(self):
+    assigner = SlotAssigner(2, reclaimAfterFrames=1)
+    assigner.assign(1)
+    assigner.assign(2)
+    self.assertEqual(assigner.endFrame(), [])
+    assigner.assign(2)
+    self.assertEqual(assigner.endFrame(), [])
+    assigner.assign(2)
+    self.assertEqual(assigner.endFrame(), [0])
+    self.assertEqual(assigner.getSlot(1), -1)
+    self.assertEqual(assigner.getSlot(2), 1)
@@ -0,0 +1,55 @@
+import unittest
+import numpy
+
+from SlicerLeapModuleLib.Workspace import InteractionBoxNormalizer, LeapToRasCalibration
+
+class LeapToRasCalibrationTest(unittest.TestCase):
+
+  def setUp(self):
+    self.interactionBox = InteractionBoxNormalizer()
+    self.interactionBox.setBox((10.0, 220.0, -5.0), (200.0, 180.0, 120.0))
+    self.calibration = LeapToRasCalibration(self.interactionBox)
+    self.positions = numpy.array([[[12.5, 180.0, -30.0], [-70.0, 250.0, 40.0]], [[0.0, 0.0, 0.0], [110.0, 310.0, 55.0]]])
+
+  def test_defaultIsReorientation(self):
+    output = numpy.zeros(self.positions.shape)
+    self.calibration.apply(self.positions, output)
+    # Same as the original mapping of fingertip positions to transforms: (-x, z, y)
+    expected = numpy.stack([-self.positions[..., 0], self.positions[..., 2], self.positions[..., 1]], axis=-1)
+    numpy.testing.assert_allclose(output, expected)
+
+  def test_boxMappedToRegion(self):
+    rasBounds = (-100.0, 60.0, -30.0, 90.0, 5.0, 205.0)
+    self.calibration.setTargetBounds(rasBounds)
+    center = numpy.array([10.0, 220.0, -5.0])
+    halfSize = numpy.array([100.0, 90.0, 60.0])
+    # Box center, left-bottom-far corner, right-top-near corner
+    positions = numpy.array([center, center - halfSize, center + halfSize])
+    output = numpy.zeros(positions.shape)
+    self.calibration.apply(positions, output)
+    numpy.testing.assert_allclose(output[0], [-20.0, 30.0, 105.0])
+    # Leap right (+x) is patient left (-R), Leap near (+z) is anterior, Leap up (+y) is superior
+    numpy.testing.assert_allclose(output[1], [60.0, -30.0, 5.0])
+    numpy.testing.assert_allclose(output[2], [-100.0, 90.0, 205.0])
+
+  def test_followsInteractionBox(self):
+    self.calibration.setTargetBounds((0.0, 100.0, 0.0, 100.0, 0.0, 100.0))
+    self.assertTrue(self.calibration.isUpToDate())
+    self.interactionBox.setBox((0.0, 200.0, 0.0), (200.0, 200.0, 200.0))
+    self.assertFalse(self.calibration.isUpToDate())
+    self.calibration.updateMatrix()
+    self.assertTrue(self.calibration.isUpToDate())
+    output = numpy.zeros((1, 3))
+    self.calibration.apply(numpy.array([[0.0, 200.0, 0.0]]), output)
+    numpy.testing.assert_allclose(output[0], [50.0, 50.0, 50.0])
+
+  def test_stringRoundTrip(self):
+    rasBounds = (-100.0, 60.0, -30.0, 90.0, 5.0, 205.0)
+    self.calibration.setTargetBounds(rasBounds)
+    restored = LeapToRasCalibration(self.interactionBox)
+    restored.setFromString(self.calibration.toString())
+    self.assertEqual(restored.targetBounds, rasBounds)
+    numpy.testing.assert_allclose(restored.matrix, self.calibration.matrix)
+    restored.setFromString("")
+    self.assertIsNone(restored.targetBounds)
+    self.assertRaises(ValueError, restored.setFromString, "1 2 3")